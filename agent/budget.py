@@ -0,0 +1,77 @@
+from contextvars import ContextVar
+import threading
+import time
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Why a run stopped
+BUDGET_COMPLETED = "completed"
+BUDGET_ITERATIONS = "max_iterations"
+BUDGET_TOOL_CALLS = "max_tool_calls"
+BUDGET_DEADLINE = "deadline"
+
+# The budget of the agent run the current tool call belongs to
+_current_budget = ContextVar("run_budget", default=None)
+
+
+class RunBudget:
+    """Tool-call memo and limits for one agent run.
+
+    Identical tool inputs are answered from the run's memo instead of calling the
+    tool again. Once ``max_tool_calls`` tools have run or ``deadline_seconds`` have
+    passed, tools stop running and tell the agent to write its final answer;
+    ``exhausted_by`` records which limit was hit.
+    """
+
+    def __init__(self, max_tool_calls=None, deadline_seconds=None):
+        self.max_tool_calls = max_tool_calls
+        self.deadline = None if deadline_seconds is None else time.monotonic() + deadline_seconds
+        self.tool_calls = 0
+        self.memo_hits = 0
+        self.exhausted_by = None
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def remember(self, tool, key, source):
+        """Mark ``tool(key)`` as already answered; ``source`` says where the agent can find it"""
+        with self._lock:
+            self._memo[(tool, key)] = source
+
+    def check(self, tool, key):
+        """Return a note for the agent instead of running the tool, or None to run it"""
+        with self._lock:
+            source = self._memo.get((tool, key))
+            if source is not None:
+                self.memo_hits += 1
+                logger.info(f"Skipping repeated {tool} call for: {key}")
+                return f"Already looked up {source}; use that result instead of asking again."
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                self.exhausted_by = self.exhausted_by or BUDGET_DEADLINE
+            elif self.max_tool_calls is not None and self.tool_calls >= self.max_tool_calls:
+                self.exhausted_by = self.exhausted_by or BUDGET_TOOL_CALLS
+            else:
+                self.tool_calls += 1
+                return None
+        logger.warning(f"Run budget exhausted ({self.exhausted_by}), refusing {tool} call")
+        return "The time and tool budget for this plan is used up. Write the Final Answer now with what you have."
+
+    def record(self, tool, key, result):
+        """Memoize a finished tool call unless it failed"""
+        if isinstance(result, dict) and "error" in result:
+            return
+        self.remember(tool, key, "earlier in this conversation")
+
+
+def use_budget(budget):
+    """Make ``budget`` the one used by tool calls in the current context"""
+    return _current_budget.set(budget)
+
+
+def release_budget(token):
+    _current_budget.reset(token)
+
+
+def current_budget():
+    return _current_budget.get()
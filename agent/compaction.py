@@ -0,0 +1,161 @@
+from contextvars import ContextVar
+import math
+import re
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Fields that only matter to the tools themselves
+_INTERNAL_KEYS = {"city_id"}
+
+# The compactor of the agent run the current tool call belongs to
+_current_compactor = ContextVar("observation_compactor", default=None)
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (about four characters per token for English)"""
+    return math.ceil(len(text) / 4)
+
+
+def _scalar(value):
+    if isinstance(value, float):
+        return f"{value:.1f}".rstrip("0").rstrip(".")
+    return re.sub(r"\s+", " ", str(value)).strip()
+
+
+class ObservationCompactor:
+    """Turns tool results into short observations for the agent's scratchpad.
+
+    Results are rendered as terse ``key=value`` lines instead of Python reprs, search
+    results whose snippet was already shown earlier in the run are dropped (and links
+    are shown only once), and each observation is cut to ``max_observation_tokens``.
+    Once ``max_total_tokens`` of observations have been produced, further tool calls
+    only get a note asking the agent to finish. One instance serves one agent run.
+    """
+
+    def __init__(self, max_observation_tokens=300, max_total_tokens=1500):
+        self.max_observation_tokens = max_observation_tokens
+        self.max_total_tokens = max_total_tokens
+        self.used_tokens = 0
+        self.raw_tokens = 0
+        self._seen_links = set()
+        self._seen_snippets = set()
+
+    @property
+    def exhausted(self):
+        return self.used_tokens >= self.max_total_tokens
+
+    def compact(self, result):
+        """Return the compacted observation text for one tool result"""
+        raw = result if isinstance(result, str) else str(result)
+        self.raw_tokens += estimate_tokens(raw)
+
+        remaining = self.max_total_tokens - self.used_tokens
+        if remaining <= 0:
+            return "Observation budget for this plan is used up; write the final answer with what you have."
+
+        lines = [raw] if isinstance(result, str) else self._render(result)
+        if not lines:
+            lines = ["No new information (results repeat earlier observations)."]
+        text = self._truncate(lines, min(self.max_observation_tokens, remaining))
+        self.used_tokens += estimate_tokens(text)
+        return text
+
+    def _render(self, value, prefix=""):
+        if isinstance(value, dict):
+            if "error" in value:
+                return [f"{prefix}error={_scalar(value['error'])}"]
+            if "snippet" in value or "link" in value:
+                line = self._render_search_result(value)
+                return [prefix + line] if line else []
+
+            fields = []
+            nested = []
+            for key, item in value.items():
+                if key in _INTERNAL_KEYS or item is None or item == "":
+                    continue
+                if isinstance(item, (dict, list, tuple)):
+                    nested.append((key, item))
+                else:
+                    fields.append(f"{key}={_scalar(item)}")
+            lines = [prefix + " ".join(fields)] if fields else []
+            for key, item in nested:
+                child = self._render(item, "  ")
+                if child:
+                    lines.append(f"{prefix}{key}:")
+                    lines.extend(prefix + line for line in child)
+            return lines
+
+        if isinstance(value, (list, tuple)):
+            lines = []
+            for item in value:
+                child = self._render(item)
+                if child:
+                    lines.append(f"{prefix}- {child[0]}")
+                    lines.extend(f"{prefix}  {line}" for line in child[1:])
+            return lines
+
+        return [prefix + _scalar(value)]
+
+    def _render_search_result(self, result):
+        """One line per search hit; hits whose snippet was already shown are dropped"""
+        snippet = _scalar(result.get("snippet") or "")
+        snippet_key = snippet.lower()
+        if snippet_key and snippet_key in self._seen_snippets:
+            return None
+        self._seen_snippets.add(snippet_key)
+
+        line = _scalar(result.get("title") or "")
+        if snippet:
+            line = f"{line}: {snippet}" if line else snippet
+        link = (result.get("link") or "").rstrip("/")
+        if link and link not in self._seen_links:
+            self._seen_links.add(link)
+            line += f" <{link}>"
+        return line
+
+    @staticmethod
+    def _truncate(lines, budget):
+        kept = []
+        used = 0
+        for index, line in enumerate(lines):
+            cost = estimate_tokens(line) + 1
+            if used + cost > budget:
+                if not kept:
+                    # A single oversized line is cut rather than dropped
+                    kept.append(line[:max(0, budget - 8) * 4] + "...")
+                    index += 1
+                omitted = len(lines) - index
+                if omitted:
+                    kept.append(f"({omitted} more line(s) omitted)")
+                break
+            kept.append(line)
+            used += cost
+        return "\n".join(kept)
+
+
+def start_run(compactor):
+    """Make ``compactor`` the one used by tool calls in the current context"""
+    return _current_compactor.set(compactor)
+
+
+def end_run(token):
+    _current_compactor.reset(token)
+
+
+def current_compactor():
+    return _current_compactor.get()
+
+
+def render_observation(result, max_tokens=300):
+    """Compact one result on its own, outside any run's deduplication and budget"""
+    return ObservationCompactor(max_observation_tokens=max_tokens, max_total_tokens=math.inf).compact(result)
+
+
+def compact_observation(result):
+    """Compact ``result`` with the current run's compactor, or return its plain ``str()``"""
+    compactor = _current_compactor.get()
+    if compactor is None:
+        return result if isinstance(result, str) else str(result)
+    return compactor.compact(result)
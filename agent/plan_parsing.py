@@ -0,0 +1,226 @@
+import ast
+import json
+import re
+import threading
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# How a final answer became a plan
+PARSE_OK = "parsed"
+PARSE_REPAIRED = "repaired"
+PARSE_FIXED_BY_LLM = "fixed_by_llm"
+PARSE_TEXT = "text"
+PARSE_FAILED = "failed"
+
+PLAN_FORMAT_INSTRUCTIONS = (
+    'Your Final Answer must be only a JSON object, with no other text or code fences, shaped like '
+    '{"Day 1": ["activity", "activity"], "Day 2": ["activity"]}: one key per day, each value a list '
+    'of activities as strings.'
+)
+
+FIX_JSON_PROMPT = """The text below was meant to be a travel plan as a JSON object with one key per day
+("Day 1", "Day 2", ...) and a list of activity strings as each value, but it is not valid JSON.
+Reply with only the corrected JSON object and keep every activity.
+
+{text}"""
+
+REPLAN_DAY_PROMPT = """You are revising one day of a travel plan.
+
+Goal: {goal}
+
+Current plan:
+{plan}
+
+Information gathered with web search and weather tools when the plan was made:
+{observations}
+
+Rewrite "{day}" following this request: {instruction}
+Keep it consistent with the other days and do not repeat their activities.
+Reply with only a JSON object with the single key "{day}" and a list of activity strings as its value."""
+
+# Keys models sometimes wrap the day-by-day plan in
+WRAPPER_KEYS = ("plan", "itinerary", "days", "schedule")
+
+
+def json_objects(text):
+    """Return every top-level ``{...}`` span in ``text``, longest first.
+
+    Braces inside JSON strings are ignored, so prose around the object (even prose
+    containing braces) does not break extraction. An object still open at the end of
+    the text is returned as well, for ``repair_json`` to close.
+    """
+    spans = []
+    depth = 0
+    start = None
+    in_string = escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"' and depth:
+            in_string = True
+        elif char == "{":
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                spans.append(text[start:index + 1])
+    if depth:
+        spans.append(text[start:])
+    return sorted(spans, key=len, reverse=True)
+
+
+def repair_json(text):
+    """Fix the mistakes models commonly make in JSON without another LLM call"""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    text = text.replace("“", '"').replace("”", '"')
+    # Missing commas between values on consecutive lines
+    text = re.sub(r'("|\]|\})(\s*\n\s*)("|\[|\{)', r"\1,\2\3", text)
+    # Trailing commas
+    text = re.sub(r",\s*([}\]])", r"\1", text)
+
+    # Close strings, arrays and objects left open by a truncated answer
+    closers = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+    if in_string:
+        text += '"'
+    text = re.sub(r",\s*$", "", text)
+    return text + "".join(reversed(closers))
+
+
+def _day_key(day):
+    return f"Day {day}" if isinstance(day, int) and not isinstance(day, bool) else str(day)
+
+
+def validate_plan(value):
+    """Return ``value`` as a day-keyed plan dict, or None if it does not match the plan schema.
+
+    A plan is a non-empty object whose values are activity lists, time-slot objects or
+    strings. A plan wrapped in a single "plan"/"itinerary" key, or given as a list of
+    ``{"day": ..., "activities": [...]}`` objects, is unwrapped.
+    """
+    if isinstance(value, dict) and len(value) == 1:
+        key, inner = next(iter(value.items()))
+        if isinstance(key, str) and key.lower() in WRAPPER_KEYS and isinstance(inner, (dict, list)):
+            value = inner
+    if isinstance(value, list):
+        days = {}
+        for index, item in enumerate(value, 1):
+            if not isinstance(item, dict):
+                return None
+            day = item.get("day") or item.get("title") or f"Day {index}"
+            activities = item.get("activities") or item.get("plan") or item.get("items")
+            if activities is None:
+                return None
+            days[day] = activities
+        value = days
+    if not isinstance(value, dict) or not value:
+        return None
+    # A Python dict repr can have numeric day keys; stored plans need string keys
+    value = {_day_key(day): activities for day, activities in value.items()}
+    for activities in value.values():
+        if not isinstance(activities, (list, dict, str)):
+            return None
+        if isinstance(activities, list) and not all(isinstance(item, (str, dict)) for item in activities):
+            return None
+    return value
+
+
+def _load_plan(candidate, repair=False):
+    """Validate one candidate span as a plan; None if it cannot be read as one"""
+    try:
+        return validate_plan(json.loads(repair_json(candidate) if repair else candidate))
+    except (json.JSONDecodeError, RecursionError):
+        if not repair:
+            return None
+    try:
+        # Models sometimes answer with a Python dict repr (single quotes, True/None)
+        return validate_plan(ast.literal_eval(candidate))
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def parse_plan_text(text):
+    """Parse a final answer locally; returns ``(plan, outcome)`` with plan None on failure.
+
+    Never raises: an answer that cannot be read as a plan is a parse failure, not an error.
+    """
+    if not isinstance(text, str):
+        return None, None
+    try:
+        candidates = json_objects(text)
+        for candidate in candidates:
+            plan = _load_plan(candidate)
+            if plan is not None:
+                return plan, PARSE_OK
+
+        # A fenced block has no clean object span, so the whole answer is tried too
+        for candidate in candidates + [text]:
+            plan = _load_plan(candidate, repair=True)
+            if plan is not None:
+                return plan, PARSE_REPAIRED
+    except Exception as e:
+        logger.warning(f"Could not parse final answer as a plan: {e}")
+    return None, None
+
+
+def legacy_parse_succeeds(text):
+    """Whether the old first-brace-to-last-brace ``json.loads`` would have accepted ``text``"""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if not match:
+        return True  # it returned the answer as a text plan
+    try:
+        json.loads(match.group())
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+class ParseStats:
+    """Counts parse outcomes in this process, to show how many agent re-runs parsing saved"""
+
+    def __init__(self):
+        self._counts = {}
+        self._saved = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome, saved=False):
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            self._saved += bool(saved)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            "counts": counts,
+            "failure_rate": round(counts.get(PARSE_FAILED, 0) / total, 3) if total else None,
+            # Answers the old parsing rejected (forcing a full re-run) that parsed now
+            "saved_runs": self._saved
+        }
+
+
+parse_stats = ParseStats()
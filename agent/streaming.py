@@ -0,0 +1,141 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from agent.plan_parsing import WRAPPER_KEYS
+import json
+import logging
+import re
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+class IncrementalPlanParser:
+    """Incremental parser for a JSON plan object arriving in chunks.
+
+    ``feed`` returns the top-level ``(day, activities)`` members completed by the new
+    text. A member whose value is an array or object is emitted as soon as its closing
+    bracket arrives; scalar values are emitted at the following comma or brace. Any
+    prose before the first ``{`` is ignored, and a plan wrapped in a single "plan"/
+    "itinerary" object is streamed from inside the wrapper, as ``validate_plan``
+    unwraps it. Plans given as a list of day objects are left to the full parse.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.finished = False
+        self._pos = 0
+        self._depth = 0
+        # Depth of the object whose members are days: 2 inside a wrapper key
+        self._day_depth = 1
+        self._in_string = False
+        self._escape = False
+        self._object_start = None
+        self._member_start = None
+        self._member_emitted = False
+
+    def feed(self, text):
+        members = []
+        if self.finished:
+            return members
+        self.buffer += text
+
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif self._depth == 0:
+                if char == "{":
+                    if self.buffer[:self._pos].rstrip()[-1:] in ("[", ","):
+                        # The object is an item of a list of days
+                        self.finished = True
+                        break
+                    self._depth = 1
+                    self._object_start = self._member_start = self._pos + 1
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if char == "{" and self._depth == 2 and self._is_wrapper_key():
+                    self._day_depth = 2
+                    self._member_start = self._pos + 1
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == self._day_depth:
+                    # A day's list or dict just closed
+                    members.extend(self._emit(self._pos + 1))
+                    self._member_emitted = True
+                elif self._depth == self._day_depth - 1:
+                    if not self._member_emitted:
+                        members.extend(self._emit(self._pos))
+                    if self._depth == 0:
+                        self.finished = True
+                        self._pos += 1
+                        break
+                    # The wrapper closed; anything after it is left to the full parse
+                    self._day_depth = 1
+                    self._member_emitted = True
+            elif char == "," and self._depth == self._day_depth:
+                if not self._member_emitted:
+                    members.extend(self._emit(self._pos))
+                self._member_start = self._pos + 1
+                self._member_emitted = False
+            self._pos += 1
+
+        return members
+
+    def _is_wrapper_key(self):
+        """True if the object just opened is the value of a first, wrapper-named key"""
+        if self._day_depth != 1 or self._member_start != self._object_start:
+            return False
+        match = re.fullmatch(r'\s*"([^"\\]*)"\s*:\s*', self.buffer[self._member_start:self._pos])
+        return bool(match) and match.group(1).lower() in WRAPPER_KEYS
+
+    def _emit(self, end):
+        member = self.buffer[self._member_start:end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except json.JSONDecodeError:
+            # Leave malformed members to the full parse once the answer is complete
+            logger.debug(f"Could not parse streamed plan member: {member[:80]}")
+            return []
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """Forward the tokens of the agent's final answer to ``on_token``.
+
+    Intermediate ReAct steps (thoughts and tool calls) are swallowed; only text after
+    ``Final Answer:`` in an LLM response is passed on.
+    """
+
+    def __init__(self, on_token):
+        self.on_token = on_token
+        self._response = ""
+        self._in_final_answer = False
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._response = ""
+        self._in_final_answer = False
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.on_llm_start(serialized, [], **kwargs)
+
+    def on_llm_new_token(self, token, **kwargs):
+        if self._in_final_answer:
+            self.on_token(token)
+            return
+
+        self._response += token
+        index = self._response.find(FINAL_ANSWER_MARKER)
+        if index != -1:
+            self._in_final_answer = True
+            remainder = self._response[index + len(FINAL_ANSWER_MARKER):]
+            if remainder:
+                self.on_token(remainder)
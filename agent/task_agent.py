@@ -1,21 +1,179 @@
 from langchain.agents import Tool, AgentType, initialize_agent
+from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
 from langchain_openai import ChatOpenAI
+from agent.budget import (
+    BUDGET_COMPLETED, BUDGET_DEADLINE, BUDGET_ITERATIONS, RunBudget, current_budget, release_budget, use_budget
+)
+from agent.compaction import (
+    ObservationCompactor, compact_observation, current_compactor, end_run, estimate_tokens, start_run
+)
+from agent.plan_parsing import (
+    FIX_JSON_PROMPT, PARSE_FAILED, PARSE_FIXED_BY_LLM, PARSE_TEXT, PLAN_FORMAT_INSTRUCTIONS, REPLAN_DAY_PROMPT,
+    legacy_parse_succeeds, parse_plan_text, parse_stats, validate_plan
+)
+from agent.streaming import FinalAnswerStreamHandler, IncrementalPlanParser
+from agent.tracing import PlanTracer
+from utils.cache import normalize_query
+from utils.call_stats import begin_call
+from utils.rate_limit import RateLimitTimeout, get_rate_limiter
 from utils.tools import WebSearchTool, WeatherTool
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
 import json
 import os
+import queue
 import re
+import threading
+import time
 import logging
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Words that start a clause after the destination ("trip to Jaipur with ...")
+_DESTINATION_STOP_WORDS = r'(?:with|for|on|during|this|next|from|over|including|focusing)'
+
+# Capitalised words after "in"/"on" that are dates, not places ("a trip in December to Goa")
+_TIME_WORDS = frozenset((
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december", "monday", "tuesday", "wednesday", "thursday", "friday",
+    "saturday", "sunday"
+))
+
+# Interests recognised in goals when they are not listed after "with"
+_KNOWN_TOPICS = (
+    "food", "restaurants", "street food", "nightlife", "museums", "history", "culture",
+    "beaches", "beach", "hiking", "trekking", "shopping", "temples", "forts", "wildlife",
+    "seafood", "cafes", "markets", "festivals", "architecture"
+)
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+class ProviderRateLimiter(BaseCallbackHandler):
+    """Routes a chat model's calls through the process-wide limiter for ``provider``.
+
+    Each call queues for a slot before it is sent and reports its latency, or a 429,
+    when it finishes, so OpenAI calls share the adaptive limit with everything else
+    calling that provider in this process. This handler blocks, so it only admits
+    calls made outside an event loop; ``AsyncProviderRateLimiter`` admits the rest.
+    Use ``rate_limit_callbacks`` to attach both.
+    """
+
+    # A queue timeout has to abort the call rather than be logged and ignored
+    raise_error = True
+    # On the async path this runs on the event loop thread instead of the default
+    # executor; there it only releases slots, which never blocks
+    run_inline = True
+
+    def __init__(self, provider):
+        self.provider = provider
+        self._admitted = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._acquire(run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._acquire(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._release(run_id, ok=True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._release(run_id, throttled=getattr(error, "status_code", None) == 429)
+
+    def _acquire(self, run_id):
+        if _on_event_loop():
+            return
+        limiter = get_rate_limiter(self.provider)
+        self._admit(run_id, limiter, limiter.acquire())
+
+    async def _aacquire(self, run_id):
+        with self._lock:
+            if run_id in self._admitted:
+                # Admitted by the blocking path already (a sync call runs async handlers too)
+                return
+        limiter = get_rate_limiter(self.provider)
+        self._admit(run_id, limiter, await limiter.aacquire())
+
+    def _admit(self, run_id, limiter, admitted):
+        if admitted is None:
+            raise RateLimitTimeout(self.provider, limiter.queue_timeout)
+        with self._lock:
+            self._admitted[run_id] = admitted
+
+    def _release(self, run_id, ok=False, throttled=False):
+        with self._lock:
+            admitted = self._admitted.pop(run_id, None)
+        if admitted is None:
+            return
+        latency = time.monotonic() - admitted if ok or throttled else None
+        get_rate_limiter(self.provider).release(admitted, latency=latency, throttled=throttled)
+
+class AsyncProviderRateLimiter(AsyncCallbackHandler):
+    """Admits async calls for a ``ProviderRateLimiter`` by awaiting a slot on the event loop.
+
+    Run in the default executor, the blocking handler would hold its threads while
+    queueing and starve the callbacks that free slots. Releases stay with the
+    ``ProviderRateLimiter``, which runs inline on the loop.
+    """
+
+    raise_error = True
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        await self.limiter._aacquire(run_id)
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        await self.limiter._aacquire(run_id)
+
+def rate_limit_callbacks(provider):
+    """Callback handlers that rate limit a chat model's sync and async calls to ``provider``"""
+    limiter = ProviderRateLimiter(provider)
+    return [limiter, AsyncProviderRateLimiter(limiter)]
+
 class TaskPlanningAgent:
-    def __init__(self):
+    def __init__(self, llm=None, prefetch=None, compact_observations=None, db_client=None):
         logger.info("Initializing TaskPlanningAgent")
-        self.llm = ChatOpenAI(
+        # Where replan() reads and updates saved plans
+        self.db_client = db_client
+        # Optional stage that gathers weather and search results in parallel before the ReAct loop
+        if prefetch is None:
+            prefetch = os.getenv("PLAN_PREFETCH", "false").lower() in ("1", "true", "yes")
+        self.prefetch = prefetch
+        self.prefetch_workers = int(os.getenv("PLAN_PREFETCH_WORKERS", "8"))
+        # Tool results reach the LLM as terse, deduplicated text within a token budget
+        if compact_observations is None:
+            compact_observations = os.getenv("OBSERVATION_COMPACTION", "true").lower() in ("1", "true", "yes")
+        self.compact_observations = compact_observations
+        self.observation_max_tokens = int(os.getenv("OBSERVATION_MAX_TOKENS", "300"))
+        self.scratchpad_max_tokens = int(os.getenv("SCRATCHPAD_MAX_TOKENS", "1500"))
+        # One cheap "fix this JSON" LLM call when a final answer cannot be parsed or repaired
+        self.json_fix_retry = os.getenv("PLAN_JSON_FIX_RETRY", "true").lower() in ("1", "true", "yes")
+        # Bounds on one run; once hit, the agent is asked for its best final answer (0 disables a bound)
+        self.max_iterations = int(os.getenv("PLAN_MAX_ITERATIONS", "8"))
+        self.max_tool_calls = int(os.getenv("PLAN_MAX_TOOL_CALLS", "8"))
+        self.deadline_seconds = float(os.getenv("PLAN_DEADLINE_SECONDS", "90"))
+        # Days of forecast the Weather tool returns; 0 returns current conditions instead
+        self.forecast_days = int(os.getenv("WEATHER_FORECAST_DAYS", "5"))
+        self.llm = llm or ChatOpenAI(
             model="gpt-3.5-turbo",
             temperature=0.7,
-            api_key=os.getenv("OPENAI_API_KEY")
+            api_key=os.getenv("OPENAI_API_KEY"),
+            # Token callbacks let stream_plan render the final answer as it is written
+            streaming=True,
+            # Report token usage on streamed responses too, for the per-plan trace
+            stream_usage=True,
+            # Shares the adaptive OpenAI limit with every other agent in this process
+            callbacks=rate_limit_callbacks("openai")
         )
         
         # Initialize the tools
@@ -26,13 +184,16 @@ class TaskPlanningAgent:
         self.tools = [
             Tool(
                 name="WebSearch",
-                func=self.web_search_tool.search,
+                func=self.search_tool_func,
+                coroutine=self.asearch_tool_func,
                 description="Useful for searching the web for information about places, restaurants, attractions, events, etc."
             ),
             Tool(
                 name="Weather",
                 func=self.weather_tool_func,
-                description="Useful for getting weather information for a specific location. Input should be a location name."
+                coroutine=self.aweather_tool_func,
+                description="Useful for getting the daily weather forecast for one or more locations. Input should be "
+                            "a location name, or several separated by ';' (e.g. 'Jaipur; Udaipur') to check them all at once."
             )
         ]
         
@@ -43,7 +204,12 @@ class TaskPlanningAgent:
             llm=self.llm,
             agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION,
             verbose=True,
-            handle_parsing_errors=True
+            handle_parsing_errors=True,
+            return_intermediate_steps=True,
+            max_iterations=self.max_iterations or None,
+            max_execution_time=self.deadline_seconds or None,
+            # Out of iterations or time, one last LLM call writes the answer instead of giving up
+            early_stopping_method="generate"
         )
         
         logger.info("TaskPlanningAgent initialized successfully")
@@ -52,24 +218,234 @@ class TaskPlanningAgent:
         """Wrapper function for weather tool with location extraction"""
         logger.info(f"Weather information requested: {location_input}")
         
-        # Extract location from input
-        location = self._extract_location(location_input)
-        if not location:
+        # Extract location(s) from input
+        locations = self._extract_locations(location_input)
+        if not locations:
+            logger.warning("Could not extract location from input")
+            return "Please provide a valid location name."
+        
+        days = self.forecast_days or None
+        if len(locations) == 1:
+            return self._run_tool("Weather", location_input, lambda: self.weather_tool.get_weather(locations[0], days))
+        return self._run_tool("Weather", location_input, lambda: self.weather_tool.get_weather_many(locations, days))
+    
+    async def aweather_tool_func(self, location_input):
+        """Async wrapper for the weather tool with location extraction"""
+        logger.info(f"Weather information requested: {location_input}")
+        
+        locations = self._extract_locations(location_input)
+        if not locations:
             logger.warning("Could not extract location from input")
             return "Please provide a valid location name."
         
-        return str(self.weather_tool.get_weather(location))
+        days = self.forecast_days or None
+        if len(locations) == 1:
+            return await self._arun_tool("Weather", location_input, lambda: self.weather_tool.aget_weather(locations[0], days))
+        return await self._arun_tool("Weather", location_input, lambda: self.weather_tool.aget_weather_many(locations, days))
+    
+    def search_tool_func(self, query):
+        """Wrapper for the web search tool that compacts its results"""
+        return self._run_tool("WebSearch", query, lambda: self.web_search_tool.search(query))
+    
+    async def asearch_tool_func(self, query):
+        """Async wrapper for the web search tool that compacts its results"""
+        return await self._arun_tool("WebSearch", query, lambda: self.web_search_tool.asearch(query))
+    
+    def _memo_key(self, tool, tool_input):
+        """Key under which a run remembers a tool call, equal for equivalent inputs"""
+        if tool == "Weather":
+            return "; ".join(sorted(self._extract_locations(tool_input)))
+        return normalize_query(tool_input)
+    
+    def _run_tool(self, tool, tool_input, call):
+        """Run ``call`` unless this run already has the answer or is out of budget"""
+        budget = current_budget()
+        key = self._memo_key(tool, tool_input)
+        if budget is not None:
+            note = budget.check(tool, key)
+            if note is not None:
+                return note
+        result = call()
+        if budget is not None:
+            budget.record(tool, key, result)
+        return compact_observation(result)
+    
+    async def _arun_tool(self, tool, tool_input, call):
+        """Async version of ``_run_tool``; ``call`` returns an awaitable"""
+        budget = current_budget()
+        key = self._memo_key(tool, tool_input)
+        if budget is not None:
+            note = budget.check(tool, key)
+            if note is not None:
+                return note
+        result = await call()
+        if budget is not None:
+            budget.record(tool, key, result)
+        return compact_observation(result)
+    
+    def _extract_locations(self, location_input):
+        """Split tool input naming one or more places ("Jaipur; Udaipur", a JSON list) into locations"""
+        if isinstance(location_input, str) and location_input.strip().startswith("["):
+            try:
+                location_input = json.loads(location_input)
+            except json.JSONDecodeError:
+                pass
+        if isinstance(location_input, (list, tuple)):
+            names = [str(name) for name in location_input]
+        else:
+            # Only ';' separates places: "and" and "|" appear inside names like "Trinidad and Tobago"
+            names = str(location_input).split(";")
+        
+        locations = []
+        for name in names:
+            location = self._extract_location(name)
+            if location and location not in locations:
+                locations.append(location)
+        return locations
     
     def _extract_location(self, text):
         """Simple location extraction from text"""
         # Remove common prefixes
-        text = re.sub(r'(weather|forecast|temperature|in|for|at)\s+', '', text.lower())
+        text = re.sub(r'\b(weather|forecast|temperature|in|for|at)\s+', '', text.lower())
         return text.strip()
     
-    def generate_plan(self, goal):
-        """Generate a plan using the agent with the two fixed tools"""
-        logger.info(f"Starting plan generation for goal: {goal}")
+    def _extract_destinations(self, goal, limit=3):
+        """Pull destination names out of a goal such as "3-day trip to Jaipur and Udaipur" """
+        # Prefer capitalised place names following a preposition, "to ..." over "in/at ..."
+        matches = sorted(
+            re.finditer(
+                r'\b(to|in|at|around|visit(?:ing)?|explore|exploring)\s+'
+                r'([A-Z][\w\-]*(?:\s+[A-Z][\w\-]*)*(?:\s*(?:,|and|&)\s*[A-Z][\w\-]*(?:\s+[A-Z][\w\-]*)*)*)',
+                goal
+            ),
+            key=lambda match: match.group(1) in ("in", "at", "around")
+        )
+        names = [match.group(2) for match in matches]
+        if not names:
+            match = re.search(
+                r'\b(?:to|in|visit(?:ing)?)\s+([a-z][a-z\s,&]*?)(?=\s+' + _DESTINATION_STOP_WORDS + r'\b|[.!?]|$)',
+                goal.lower()
+            )
+            names = [match.group(1)] if match else []
         
+        for candidate in names:
+            destinations = []
+            for name in re.split(r'\s*(?:,|\band\b|&)\s*', candidate):
+                location = self._extract_location(name)
+                if location and location.split()[0] not in _TIME_WORDS and location not in destinations:
+                    destinations.append(location)
+            if destinations:
+                return destinations[:limit]
+        return []
+    
+    def _extract_topics(self, goal, limit=3):
+        """Pull the interests ("cultural highlights", "good food") out of a goal"""
+        topics = []
+        match = re.search(r'\b(?:with|focusing on|including)\s+(.+?)(?:[.!?]|$)', goal, re.IGNORECASE)
+        if match:
+            for topic in re.split(r'\s*(?:,|\band\b|&)\s*', match.group(1).lower()):
+                topic = topic.strip()
+                if topic and topic not in topics:
+                    topics.append(topic)
+        else:
+            lowered = goal.lower()
+            topics = [topic for topic in _KNOWN_TOPICS if re.search(rf'\b{topic}\b', lowered)]
+        return topics[:limit]
+    
+    def _prefetch_requests(self, goal):
+        """List the (tool name, tool input) pairs worth fetching before the agent starts"""
+        requests = []
+        destinations = self._extract_destinations(goal)
+        topics = self._extract_topics(goal)
+        for destination in destinations:
+            requests.append(("Weather", destination))
+            requests.append(("WebSearch", f"things to do in {destination}"))
+            for topic in topics:
+                requests.append(("WebSearch", f"best {topic} in {destination}"))
+        return requests
+    
+    def _prefetch(self, goal, tracer=None):
+        """Run weather and search lookups for the goal concurrently in a thread pool"""
+        requests = self._prefetch_requests(goal)
+        if not requests:
+            logger.info("Prefetch found no destinations in goal, skipping")
+            return []
+        
+        days = self.forecast_days or None
+        functions = {
+            "Weather": lambda location: self.weather_tool.get_weather(location, days),
+            "WebSearch": self.web_search_tool.search
+        }
+        
+        def call(tool, tool_input):
+            stats = begin_call()
+            start = time.perf_counter()
+            result = functions[tool](tool_input)
+            if tracer is not None:
+                tracer.record_tool(tool, tool_input, result, time.perf_counter() - start, stats, source="prefetch")
+            return result
+        
+        with ThreadPoolExecutor(max_workers=min(self.prefetch_workers, len(requests))) as pool:
+            futures = [pool.submit(call, tool, tool_input) for tool, tool_input in requests]
+            results = [future.result() for future in futures]
+        return list(zip(requests, results))
+    
+    async def _aprefetch(self, goal, tracer=None):
+        """Async version of ``_prefetch``"""
+        requests = self._prefetch_requests(goal)
+        if not requests:
+            logger.info("Prefetch found no destinations in goal, skipping")
+            return []
+        
+        days = self.forecast_days or None
+        functions = {
+            "Weather": lambda location: self.weather_tool.aget_weather(location, days),
+            "WebSearch": self.web_search_tool.asearch
+        }
+        
+        async def call(tool, tool_input):
+            # gather() runs each call in its own task, so each gets its own stats context
+            stats = begin_call()
+            start = time.perf_counter()
+            result = await functions[tool](tool_input)
+            if tracer is not None:
+                tracer.record_tool(tool, tool_input, result, time.perf_counter() - start, stats, source="prefetch")
+            return result
+        
+        results = await asyncio.gather(*(call(tool, tool_input) for tool, tool_input in requests))
+        return list(zip(requests, results))
+    
+    def _format_prefetched(self, prefetched):
+        """Render prefetched observations as a prompt section, skipping failed lookups"""
+        lines = []
+        compactor = current_compactor()
+        budget = current_budget()
+        for (tool, tool_input), result in prefetched:
+            if isinstance(result, dict) and "error" in result:
+                continue
+            if compactor is not None and compactor.exhausted:
+                logger.info("Observation budget reached, leaving the remaining prefetched results out")
+                break
+            lines.append(f"[{tool}: {tool_input}] {compact_observation(result)}")
+            if budget is not None:
+                budget.remember(tool, self._memo_key(tool, tool_input), "in the information gathered for you")
+        return "\n".join(lines)
+    
+    def _start_compaction(self):
+        """Give this run its own observation compactor; returns the token for ``_end_compaction``"""
+        if not self.compact_observations:
+            return None
+        return start_run(ObservationCompactor(self.observation_max_tokens, self.scratchpad_max_tokens))
+    
+    def _end_compaction(self, token):
+        if token is None:
+            return
+        compactor = current_compactor()
+        logger.info(f"Observations compacted from ~{compactor.raw_tokens} to ~{compactor.used_tokens} tokens")
+        end_run(token)
+    
+    def _build_prompt(self, goal, context=None):
+        """Build the agent prompt for a goal, with any prefetched context appended"""
         prompt = f"""
         You are a helpful planning assistant. Please help me create a detailed plan for the following goal:
         
@@ -79,30 +455,324 @@ class TaskPlanningAgent:
         The plan should be practical, detailed, and include specific recommendations where possible.
         
         After gathering information, output your final plan in JSON format with days as keys and activities as values.
+        {PLAN_FORMAT_INSTRUCTIONS}
+        """
+        if context:
+            prompt += f"""
+        The following information has already been gathered with your tools. Use it directly and only
+        call a tool for information that is still missing:
+        
+{context}
         """
+        return prompt
+    
+    def _parse_plan(self, result, tracer=None):
+        """Extract the JSON plan from the agent's final answer.
         
+        The answer is parsed and validated against the plan schema locally, repaired
+        locally if needed, and only then sent back once to the LLM (in JSON mode) to fix.
+        """
+        start = time.perf_counter()
+        plan, outcome = parse_plan_text(result)
+        if plan is None and self.json_fix_retry and "{" in result:
+            plan = self._fix_plan_json(result, tracer)
+            outcome = PARSE_FIXED_BY_LLM if plan is not None else None
+        return self._finish_parse(result, plan, outcome, start, tracer)
+    
+    async def _aparse_plan(self, result, tracer=None):
+        """Async version of ``_parse_plan``"""
+        start = time.perf_counter()
+        plan, outcome = parse_plan_text(result)
+        if plan is None and self.json_fix_retry and "{" in result:
+            plan = await self._afix_plan_json(result, tracer)
+            outcome = PARSE_FIXED_BY_LLM if plan is not None else None
+        return self._finish_parse(result, plan, outcome, start, tracer)
+    
+    def _json_llm(self):
+        """The LLM constrained to reply with a JSON object where the provider supports it"""
+        if isinstance(self.llm, ChatOpenAI):
+            return self.llm.bind(response_format={"type": "json_object"})
+        return self.llm
+    
+    def _fix_plan_json(self, result, tracer=None):
+        logger.warning("Final answer is not a valid plan, asking the LLM to fix the JSON")
         try:
-            logger.info("Executing agent with tools")
-            result = self.agent.run(prompt)
-            logger.info("Agent execution completed")
+            reply = self._json_llm().invoke(
+                FIX_JSON_PROMPT.format(text=result), config={"callbacks": [tracer] if tracer else None}
+            )
+            return parse_plan_text(reply.content)[0]
+        except Exception as e:
+            logger.error(f"JSON fix request failed: {e}")
+            return None
+    
+    async def _afix_plan_json(self, result, tracer=None):
+        logger.warning("Final answer is not a valid plan, asking the LLM to fix the JSON")
+        try:
+            reply = await self._json_llm().ainvoke(
+                FIX_JSON_PROMPT.format(text=result), config={"callbacks": [tracer] if tracer else None}
+            )
+            return parse_plan_text(reply.content)[0]
+        except Exception as e:
+            logger.error(f"JSON fix request failed: {e}")
+            return None
+    
+    def _finish_parse(self, result, plan, outcome, start, tracer):
+        if plan is None:
+            if "{" in result:
+                logger.error("JSON parsing failed")
+                outcome, plan = PARSE_FAILED, {"plan": result, "error": "JSON parsing failed"}
+            else:
+                logger.warning("No JSON found in agent response, returning raw text")
+                # If no JSON found, return the text as is
+                outcome, plan = PARSE_TEXT, {"plan": result}
+        else:
+            logger.info(f"Successfully parsed JSON plan from agent response ({outcome})")
+        
+        saved = outcome not in (PARSE_FAILED, PARSE_TEXT) and not legacy_parse_succeeds(result)
+        parse_stats.record(outcome, saved)
+        if tracer is not None:
+            tracer.record_step(
+                "parse", "plan_json", time.perf_counter() - start, outcome=outcome, saved_run=saved
+            )
+        return plan
+    
+    def _invoke_agent(self, goal, prefetch=None, callbacks=None, tracer=None):
+        """Run prefetch (if enabled) and the ReAct agent, returning the final answer text"""
+        prefetch = self.prefetch if prefetch is None else prefetch
+        callbacks = list(callbacks or [])
+        if tracer is not None:
+            callbacks.append(tracer)
+        
+        compaction = self._start_compaction()
+        budget = use_budget(self._new_budget())
+        try:
+            start = time.perf_counter()
+            context = self._format_prefetched(self._prefetch(goal, tracer)) if prefetch else None
+            prefetch_elapsed = time.perf_counter() - start
             
-            # Try to extract JSON from the result
+            logger.info("Executing agent with tools")
+            result = self.agent.invoke({"input": self._build_prompt(goal, context)}, config={"callbacks": callbacks})
+            self._log_run(result, prefetch, prefetch_elapsed, time.perf_counter() - start, tracer)
+            return result["output"]
+        finally:
+            release_budget(budget)
+            self._end_compaction(compaction)
+    
+    def generate_plan(self, goal, prefetch=None):
+        """Generate a plan using the agent with the two fixed tools"""
+        return self.generate_plan_with_trace(goal, prefetch)[0]
+    
+    def generate_plan_with_trace(self, goal, prefetch=None):
+        """Like ``generate_plan`` but returns ``(plan, trace)``; the trace lists every tool and LLM call"""
+        logger.info(f"Starting plan generation for goal: {goal}")
+        tracer = PlanTracer()
+        
+        try:
+            plan = self._parse_plan(self._invoke_agent(goal, prefetch, tracer=tracer), tracer)
+        except Exception as e:
+            logger.exception(f"Plan generation failed: {e}")
+            plan = {"error": f"Failed to generate plan: {str(e)}"}
+        return plan, tracer.steps
+    
+    def stream_plan(self, goal, prefetch=None):
+        """Generate a plan, yielding events while the final answer streams in.
+        
+        Yields ``("day", (day, activities))`` as soon as each day of the JSON plan is
+        complete, then ``("trace", steps)`` with the run's tool/LLM call trace and
+        finally ``("plan", plan)`` with the fully parsed plan (or an error dict). The
+        final plan is authoritative: consumers should re-render it if its days differ
+        from the streamed ones (e.g. after a repair or an LLM fix).
+        """
+        logger.info(f"Starting streaming plan generation for goal: {goal}")
+        events = queue.Queue()
+        handler = FinalAnswerStreamHandler(lambda token: events.put(("token", token)))
+        tracer = PlanTracer()
+        
+        def run():
             try:
-                # Look for JSON in the response
-                json_match = re.search(r'\{.*\}', result, re.DOTALL)
-                if json_match:
-                    plan = json.loads(json_match.group())
-                    logger.info("Successfully parsed JSON plan from agent response")
-                    return plan
-                else:
-                    logger.warning("No JSON found in agent response, returning raw text")
-                    # If no JSON found, return the text as is
-                    return {"plan": result}
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON parsing failed: {e}")
-                return {"plan": result, "error": "JSON parsing failed"}
-                
+                events.put(("done", self._invoke_agent(goal, prefetch, callbacks=[handler], tracer=tracer)))
+            except Exception as e:
+                events.put(("error", e))
+        
+        # The agent runs on a worker thread so tokens can be yielded while it works
+        threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+        
+        parser = IncrementalPlanParser()
+        streamed_days = set()
+        while True:
+            kind, payload = events.get()
+            if kind == "token":
+                for member in parser.feed(payload):
+                    # Normalised as the full parse would, e.g. a list-wrapped plan becomes its days
+                    for day, activities in (validate_plan(dict([member])) or {}).items():
+                        if day not in streamed_days:
+                            streamed_days.add(day)
+                            yield "day", (day, activities)
+            elif kind == "error":
+                logger.error(f"Plan generation failed: {payload}", exc_info=payload)
+                yield "trace", tracer.steps
+                yield "plan", {"error": f"Failed to generate plan: {str(payload)}"}
+                return
+            else:
+                plan = self._parse_plan(payload, tracer)
+                # Emit any days the incremental parser could not (non-streaming LLM, malformed chunks)
+                if "error" not in plan and "plan" not in plan:
+                    for day, activities in plan.items():
+                        if day not in streamed_days:
+                            yield "day", (day, activities)
+                yield "trace", tracer.steps
+                yield "plan", plan
+                return
+    
+    async def _ainvoke_agent(self, goal, prefetch=None, callbacks=None, tracer=None):
+        """Async version of ``_invoke_agent``"""
+        prefetch = self.prefetch if prefetch is None else prefetch
+        callbacks = list(callbacks or [])
+        if tracer is not None:
+            callbacks.append(tracer)
+        
+        compaction = self._start_compaction()
+        budget = use_budget(self._new_budget())
+        try:
+            start = time.perf_counter()
+            context = self._format_prefetched(await self._aprefetch(goal, tracer)) if prefetch else None
+            prefetch_elapsed = time.perf_counter() - start
+            
+            logger.info("Executing agent with tools (async)")
+            result = await self.agent.ainvoke({"input": self._build_prompt(goal, context)}, config={"callbacks": callbacks})
+            self._log_run(result, prefetch, prefetch_elapsed, time.perf_counter() - start, tracer)
+            return result["output"]
+        finally:
+            release_budget(budget)
+            self._end_compaction(compaction)
+    
+    async def agenerate_plan(self, goal, prefetch=None):
+        """Async version of ``generate_plan``; tool calls and LLM requests do not block the event loop"""
+        return (await self.agenerate_plan_with_trace(goal, prefetch))[0]
+    
+    async def agenerate_plan_with_trace(self, goal, prefetch=None):
+        """Async version of ``generate_plan_with_trace``"""
+        logger.info(f"Starting async plan generation for goal: {goal}")
+        tracer = PlanTracer()
+        
+        try:
+            plan = await self._aparse_plan(await self._ainvoke_agent(goal, prefetch, tracer=tracer), tracer)
         except Exception as e:
             logger.exception(f"Plan generation failed: {e}")
-            return {"error": f"Failed to generate plan: {str(e)}"}
-        
\ No newline at end of file
+            plan = {"error": f"Failed to generate plan: {str(e)}"}
+        return plan, tracer.steps
+    
+    def _match_day(self, plan, day):
+        """Find the plan's key for ``day`` ("Day 2", "day 2" or just "2")"""
+        if day in plan:
+            return day
+        wanted = str(day).strip().lower()
+        for key in plan:
+            if key.lower() == wanted or re.sub(r"\D", "", key) == wanted:
+                return key
+        return None
+    
+    def _recorded_observations(self, workflow_history):
+        """Tool observations stored with a plan, without repeats and within the scratchpad budget"""
+        lines = []
+        seen = set()
+        used = 0
+        for step in workflow_history or []:
+            if step.get("type") != "tool" or not step.get("observation"):
+                continue
+            key = (step.get("name"), step.get("input"))
+            if key in seen:
+                continue
+            seen.add(key)
+            line = f"[{step['name']}: {step.get('input')}] {step['observation']}"
+            used += estimate_tokens(line)
+            if used > self.scratchpad_max_tokens:
+                break
+            lines.append(line)
+        return "\n".join(lines)
+    
+    def _replanned_day(self, text, day):
+        """Pull the new activities for ``day`` out of the LLM's reply, or None"""
+        parsed = parse_plan_text(text)[0]
+        if parsed is None:
+            return None
+        activities = parsed.get(day)
+        if activities is None and len(parsed) == 1:
+            activities = next(iter(parsed.values()))
+        return activities or None
+    
+    def replan(self, plan_id, day, instruction):
+        """Regenerate one day of a saved plan and update it in place.
+        
+        The searches and weather lookups recorded in the plan's ``workflow_history`` are
+        reused, so this is a single LLM call instead of a new agent run. Returns the
+        updated plan or an error dict.
+        """
+        if self.db_client is None:
+            return {"error": "Re-planning needs a database client"}
+        saved = self.db_client.get_plan(plan_id)
+        if saved is None:
+            return {"error": f"Plan {plan_id} not found"}
+        plan = saved.get("plan")
+        if not isinstance(plan, dict) or "plan" in plan or "error" in plan:
+            return {"error": "Only day-by-day plans can be re-planned"}
+        day_key = self._match_day(plan, day)
+        if day_key is None:
+            return {"error": f"{day} is not part of this plan"}
+        
+        logger.info(f"Re-planning {day_key} of plan {plan_id}: {instruction}")
+        start = time.perf_counter()
+        prompt = REPLAN_DAY_PROMPT.format(
+            goal=saved.get("goal", ""),
+            plan=json.dumps(plan, indent=1, ensure_ascii=False),
+            observations=self._recorded_observations(saved.get("workflow_history")) or "None recorded.",
+            day=day_key,
+            instruction=instruction
+        )
+        try:
+            reply = self._json_llm().invoke(prompt)
+        except Exception as e:
+            logger.exception(f"Re-planning failed: {e}")
+            return {"error": f"Failed to re-plan {day_key}: {str(e)}"}
+        
+        activities = self._replanned_day(reply.content, day_key)
+        if activities is None:
+            logger.error(f"Could not parse the re-planned day: {reply.content[:200]}")
+            return {"error": f"Could not parse the new {day_key}"}
+        try:
+            version = self.db_client.update_plan_day(plan_id, day_key, activities, saved.get("version", 0))
+        except ValueError as e:
+            # Day names with "." or a leading "$" cannot be addressed in an update
+            logger.error(f"Could not save the re-planned {day_key}: {e}")
+            return {"error": f"{day_key} cannot be updated in place: {str(e)}"}
+        if version is None:
+            return {"error": "The plan changed while it was being re-planned; reload it and try again"}
+        # PlanCache entries point at this document, so cache hits see the new day as well
+        logger.info(f"Re-planned {day_key} of plan {plan_id} in {time.perf_counter() - start:.2f}s")
+        return {**plan, day_key: activities}
+    
+    def _new_budget(self):
+        return RunBudget(self.max_tool_calls or None, self.deadline_seconds or None)
+    
+    def _log_run(self, result, prefetch, prefetch_elapsed, elapsed, tracer=None):
+        iterations = len(result.get("intermediate_steps", []))
+        budget = current_budget()
+        if budget.exhausted_by:
+            outcome = budget.exhausted_by
+        elif self.max_iterations and iterations >= self.max_iterations:
+            outcome = BUDGET_ITERATIONS
+        elif self.deadline_seconds and elapsed >= self.deadline_seconds:
+            outcome = BUDGET_DEADLINE
+        else:
+            outcome = BUDGET_COMPLETED
+        
+        logger.info(
+            f"Agent execution completed: {iterations} tool iteration(s) in {elapsed:.2f}s "
+            f"(prefetch {'on' if prefetch else 'off'}, {prefetch_elapsed:.2f}s prefetching, "
+            f"{budget.tool_calls} tool call(s), {budget.memo_hits} repeated call(s) skipped, budget {outcome})"
+        )
+        if tracer is not None:
+            tracer.record_step(
+                "budget", "agent_run", elapsed, outcome=outcome, iterations=iterations,
+                tool_calls=budget.tool_calls, memo_hits=budget.memo_hits
+            )
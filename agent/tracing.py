@@ -0,0 +1,187 @@
+from langchain_core.callbacks import BaseCallbackHandler
+from agent.compaction import render_observation
+from utils.call_stats import begin_call
+from datetime import datetime
+import math
+import threading
+import time
+import logging
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+# Observations are kept in the trace so a day can be re-planned without calling the tools again
+MAX_OBSERVATION_CHARS = 2000
+
+
+class PlanTracer(BaseCallbackHandler):
+    """Records every tool call and LLM call of one plan generation.
+
+    ``steps`` is a list of plain dicts in the order the calls finished, ready to be
+    stored as the plan's ``workflow_history``. Successful tool steps include the
+    ``observation`` text the agent saw (or, for prefetched calls, a compact rendering).
+    """
+
+    # Run in the caller's context so begin_call() is visible to the tool being traced
+    run_inline = True
+
+    def __init__(self):
+        self.steps = []
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, **info):
+        with self._lock:
+            self._pending[run_id] = {"started": time.perf_counter(), "started_at": datetime.now().isoformat(), **info}
+
+    def _finish(self, run_id, **info):
+        with self._lock:
+            pending = self._pending.pop(run_id, None)
+            if pending is None:
+                return
+            started = pending.pop("started")
+            stats = pending.pop("stats", None)
+            step = {**pending, "duration_ms": round((time.perf_counter() - started) * 1000, 1), **info}
+            if stats is not None:
+                step.update(cache_hit=stats["cache_hit"], retries=stats["retries"])
+            self.steps.append(step)
+
+    def record_tool(self, name, tool_input, output, duration, stats=None, source="agent"):
+        """Record a tool call made outside the agent loop (e.g. prefetch)"""
+        step = {
+            "type": "tool", "name": name, "input": tool_input, "source": source,
+            "started_at": datetime.now().isoformat(),
+            "output_size": len(str(output)), "duration_ms": round(duration * 1000, 1)
+        }
+        if isinstance(output, dict) and "error" in output:
+            step["error"] = output["error"]
+        else:
+            step["observation"] = render_observation(output)[:MAX_OBSERVATION_CHARS]
+        if stats is not None:
+            step.update(cache_hit=stats["cache_hit"], retries=stats["retries"])
+        with self._lock:
+            self.steps.append(step)
+
+    def record_step(self, step_type, name, duration, **info):
+        """Record a step of plan generation that is not a tool or LLM call (e.g. parsing)"""
+        step = {
+            "type": step_type, "name": name, "started_at": datetime.now().isoformat(),
+            "duration_ms": round(duration * 1000, 1), **info
+        }
+        with self._lock:
+            self.steps.append(step)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._start(run_id, type="tool", name=name, input=input_str, source="agent", stats=begin_call())
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        output = str(output)
+        self._finish(run_id, output_size=len(output), observation=output[:MAX_OBSERVATION_CHARS])
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = ((kwargs.get("invocation_params") or {}).get("model_name")
+                 or (kwargs.get("invocation_params") or {}).get("model"))
+        self._start(run_id, type="llm", model=model)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self.on_llm_start(serialized, [], run_id=run_id, **kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt_tokens = completion_tokens = None
+        try:
+            usage = response.generations[0][0].message.usage_metadata
+        except (AttributeError, IndexError):
+            usage = None
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+        else:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens")
+            completion_tokens = token_usage.get("completion_tokens")
+        self._finish(run_id, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error=str(error))
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        with self._lock:
+            pending = self._pending.get(run_id)
+            if pending is not None:
+                pending["retries"] = pending.get("retries", 0) + 1
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_traces(histories):
+    """Aggregate many plans' ``workflow_history`` lists.
+
+    Returns per-tool and per-model call counts with p50/p95 latency (ms), tool cache
+    hit rates, prompt/completion tokens per plan, how final answers were parsed and
+    how often runs were cut short by their budget.
+    """
+    durations = {}
+    cache_hits = {}
+    parse_outcomes = {}
+    saved_runs = 0
+    budget_outcomes = {}
+    memo_hits = 0
+    tokens_per_plan = []
+    for history in histories:
+        plan_tokens = 0
+        for step in history or []:
+            if step.get("type") == "parse":
+                parse_outcomes[step.get("outcome")] = parse_outcomes.get(step.get("outcome"), 0) + 1
+                saved_runs += bool(step.get("saved_run"))
+                continue
+            if step.get("type") == "budget":
+                budget_outcomes[step.get("outcome")] = budget_outcomes.get(step.get("outcome"), 0) + 1
+                memo_hits += step.get("memo_hits") or 0
+                continue
+            key = (step.get("type"), step.get("name") or step.get("model") or "unknown")
+            if step.get("duration_ms") is not None:
+                durations.setdefault(key, []).append(step["duration_ms"])
+            if step.get("type") == "tool":
+                cache_hits.setdefault(key, []).append(bool(step.get("cache_hit")))
+            plan_tokens += (step.get("prompt_tokens") or 0) + (step.get("completion_tokens") or 0)
+        tokens_per_plan.append(plan_tokens)
+
+    calls = []
+    for (step_type, name), values in sorted(durations.items()):
+        hits = cache_hits.get((step_type, name))
+        calls.append({
+            "type": step_type,
+            "name": name,
+            "calls": len(values),
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "cache_hit_rate": round(sum(hits) / len(hits), 3) if hits else None
+        })
+
+    return {
+        "plans": len(tokens_per_plan),
+        "calls": calls,
+        "tokens_per_plan": {
+            "mean": round(sum(tokens_per_plan) / len(tokens_per_plan), 1),
+            "p50": percentile(tokens_per_plan, 50),
+            "p95": percentile(tokens_per_plan, 95)
+        } if tokens_per_plan else None,
+        "parsing": {
+            "outcomes": parse_outcomes,
+            "failure_rate": round(parse_outcomes.get("failed", 0) / sum(parse_outcomes.values()), 3),
+            "saved_runs": saved_runs
+        } if parse_outcomes else None,
+        "budget": {
+            "outcomes": budget_outcomes,
+            "cut_short_rate": round(1 - budget_outcomes.get("completed", 0) / sum(budget_outcomes.values()), 3),
+            "memo_hits": memo_hits
+        } if budget_outcomes else None
+    }
@@ -1,8 +1,12 @@
 import streamlit as st
 import json
+import time
 from datetime import datetime
-from agent.task_agent import TaskPlanningAgent
-from utils.database import MongoDBClient
+from utils.database import MongoDBClient, PLAN_PREVIEW_PROJECTION
+from utils.plan_format import day_markdown, plan_markdown
+from utils.plan_cache import PlanCache
+from utils.jobs import MongoJobQueue, JOB_COMPLETED, JOB_FAILED
+from pymongo.errors import OperationFailure
 import logging
 from logging_config import setup_logging, logger
 import os
@@ -22,6 +26,12 @@ if 'agent' not in st.session_state:
     st.session_state.agent = None
 if 'db_client' not in st.session_state:
     st.session_state.db_client = None
+if 'active_job' not in st.session_state:
+    st.session_state.active_job = None
+
+PLANS_PAGE_SIZE = int(os.environ.get("PLANS_PAGE_SIZE", "20"))
+# Hand plan generation to worker.py processes instead of running it in the script thread
+USE_JOB_QUEUE = os.environ.get("USE_JOB_QUEUE", "false").lower() in ("1", "true", "yes")
 
 logger.info("Initializing Streamlit application")
 
@@ -32,8 +42,11 @@ st.title("🤖 AI Task Planning Agent")
 # Initialize agent and database
 @st.cache_resource
 def init_agent():
+    # Imported here so pages that never generate a plan do not load LangChain
+    from agent.task_agent import TaskPlanningAgent
     logger.info("Initializing TaskPlanningAgent")
-    return TaskPlanningAgent()
+    # The database client lets the agent re-plan single days of saved plans
+    return TaskPlanningAgent(db_client=init_database())
 
 @st.cache_resource
 def init_database():
@@ -47,22 +60,100 @@ def init_database():
         st.error("Missing database configuration. Please check your .env file.")
         return None
     
-    return MongoDBClient(mongo_uri, db_name, collection_name)
+    # The connectivity check runs in the background so the first page renders immediately
+    return MongoDBClient(mongo_uri, db_name, collection_name, check_in_background=True)
+
+@st.cache_resource
+def init_plan_cache():
+    # Shared by every session so identical goals submitted concurrently are coalesced
+    db_client = init_database()
+    if db_client is None:
+        return None
+    logger.info("Initializing plan cache")
+    return PlanCache(db_client)
+
+@st.cache_resource
+def init_job_queue():
+    db_client = init_database()
+    if not USE_JOB_QUEUE or db_client is None:
+        return None
+    logger.info("Initializing plan job queue")
+    return MongoJobQueue(db_client)
+
+def get_agent():
+    """Return the session's agent, building it on first use"""
+    if st.session_state.agent is None:
+        st.session_state.agent = init_agent()
+    return st.session_state.agent
 
-if st.session_state.agent is None:
-    st.session_state.agent = init_agent()
 if st.session_state.db_client is None:
     st.session_state.db_client = init_database()
 
+def database_available(db_client):
+    """False when there is no client or its background connection check has failed"""
+    if db_client is None:
+        return False
+    return not (db_client.ready.is_set() and db_client.connection_error is not None)
+
+def render_day(day, activities):
+    """Render one day of a structured plan"""
+    st.markdown(day_markdown(day, activities))
+
+def render_plan(plan):
+    """Render a whole plan, structured or plain text, as a single element"""
+    st.markdown(plan_markdown(plan))
+
+@st.cache_data(max_entries=5000, show_spinner=False)
+def stored_plan_markdown(plan_id):
+    """Markdown for a plan saved before it was pre-rendered at save time"""
+    saved = init_database().get_plan(plan_id)
+    return plan_markdown(saved["plan"]) if saved else ""
+
+def load_history_page(db_client, search_query):
+    """Append the next page of plan previews to the history page's session state.
+    
+    Listing pages are sought with the keyset cursor from ``list_plans``; search pages
+    are numbered, so the cursor holds the next page number there.
+    """
+    st.session_state.history_search_unavailable = False
+    cursor = st.session_state.history_cursor
+    if search_query:
+        page_number = cursor or 0
+        try:
+            plans, has_more = db_client.search_plans(
+                search_query, page=page_number, page_size=PLANS_PAGE_SIZE, projection=PLAN_PREVIEW_PROJECTION
+            )
+        except OperationFailure as e:
+            # Raised when the text index could not be built
+            logger.error(f"Plan search failed: {e}")
+            st.session_state.history_search_unavailable = True
+            plans, has_more = [], False
+        next_cursor = page_number + 1 if has_more else None
+    else:
+        plans, next_cursor = db_client.list_plans(PLANS_PAGE_SIZE, after=cursor, projection=PLAN_PREVIEW_PROJECTION)
+    st.session_state.history_plans = st.session_state.history_plans + plans
+    st.session_state.history_cursor = next_cursor
+    st.session_state.history_has_more = next_cursor is not None
+
 # Sidebar for navigation
 st.sidebar.title("Navigation")
-page = st.sidebar.radio("Go to", ["Create New Plan", "View Past Plans"])
+page = st.sidebar.radio("Go to", ["Create New Plan", "View Past Plans", "Performance"])
+# Opening the history page again reloads it from the first page
+if page != "View Past Plans":
+    st.session_state.pop("history_query", None)
 
 # Display tool status
 st.sidebar.info("**Tools Status:**\n- Web Search: Available\n- Weather API: Available")
+db_client = st.session_state.db_client
+db_available = database_available(db_client)
+if db_client is not None and not db_available:
+    st.sidebar.error(f"Database unavailable: {db_client.connection_error}")
 
 if page == "Create New Plan":
     st.header("Create a New Plan")
+    plan_cache = init_plan_cache()
+    # Jobs live in MongoDB too, so an unreachable database disables the queue
+    job_queue = init_job_queue() if db_available else None
     
     # Goal input
     goal = st.text_area(
@@ -70,19 +161,45 @@ if page == "Create New Plan":
         placeholder="e.g., Plan a 3-day trip to Jaipur with cultural highlights and good food",
         height=100
     )
+    regenerate = st.checkbox("Regenerate (ignore a recently generated plan for this goal)")
     
     if st.button("Generate Plan", type="primary"):
-        if goal:
+        if goal and job_queue is not None:
+            # A worker generates and saves the plan; this page only polls the job below
+            st.session_state.active_job = job_queue.enqueue(goal, {"regenerate": regenerate})
+        elif goal:
             with st.spinner("Generating your plan using web search and weather data..."):
-                if st.session_state.db_client is not None:
-                    # Generate plan using agent
-                    plan = st.session_state.agent.generate_plan(goal)
+                if db_available:
+                    # Each day is rendered here as soon as the agent has finished writing it
+                    plan_slot = st.empty()
+                    plan_area = plan_slot.container()
+                    streamed_days = []
+                    
+                    def generate_streaming(goal):
+                        plan, trace = None, []
+                        for event, payload in get_agent().stream_plan(goal):
+                            if event == "day":
+                                with plan_area:
+                                    if not streamed_days:
+                                        st.subheader("Your Plan")
+                                    render_day(*payload)
+                                streamed_days.append(payload[0])
+                            elif event == "trace":
+                                trace = payload
+                            elif event == "plan":
+                                plan = payload
+                        return plan, trace
+                    
+                    # Reuse a fresh plan for the same goal, otherwise run the agent and save the result
+                    result = plan_cache.get_or_generate(goal, generate_streaming, regenerate=regenerate)
+                    plan = result["plan"]
+                    plan_id = result["plan_id"]
                     
                     if "error" in plan:
                         st.error(plan["error"])
                     else:
-                        # Save to database
-                        plan_id = st.session_state.db_client.save_plan(goal, plan)
+                        if result["cached"]:
+                            st.info("Showing a recently generated plan for this goal. Tick 'Regenerate' for a new one.")
                         
                         # Add to session state
                         st.session_state.plans.insert(0, {
@@ -94,77 +211,145 @@ if page == "Create New Plan":
                         
                         st.success("Plan generated successfully!")
                         
-                        # Display the plan
-                        st.subheader("Your Plan")
-                        if "plan" in plan and isinstance(plan["plan"], str):
-                            # Handle case where plan is a string instead of structured data
-                            st.write(plan["plan"])
-                        else:
-                            # Structured plan
-                            plan_data = plan if "plan" not in plan else plan["plan"]
-                            for day, activities in plan_data.items():
-                                st.markdown(f"### {day}")
-                                if isinstance(activities, list):
-                                    for i, activity in enumerate(activities, 1):
-                                        st.markdown(f"{i}. {activity}")
-                                elif isinstance(activities, dict):
-                                    for time, activity in activities.items():
-                                        st.markdown(f"- **{time}**: {activity}")
-                                elif isinstance(activities, str):
-                                    st.markdown(activities)
-                                st.markdown("---")
+                        # Display the plan unless exactly its days were already streamed in
+                        if streamed_days != list(plan):
+                            plan_slot.empty()
+                            with plan_slot.container():
+                                st.subheader("Your Plan")
+                                render_plan(plan)
                 else:
                     st.error("Cannot generate plan: Database client not available.")
         else:
             st.warning("Please enter a goal first.")
+    
+    # Regenerating one day reuses the plan's recorded searches instead of running the agent again
+    latest = st.session_state.plans[0] if st.session_state.plans else None
+    if latest is not None and isinstance(latest["plan"], dict) and "plan" not in latest["plan"]:
+        with st.expander(f"Change one day of: {latest['goal']}"):
+            with st.form("replan_day"):
+                day = st.selectbox("Day", list(latest["plan"]))
+                instruction = st.text_input("What should change?", placeholder="e.g., more outdoor activities, less walking")
+                if st.form_submit_button("Regenerate day"):
+                    if not instruction:
+                        st.warning("Please describe the change first.")
+                    else:
+                        with st.spinner(f"Regenerating {day}..."):
+                            updated = get_agent().replan(latest["id"], day, instruction)
+                        if "error" in updated:
+                            st.error(updated["error"])
+                        else:
+                            latest["plan"] = updated
+                            st.success(f"{day} updated")
+                            render_plan(updated)
+    
+    # The job keeps running in the workers even if the user navigates away or the session reruns
+    if job_queue is not None and st.session_state.active_job:
+        job = job_queue.get(st.session_state.active_job)
+        if job is None:
+            st.session_state.active_job = None
+        elif job["status"] == JOB_COMPLETED:
+            st.session_state.active_job = None
+            saved = st.session_state.db_client.get_plan(job["plan_id"])
+            if saved:
+                st.session_state.plans.insert(0, {
+                    "id": job["plan_id"], "goal": saved["goal"], "plan": saved["plan"], "timestamp": datetime.now()
+                })
+            st.success("Plan generated successfully!")
+            st.subheader("Your Plan")
+            render_plan(saved["plan"] if saved else {})
+        elif job["status"] == JOB_FAILED:
+            st.session_state.active_job = None
+            st.error(job["error"])
+        else:
+            st.progress(job["progress"], text=job["message"])
+            time.sleep(1)
+            st.rerun()
+
+elif page == "Performance":
+    from agent.tracing import summarize_traces
+    from utils.rate_limit import rate_limit_metrics
+    st.header("Performance")
+    
+    if db_available:
+        trace_limit = st.number_input("Recent plans to analyse", min_value=10, max_value=5000, value=500, step=10)
+        summary = summarize_traces(st.session_state.db_client.get_workflow_histories(int(trace_limit)))
+        if not summary["plans"]:
+            st.info("No traced plans yet. Plans generated from now on record their tool and LLM calls.")
+        else:
+            tokens = summary["tokens_per_plan"]
+            st.write(f"Based on the {summary['plans']} most recent traced plan(s)")
+            mean_col, p50_col, p95_col = st.columns(3)
+            mean_col.metric("Tokens per plan (mean)", tokens["mean"])
+            p50_col.metric("Tokens per plan (p50)", tokens["p50"])
+            p95_col.metric("Tokens per plan (p95)", tokens["p95"])
+            st.subheader("Calls")
+            st.dataframe(summary["calls"])
+            
+            parsing = summary["parsing"]
+            if parsing:
+                st.subheader("Final answer parsing")
+                failure_col, saved_col = st.columns(2)
+                failure_col.metric("Parse failure rate", f"{parsing['failure_rate']:.1%}")
+                saved_col.metric("Re-runs avoided by repair", parsing["saved_runs"])
+                st.dataframe([{"outcome": outcome, "plans": count} for outcome, count in parsing["outcomes"].items()])
+            
+            budget = summary["budget"]
+            if budget:
+                st.subheader("Run budget")
+                cut_col, memo_col = st.columns(2)
+                cut_col.metric("Runs cut short", f"{budget['cut_short_rate']:.1%}")
+                memo_col.metric("Repeated tool calls skipped", budget["memo_hits"])
+                st.dataframe([{"outcome": outcome, "plans": count} for outcome, count in budget["outcomes"].items()])
+    else:
+        st.error("Cannot display performance: Database client not available.")
+    
+    # Limiter state is per process, so this covers plans generated by this server only
+    rate_limits = rate_limit_metrics()
+    if rate_limits:
+        st.subheader("Provider rate limits")
+        st.caption("Adaptive concurrency limit, queueing and 429s per provider since this server started")
+        st.dataframe([{"provider": provider, **metrics} for provider, metrics in rate_limits.items()])
 
 else:  # View Past Plans
     st.header("Past Plans")
     
-    if st.session_state.db_client is not None:
-        # Fetch plans from database
-        plans = st.session_state.db_client.get_all_plans()
+    if db_available:
+        # Search and filter
+        search_query = st.text_input("Search plans", placeholder="Enter keywords to search...")
         
-        if not plans:
-            st.info("No plans found. Create your first plan!")
-        else:
-            # Search and filter
-            search_query = st.text_input("Search plans", placeholder="Enter keywords to search...")
-            
-            filtered_plans = plans
+        # Plans shown so far stay in the session; "Load more" fetches only the next page
+        if st.session_state.get("history_query") != search_query:
+            st.session_state.history_query = search_query
+            st.session_state.history_plans = []
+            st.session_state.history_cursor = None
+            load_history_page(db_client, search_query)
+        plans = st.session_state.history_plans
+        
+        if st.session_state.history_search_unavailable:
+            st.warning("Search is unavailable: the plans collection has no text index.")
+        elif not plans:
             if search_query:
-                filtered_plans = [
-                    p for p in plans 
-                    if search_query.lower() in p['goal'].lower() or 
-                    any(search_query.lower() in str(v).lower() for v in p['plan'].values() if isinstance(v, (str, list)))
-                ]
-            
-            st.write(f"Found {len(filtered_plans)} plan(s)")
-            
-            # Display plans in reverse chronological order
-            for plan in filtered_plans:
-                with st.expander(f"{plan['goal']} - {plan['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
-                    st.markdown(f"**Goal:** {plan['goal']}")
-                    st.markdown("**Plan:**")
-                    
-                    plan_data = plan['plan']
-                    if isinstance(plan_data, dict):
-                        for day, activities in plan_data.items():
-                            st.markdown(f"### {day}")
-                            if isinstance(activities, list):
-                                for i, activity in enumerate(activities, 1):
-                                    st.markdown(f"{i}. {activity}")
-                            elif isinstance(activities, dict):
-                                for time, activity in activities.items():
-                                    st.markdown(f"- **{time}**: {activity}")
-                            elif isinstance(activities, str):
-                                st.markdown(activities)
-                            st.markdown("---")
-                    else:
-                        st.markdown(str(plan_data))
-                    
-                    if st.button("Delete", key=plan['_id']):
-                        st.session_state.db_client.delete_plan(plan['_id'])
-                        st.rerun()
+                st.write("Found 0 plan(s)")
+            else:
+                st.info("No plans found. Create your first plan!")
+        else:
+            st.write(f"Showing {'matches' if search_query else 'plans'} 1-{len(plans)}")
+        
+        # Display plans in reverse chronological order, one markdown element each
+        for plan in plans:
+            with st.expander(f"{plan['goal']} - {plan['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
+                markdown = plan.get('markdown')
+                if markdown is None:
+                    markdown = stored_plan_markdown(plan['_id'])
+                st.markdown(f"**Goal:** {plan['goal']}\n\n**Plan:**\n\n{markdown}")
+                
+                if st.button("Delete", key=plan['_id']):
+                    db_client.delete_plan(plan['_id'])
+                    st.session_state.history_plans = [p for p in plans if p['_id'] != plan['_id']]
+                    st.rerun()
+        
+        if st.session_state.history_has_more and st.button("Load more"):
+            load_history_page(db_client, search_query)
+            st.rerun()
     else:
-        st.error("Cannot display plans: Database client not available.")
\ No newline at end of file
+        st.error("Cannot display plans: Database client not available.")
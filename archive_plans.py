@@ -0,0 +1,141 @@
+"""Export the plans collection to JSON Lines, archive old plans and backfill search text.
+
+    python archive_plans.py export plans.jsonl.gz --exclude workflow_history,search_text
+    python archive_plans.py compact --older-than 180
+    python archive_plans.py backfill-search
+
+All three commands stream the collection in batches, so memory stays flat however many
+plans it holds. Exports are checkpointed after every batch and an interrupted export
+resumes from the checkpoint (pass --restart to start over); plans written after the
+last checkpoint may appear twice. Compaction copies plans older than --older-than
+days into the archive collection (default: <collection>_archive) with their tool
+observations trimmed, then deletes them from the live collection. backfill-search
+computes the search text of plans saved before full-text search covered plan
+content, so their activities can be found from the history page.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+def field_projection(fields, exclude):
+    """Build a MongoDB projection from comma-separated include/exclude lists"""
+    if fields:
+        return {field.strip(): 1 for field in fields.split(",") if field.strip()}
+    if exclude:
+        return {field.strip(): 0 for field in exclude.split(",") if field.strip()}
+    return None
+
+
+class ExportCheckpoint:
+    """Remembers the last exported ``_id`` of an output file"""
+
+    def __init__(self, output_path, checkpoint_path=None):
+        self.output_path = os.path.abspath(output_path)
+        self.path = checkpoint_path or f"{output_path}.checkpoint"
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None, 0
+        with open(self.path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("output") != self.output_path:
+            raise SystemExit(f"Checkpoint {self.path} belongs to {checkpoint.get('output')}")
+        logger.info(f"Resuming export after plan {checkpoint['last_id']} ({checkpoint['exported']} already written)")
+        return checkpoint["last_id"], checkpoint["exported"]
+
+    def save(self, last_id, exported):
+        checkpoint = {
+            "output": self.output_path,
+            "last_id": last_id,
+            "exported": exported,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def export(db_client, args):
+    checkpoint = ExportCheckpoint(args.output, args.checkpoint)
+    if args.restart:
+        checkpoint.clear()
+    after_id, already_exported = checkpoint.load()
+    started = time.perf_counter()
+    exported, last_id = db_client.export_plans(
+        args.output, projection=field_projection(args.fields, args.exclude), after_id=after_id,
+        batch_size=args.batch_size,
+        on_batch=lambda last_id, exported: checkpoint.save(last_id, already_exported + exported)
+    )
+    print(f"Exported {exported} plan(s) to {args.output} in {time.perf_counter() - started:.1f}s "
+          f"({already_exported + exported} in total, last _id {last_id})")
+
+
+def compact(db_client, args):
+    started = time.perf_counter()
+    moved = db_client.archive_plans(
+        args.older_than, archive_collection=args.archive_collection, batch_size=args.batch_size,
+        trim_history=not args.keep_history
+    )
+    print(f"Archived {moved} plan(s) older than {args.older_than:g} day(s) in {time.perf_counter() - started:.1f}s")
+
+
+def backfill_search(db_client, args):
+    started = time.perf_counter()
+    updated = db_client.backfill_search_text(batch_size=args.batch_size)
+    print(f"Backfilled search text for {updated} plan(s) in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", help="plans collection (default: MONGO_DB_COLLECTION)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="stream plans to a JSONL file (.gz to compress)")
+    export_parser.add_argument("output", help="JSONL file to write; compressed with gzip when it ends in .gz")
+    fields = export_parser.add_mutually_exclusive_group()
+    fields.add_argument("--fields", help="comma-separated fields to export, e.g. goal,plan,timestamp")
+    fields.add_argument("--exclude", help="comma-separated fields to leave out, e.g. workflow_history,search_text")
+    export_parser.add_argument("--batch-size", type=int, default=1000, help="plans per cursor batch and file write")
+    export_parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    export_parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and overwrite the output")
+    export_parser.set_defaults(handler=export)
+
+    compact_parser = commands.add_parser("compact", help="move old plans to the archive collection")
+    compact_parser.add_argument("--older-than", type=float, required=True, metavar="DAYS",
+                                help="archive plans created more than this many days ago")
+    compact_parser.add_argument("--archive-collection", help="archive collection (default: <collection>_archive)")
+    compact_parser.add_argument("--keep-history", action="store_true",
+                                help="keep tool observations in the archived workflow_history")
+    compact_parser.add_argument("--batch-size", type=int, default=500, help="plans per bulk write")
+    compact_parser.set_defaults(handler=compact)
+
+    backfill_parser = commands.add_parser("backfill-search", help="add search text to plans saved without it")
+    backfill_parser.add_argument("--batch-size", type=int, default=500, help="plans per bulk write")
+    backfill_parser.set_defaults(handler=backfill_search)
+    args = parser.parse_args()
+
+    load_dotenv()
+    from logging_config import setup_logging
+    from utils.database import MongoDBClient
+
+    setup_logging()
+    db_client = MongoDBClient(
+        os.environ["MONGO_DB_URI"], os.environ["MONGO_DB_NAME"], args.collection or os.environ["MONGO_DB_COLLECTION"]
+    )
+    args.handler(db_client, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Generate plans in bulk from a JSONL file of goals.
+
+    python batch_generate.py goals.jsonl --output plans.jsonl --mongo \\
+        --concurrency 4 --rate openai=3 --rate serpapi=5
+
+Each input line is a JSON object with the goal under --goal-field (default "goal")
+or a bare JSON string. Input is streamed and results are written in batches, so
+memory stays flat however large the file is. Progress is checkpointed after every
+batch and an interrupted run resumes from the checkpoint; goals finished after the
+last checkpoint may be generated again.
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+def read_goals(path, goal_field, start_line=0):
+    """Yield ``(line_number, goal)`` from a JSONL file; ``goal`` is None for unusable lines"""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f):
+            if line_number < start_line:
+                continue
+            line = line.strip()
+            if not line:
+                yield line_number, None
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Skipping line {line_number + 1}: invalid JSON ({e})")
+                yield line_number, None
+                continue
+            goal = record.get(goal_field) if isinstance(record, dict) else record
+            if not isinstance(goal, str) or not goal.strip():
+                logger.warning(f"Skipping line {line_number + 1}: no '{goal_field}' goal")
+                goal = None
+            yield line_number, goal
+
+
+class BatchRunner:
+    """Runs goals through the agent with bounded concurrency and batched, checkpointed output"""
+
+    def __init__(self, agent, input_path, checkpoint_path, goal_field="goal", db_client=None,
+                 output_path=None, plan_cache=None, concurrency=4, batch_size=50, report_every=30.0):
+        self.agent = agent
+        self.input_path = input_path
+        self.goal_field = goal_field
+        self.checkpoint_path = checkpoint_path
+        self.db_client = db_client
+        self.output_path = output_path
+        self.plan_cache = plan_cache
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.report_every = report_every
+
+        self.buffer = []
+        # Every line below the watermark has been processed and flushed
+        self.watermark = 0
+        self.finished_lines = set()
+        self.generated = 0
+        self.failed = 0
+        self.started = None
+        self.last_report = None
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("input") != os.path.abspath(self.input_path):
+            raise SystemExit(f"Checkpoint {self.checkpoint_path} belongs to {checkpoint.get('input')}")
+        logger.info(f"Resuming from line {checkpoint['next_line'] + 1}")
+        return checkpoint["next_line"]
+
+    def _save_checkpoint(self):
+        checkpoint = {
+            "input": os.path.abspath(self.input_path),
+            "next_line": self.watermark,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def run(self):
+        self.watermark = self.load_checkpoint()
+        self.started = self.last_report = time.perf_counter()
+
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for line_number, goal in read_goals(self.input_path, self.goal_field, self.watermark):
+                if goal is None:
+                    self._finish(line_number, None)
+                    continue
+                # Never hold more than `concurrency` goals in memory at once
+                while len(pending) >= self.concurrency:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, pending)
+                pending[pool.submit(self.agent.generate_plan_with_trace, goal)] = (line_number, goal)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                self._collect(done, pending)
+
+        self._flush()
+        self._report(final=True)
+
+    def _collect(self, done, pending):
+        for future in done:
+            line_number, goal = pending.pop(future)
+            plan, trace = future.result()
+            self._finish(line_number, {"line": line_number + 1, "goal": goal, "plan": plan, "workflow_history": trace})
+
+    def _finish(self, line_number, result):
+        if result is not None:
+            if "error" in result["plan"]:
+                self.failed += 1
+            else:
+                self.generated += 1
+            self.buffer.append(result)
+
+        self.finished_lines.add(line_number)
+        while self.watermark in self.finished_lines:
+            self.finished_lines.remove(self.watermark)
+            self.watermark += 1
+
+        if len(self.buffer) >= self.batch_size:
+            self._flush()
+        if time.perf_counter() - self.last_report >= self.report_every:
+            self._report()
+
+    def _flush(self):
+        """Write the buffered results, then move the checkpoint past them"""
+        if self.buffer:
+            if self.db_client is not None:
+                successful = [result for result in self.buffer if "error" not in result["plan"]]
+                plan_ids = self.db_client.save_plans(successful)
+                for result, plan_id in zip(successful, plan_ids):
+                    result["plan_id"] = plan_id
+                    if self.plan_cache is not None:
+                        self.plan_cache.store(result["goal"], plan_id)
+
+            if self.output_path:
+                with open(self.output_path, "a", encoding="utf-8") as f:
+                    for result in self.buffer:
+                        f.write(json.dumps(result, default=str) + "\n")
+            self.buffer = []
+        self._save_checkpoint()
+
+    def _report(self, final=False):
+        self.last_report = time.perf_counter()
+        elapsed = self.last_report - self.started
+        processed = self.generated + self.failed
+        rate = processed / elapsed if elapsed else 0.0
+        print(f"{'Done' if final else 'Progress'}: {processed} goals ({self.failed} failed) "
+              f"in {elapsed:.1f}s, {rate:.2f} plans/s, next line {self.watermark + 1}", flush=True)
+        from utils.rate_limit import rate_limit_metrics
+        for provider, metrics in rate_limit_metrics().items():
+            if metrics["throttled"] or metrics["queue_timeouts"] or metrics["max_queue_wait"]:
+                print(f"  {provider}: limit {metrics['limit']}, {metrics['throttled']} throttled, "
+                      f"{metrics['queue_timeouts']} queue timeouts, avg queue wait {metrics['avg_queue_wait']}s",
+                      flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of goals")
+    parser.add_argument("--goal-field", default="goal", help="JSON field holding the goal (default: goal)")
+    parser.add_argument("--output", help="append results to this JSONL file")
+    parser.add_argument("--mongo", action="store_true", help="save plans to the MongoDB configured in .env")
+    parser.add_argument("--warm-plan-cache", action="store_true",
+                        help="also record saved plans in the goal-level plan cache (requires --mongo)")
+    parser.add_argument("--concurrency", type=int, default=4, help="goals generated at the same time")
+    parser.add_argument("--batch-size", type=int, default=50, help="results per database/file write")
+    parser.add_argument("--rate", action="append", default=[], metavar="PROVIDER=RPS",
+                        help="requests per second for openai, serpapi, google or openweather (repeatable)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <input>.checkpoint)")
+    parser.add_argument("--report-every", type=float, default=30.0, help="seconds between progress lines")
+    parser.add_argument("--verbose", action="store_true", help="print the agent's reasoning")
+    args = parser.parse_args()
+
+    if not args.output and not args.mongo:
+        parser.error("nothing to write: pass --output and/or --mongo")
+    if args.warm_plan_cache and not args.mongo:
+        parser.error("--warm-plan-cache needs --mongo: cached plans point at saved plan documents")
+
+    load_dotenv()
+    from logging_config import setup_logging
+    from agent.task_agent import TaskPlanningAgent
+    from utils.rate_limit import configure_rate_limits, parse_rate_limits
+
+    setup_logging()
+    configure_rate_limits(parse_rate_limits(",".join(args.rate)))
+
+    db_client = plan_cache = None
+    if args.mongo:
+        from utils.database import MongoDBClient
+        db_client = MongoDBClient(
+            os.environ["MONGO_DB_URI"], os.environ["MONGO_DB_NAME"], os.environ["MONGO_DB_COLLECTION"]
+        )
+        if args.warm_plan_cache:
+            from utils.plan_cache import PlanCache
+            plan_cache = PlanCache(db_client)
+
+    agent = TaskPlanningAgent()
+    agent.agent.verbose = args.verbose
+
+    runner = BatchRunner(
+        agent, args.input, args.checkpoint or f"{args.input}.checkpoint", goal_field=args.goal_field,
+        db_client=db_client, output_path=args.output, plan_cache=plan_cache,
+        concurrency=args.concurrency, batch_size=args.batch_size, report_every=args.report_every
+    )
+    runner.run()
+
+
+if __name__ == "__main__":
+    main()
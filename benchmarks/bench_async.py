@@ -0,0 +1,73 @@
+"""Compare threaded generate_plan with agenerate_plan on one event loop.
+
+Runs offline against ScriptedChatModel and local stub servers:
+
+    python -m benchmarks.bench_async --concurrency 1 10 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import ScriptedChatModel, StubServer, openweather_routes, serpapi_response, stub_tool_env
+
+
+def build_agent(token_latency):
+    from agent.task_agent import TaskPlanningAgent
+
+    agent = TaskPlanningAgent(llm=ScriptedChatModel(call_latency=0.05, token_latency=token_latency))
+    agent.agent.verbose = False
+    return agent
+
+
+def run_threaded(agent, goals, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        plans = list(pool.map(agent.generate_plan, goals))
+    return plans, time.perf_counter() - start
+
+
+async def run_async(agent, goals, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(goal):
+        async with semaphore:
+            return await agent.agenerate_plan(goal)
+
+    start = time.perf_counter()
+    plans = await asyncio.gather(*(one(goal) for goal in goals))
+    return plans, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--plans-per-worker", type=int, default=2)
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="stub server latency in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="fake LLM latency per token")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    with StubServer(serpapi_response, latency=args.tool_latency) as search, \
+            StubServer(openweather_routes(), latency=args.tool_latency) as weather:
+        os.environ.update(stub_tool_env(search, weather))
+        agent = build_agent(args.token_latency)
+
+        print(f"{'concurrency':>11} {'plans':>6} {'threaded plans/s':>17} {'async plans/s':>14}")
+        for concurrency in args.concurrency:
+            goals = [f"Plan a 3-day trip to Jaipur #{i}" for i in range(max(concurrency * args.plans_per_worker, 4))]
+            threaded_plans, threaded_elapsed = run_threaded(agent, goals, concurrency)
+            async_plans, async_elapsed = asyncio.run(run_async(agent, goals, concurrency))
+
+            failures = sum("error" in plan for plan in threaded_plans + async_plans)
+            print(f"{concurrency:>11} {len(goals):>6} {len(goals) / threaded_elapsed:>17.2f} "
+                  f"{len(goals) / async_elapsed:>14.2f}" + (f"  ({failures} failed)" if failures else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare prompt tokens and latency per plan with and without observation compaction.
+
+Runs a four-step ReAct script (weather for two cities, two overlapping searches)
+offline against ScriptedChatModel and local stub servers. The fake model charges
+--prompt-token-latency per prompt token, so a longer scratchpad costs time as a
+real model's prefill does:
+
+    python -m benchmarks.bench_compaction --plans 5
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+import warnings
+
+from benchmarks.fakes import ScriptedChatModel, StubServer, openweather_routes, serpapi_response, stub_tool_env
+
+COMPACTION_SCRIPT = [
+    "Thought: I should check the weather for both cities.\nAction: Weather\nAction Input: Jaipur; Udaipur",
+    "Thought: Now I need attractions.\nAction: WebSearch\nAction Input: things to do in Jaipur",
+    "Thought: And some food.\nAction: WebSearch\nAction Input: best food in Jaipur",
+    'Thought: I now know the final answer.\nFinal Answer: {"Day 1": ["Visit Amber Fort", "Lunch at LMB"], '
+    '"Day 2": ["City Palace", "Dinner at Chokhi Dhani"], "Day 3": ["Lake Pichola", "Shopping in Udaipur"]}',
+]
+
+
+def run_mode(agent, goal, plans):
+    tokens, prompt_tokens, timings = [], [], []
+    for _ in range(plans):
+        start = time.perf_counter()
+        plan, trace = agent.generate_plan_with_trace(goal, prefetch=False)
+        timings.append(time.perf_counter() - start)
+        if "error" in plan:
+            print(f"  plan failed: {plan['error']}")
+        llm_steps = [step for step in trace if step["type"] == "llm"]
+        prompt_tokens.append(sum(step.get("prompt_tokens") or 0 for step in llm_steps))
+        tokens.append(prompt_tokens[-1] + sum(step.get("completion_tokens") or 0 for step in llm_steps))
+    return statistics.mean(tokens), statistics.mean(prompt_tokens), statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=5)
+    parser.add_argument("--goal", default="Plan a 3-day trip to Jaipur and Udaipur with good food")
+    parser.add_argument("--results", type=int, default=10, help="search results per query")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake LLM latency per call in seconds")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.0002,
+                        help="fake LLM latency per prompt token in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    with StubServer(serpapi_response) as search, StubServer(openweather_routes()) as weather:
+        os.environ.update(stub_tool_env(search, weather))
+        from agent.task_agent import TaskPlanningAgent
+
+        print(f"{'mode':>10} {'tokens/plan':>12} {'prompt tokens/plan':>19} {'seconds/plan':>13}")
+        results = {}
+        for label, compact in (("raw", False), ("compacted", True)):
+            llm = ScriptedChatModel(
+                script=COMPACTION_SCRIPT, call_latency=args.llm_latency,
+                prompt_token_latency=args.prompt_token_latency
+            )
+            agent = TaskPlanningAgent(llm=llm, compact_observations=compact)
+            agent.agent.verbose = False
+            # Return more hits per query than the default so raw observations are realistic in size
+            search_tool = agent.web_search_tool.search
+            agent.web_search_tool.search = lambda query: search_tool(query, num_results=args.results)
+            results[label] = run_mode(agent, args.goal, args.plans)
+            tokens, prompt_tokens, seconds = results[label]
+            print(f"{label:>10} {tokens:>12.0f} {prompt_tokens:>19.0f} {seconds:>13.2f}")
+
+        raw, compacted = results["raw"], results["compacted"]
+        print(f"Compaction saves {1 - compacted[0] / raw[0]:.0%} of tokens and "
+              f"{1 - compacted[2] / raw[2]:.0%} of latency per plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""End-to-end benchmark of plan generation and the MongoDB paths, fully offline.
+
+Each plan runs TaskPlanningAgent.generate_plan_with_trace against ScriptedChatModel
+and stub SerpAPI/OpenWeather servers (with injectable latency and error rates) and is
+saved through MongoDBClient (mongomock, or a disposable mongod with --mongo-uri).
+Reports throughput, p50/p95/p99 latency, tool and LLM calls per plan and memory at
+each concurrency level, then times the MongoDBClient operations the app uses:
+
+    python -m benchmarks.bench_e2e --concurrency 1 4 16 --json results/today.json
+    python -m benchmarks.bench_e2e --compare results/today.json
+
+--json stores the results for later runs to --compare against.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest import mock
+
+from agent.tracing import percentile
+from benchmarks.fakes import ScriptedChatModel, StubServer, openweather_routes, serpapi_response, stub_tool_env
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CITIES = ["Jaipur", "Udaipur", "Goa", "Hyderabad", "Kochi", "Mysore", "Agra", "Delhi"]
+
+
+def latency_stats(timings):
+    return {
+        "p50_s": round(percentile(timings, 50), 4),
+        "p95_s": round(percentile(timings, 95), 4),
+        "p99_s": round(percentile(timings, 99), 4),
+    }
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_plans(agent, db_client, concurrency, plans_per_worker):
+    """Generate and save ``concurrency * plans_per_worker`` plans; returns the level's metrics"""
+    goals = [f"Plan a 3-day trip to {CITIES[i % len(CITIES)]} #{i}" for i in range(concurrency * plans_per_worker)]
+
+    def one(goal):
+        start = time.perf_counter()
+        plan, trace = agent.generate_plan_with_trace(goal)
+        if "error" not in plan:
+            db_client.save_plan(goal, plan, trace)
+        return time.perf_counter() - start, plan, trace
+
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, goals))
+    elapsed = time.perf_counter() - start
+
+    timings = [timing for timing, _, _ in results]
+    traces = [trace for _, _, trace in results]
+    failures = sum("error" in plan for _, plan, _ in results)
+    level = {
+        "concurrency": concurrency,
+        "plans": len(goals),
+        "throughput_plans_s": round(len(goals) / elapsed, 3),
+        **latency_stats(timings),
+        "tool_calls_per_plan": round(statistics.mean(
+            sum(step["type"] == "tool" for step in trace) for trace in traces), 2),
+        "llm_calls_per_plan": round(statistics.mean(
+            sum(step["type"] == "llm" for step in trace) for trace in traces), 2),
+        "tokens_per_plan": round(statistics.mean(
+            sum((step.get("prompt_tokens") or 0) + (step.get("completion_tokens") or 0)
+                for step in trace if step["type"] == "llm")
+            for trace in traces)),
+        "failure_rate": round(failures / len(goals), 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if tracemalloc.is_tracing():
+        level["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+    return level
+
+
+def time_operation(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {"ops_s": round(repeat / sum(timings), 1), **latency_stats(timings)}
+
+
+def run_mongo(db_client, seed_plans, repeat, text_search):
+    """Time the MongoDBClient operations behind the app's pages on a seeded collection"""
+    from benchmarks.bench_search import synthetic_plan
+
+    rng = random.Random(42)
+    db_client.collection.delete_many({})
+    entries = [dict(zip(("goal", "plan"), synthetic_plan(rng))) for _ in range(seed_plans)]
+    for offset in range(0, len(entries), 1000):
+        db_client.save_plans(entries[offset:offset + 1000])
+    plan_ids = [plan["_id"] for plan in db_client.list_plans(min(seed_plans, 500))[0]]
+    _, cursor = db_client.list_plans(20)
+
+    operations = {
+        "save_plan": lambda: db_client.save_plan(*synthetic_plan(rng)),
+        "save_plans_x50": lambda: db_client.save_plans(
+            [dict(zip(("goal", "plan"), synthetic_plan(rng))) for _ in range(50)]),
+        "list_plans_first_page": lambda: db_client.list_plans(20),
+        "list_plans_next_page": lambda: db_client.list_plans(20, after=cursor),
+        "get_plan": lambda: db_client.get_plan(rng.choice(plan_ids)),
+        "update_plan_day": lambda: db_client.update_plan_day(rng.choice(plan_ids), "Day 2", ["Revised activity"]),
+        "get_workflow_histories": lambda: db_client.get_workflow_histories(500),
+    }
+    if text_search:
+        operations["search_plans"] = lambda: db_client.search_plans(rng.choice(CITIES))
+    return {name: time_operation(function, repeat) for name, function in operations.items()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"{'concurrency':>11} {'plans':>6} {'plans/s':>8} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'tools/plan':>10} {'LLM/plan':>9} {'tokens/plan':>11} {'failed':>7} {'RSS MB':>7}")
+    for level in results["plans"]:
+        print(f"{level['concurrency']:>11} {level['plans']:>6} {level['throughput_plans_s']:>8.2f} "
+              f"{level['p50_s']:>7.2f} {level['p95_s']:>7.2f} {level['p99_s']:>7.2f} "
+              f"{level['tool_calls_per_plan']:>10.1f} {level['llm_calls_per_plan']:>9.1f} "
+              f"{level['tokens_per_plan']:>11} {level['failure_rate']:>7.1%} {level['peak_rss_mb']:>7.1f}")
+    if results["mongo"]:
+        print(f"\n{'operation':>24} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, stats in results["mongo"].items():
+            print(f"{name:>24} {stats['ops_s']:>9.1f} {stats['p50_s'] * 1000:>8.2f} "
+                  f"{stats['p95_s'] * 1000:>8.2f} {stats['p99_s'] * 1000:>8.2f}")
+
+
+def print_comparison(results, baseline):
+    """Print the relative change of every metric present in both runs"""
+    print(f"\nChange against {baseline.get('label') or baseline.get('commit')} "
+          f"({baseline.get('started_at', '?')}); negative latency and positive throughput are better")
+    baseline_levels = {level["concurrency"]: level for level in baseline.get("plans", [])}
+    for level in results["plans"]:
+        before = baseline_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        changes = [f"{key} {_change(before[key], value)}" for key, value in level.items()
+                   if key not in ("concurrency", "plans") and before.get(key)]
+        print(f"  concurrency {level['concurrency']}: " + ", ".join(changes))
+    for name, stats in results["mongo"].items():
+        before = baseline.get("mongo", {}).get(name)
+        if before:
+            print(f"  {name}: " + ", ".join(f"{key} {_change(before[key], value)}"
+                                           for key, value in stats.items() if before.get(key)))
+
+
+def _change(before, after):
+    return f"{(after - before) / before:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--plans-per-worker", type=int, default=3)
+    parser.add_argument("--prefetch", action="store_true", help="enable the parallel prefetch stage")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM latency per call in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="fake LLM latency per output token")
+    parser.add_argument("--prompt-token-latency", type=float, default=0.00005,
+                        help="fake LLM latency per prompt token")
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="stub API latency per request in seconds")
+    parser.add_argument("--tool-error-rate", type=float, default=0.0, help="fraction of stub requests failing with 503")
+    parser.add_argument("--mongo-uri", help="MongoDB URI of a disposable local mongod (default: mongomock)")
+    parser.add_argument("--seed-plans", type=int, default=2000, help="plans in the collection for the Mongo timings")
+    parser.add_argument("--mongo-repeat", type=int, default=50, help="timed calls per Mongo operation")
+    parser.add_argument("--skip-mongo", action="store_true", help="only benchmark plan generation")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the Python heap peak per level (tracemalloc slows the run)")
+    parser.add_argument("--label", help="name stored with the results, e.g. the change being measured")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    warnings.filterwarnings("ignore")
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = {
+        "label": args.label, "commit": git_commit(), "started_at": datetime.now().isoformat(timespec="seconds"),
+        "params": vars(args), "plans": [], "mongo": {}
+    }
+    with StubServer(serpapi_response, latency=args.tool_latency, error_rate=args.tool_error_rate) as search, \
+            StubServer(openweather_routes(), latency=args.tool_latency, error_rate=args.tool_error_rate) as weather, \
+            mock.patch("utils.database.MongoClient", _mongo_client_factory(args.mongo_uri)):
+        os.environ.update(stub_tool_env(search, weather))
+        from agent.task_agent import TaskPlanningAgent
+        from utils.database import MongoDBClient
+
+        db_client = MongoDBClient(args.mongo_uri or "mongodb://mongomock", "planner_bench", "plans")
+        db_client.collection.delete_many({})
+        llm = ScriptedChatModel(
+            call_latency=args.llm_latency, token_latency=args.token_latency,
+            prompt_token_latency=args.prompt_token_latency
+        )
+        agent = TaskPlanningAgent(llm=llm, prefetch=args.prefetch, db_client=db_client)
+        agent.agent.verbose = False
+
+        for concurrency in args.concurrency:
+            results["plans"].append(run_plans(agent, db_client, concurrency, args.plans_per_worker))
+        if not args.skip_mongo:
+            # mongomock does not implement $text, so search is only timed on a real mongod
+            results["mongo"] = run_mongo(db_client, args.seed_plans, args.mongo_repeat, text_search=bool(args.mongo_uri))
+
+    print_results(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+def _mongo_client_factory(mongo_uri):
+    """The real MongoClient for --mongo-uri, otherwise one shared in-memory mongomock client"""
+    if mongo_uri:
+        from pymongo import MongoClient
+        return MongoClient
+    import mongomock
+    client = mongomock.MongoClient()
+    return lambda *args, **kwargs: client
+
+
+if __name__ == "__main__":
+    main()
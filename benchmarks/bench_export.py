@@ -0,0 +1,79 @@
+"""Compare the memory of loading every plan with streaming them to a JSONL export.
+
+Seeds a collection with --plans synthetic plans (each with a workflow_history of
+recorded observations) and measures the Python heap peak of get_all_plans against
+export_plans at growing collection sizes. mongomock copies a query's results up
+front, so only a disposable mongod (--mongo-uri) shows the streaming behaviour:
+
+    python -m benchmarks.bench_export --mongo-uri mongodb://localhost:27017 --plans 5000 20000
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import warnings
+from unittest import mock
+
+from benchmarks.bench_e2e import _mongo_client_factory
+
+
+def synthetic_trace(rng):
+    return [
+        {"type": "tool", "name": "web_search", "input": f"query {i}", "duration": rng.random(),
+         "observation": "lorem ipsum " * 150}
+        for i in range(6)
+    ]
+
+
+def measure(function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, nargs="+", default=[2000, 8000], help="collection sizes to measure")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--mongo-uri", help="MongoDB URI of a disposable local mongod (default: mongomock)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+    with mock.patch("utils.database.MongoClient", _mongo_client_factory(args.mongo_uri)):
+        from benchmarks.bench_search import synthetic_plan
+        from utils.database import MongoDBClient
+
+        rng = random.Random(42)
+        db_client = MongoDBClient(args.mongo_uri or "mongodb://mongomock", "planner_bench", "plans")
+        db_client.collection.delete_many({})
+        seeded = 0
+        output = os.path.join(tempfile.mkdtemp(), "plans.jsonl.gz")
+
+        print(f"{'plans':>7} {'mode':>14} {'seconds':>8} {'peak heap MB':>13}")
+        for size in sorted(args.plans):
+            while seeded < size:
+                count = min(1000, size - seeded)
+                db_client.save_plans([
+                    {**dict(zip(("goal", "plan"), synthetic_plan(rng))), "workflow_history": synthetic_trace(rng)}
+                    for _ in range(count)
+                ])
+                seeded += count
+            for label, function in (
+                ("get_all_plans", db_client.get_all_plans),
+                ("export_plans", lambda: db_client.export_plans(output, batch_size=args.batch_size)),
+            ):
+                elapsed, peak = measure(function)
+                print(f"{size:>7} {label:>14} {elapsed:>8.2f} {peak:>13.1f}")
+        db_client.collection.delete_many({})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Time the "View Past Plans" page with many plans on screen.
+
+Seeds mongomock with synthetic plans and runs app.py's history page through
+Streamlit's AppTest with a window of --plans plans, against a copy of the page
+that builds every day and activity as its own markdown element:
+
+    python -m benchmarks.bench_history --plans 1000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import time
+import warnings
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def per_element_page():
+    """The history page before plans were pre-rendered: one element per day and activity"""
+    import os
+    import streamlit as st
+    from utils.database import MongoDBClient
+
+    db_client = MongoDBClient(os.environ["MONGO_DB_URI"], os.environ["MONGO_DB_NAME"],
+                              os.environ["MONGO_DB_COLLECTION"])
+    plans, _ = db_client.list_plans(int(os.environ["PLANS_PAGE_SIZE"]), projection={"goal": 1, "timestamp": 1, "plan": 1})
+    for plan in plans:
+        with st.expander(f"{plan['goal']} - {plan['timestamp'].strftime('%Y-%m-%d %H:%M')}"):
+            st.markdown(f"**Goal:** {plan['goal']}")
+            st.markdown("**Plan:**")
+            for day, activities in plan["plan"].items():
+                st.markdown(f"### {day}")
+                for i, activity in enumerate(activities, 1):
+                    st.markdown(f"{i}. {activity}")
+                st.markdown("---")
+            st.button("Delete", key=plan["_id"])
+
+
+def timed_runs(app, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+        if app.exception:
+            raise RuntimeError(app.exception[0].value)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3, help="page reruns to time per mode")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+    import mongomock
+    from streamlit.testing.v1 import AppTest
+
+    client = mongomock.MongoClient()
+    os.environ.update({
+        "MONGO_DB_URI": "mongodb://mongomock", "MONGO_DB_NAME": "planner_bench", "MONGO_DB_COLLECTION": "plans",
+        "PLANS_PAGE_SIZE": str(args.plans), "TOOL_CACHE_PATH": "",
+    })
+    with mock.patch("pymongo.MongoClient", lambda *a, **k: client), \
+            mock.patch("utils.database.MongoClient", lambda *a, **k: client):
+        from benchmarks.bench_search import synthetic_plan
+        from utils.database import MongoDBClient
+
+        rng = random.Random(42)
+        db_client = MongoDBClient("mongodb://mongomock", "planner_bench", "plans")
+        db_client.save_plans([dict(zip(("goal", "plan"), synthetic_plan(rng))) for _ in range(args.plans)])
+
+        baseline = AppTest.from_function(per_element_page, default_timeout=600)
+        per_element = timed_runs(baseline, args.runs)
+
+        app = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=600).run()
+        app.sidebar.radio[0].set_value("View Past Plans")
+        current = timed_runs(app, args.runs)
+        shown = len(app.expander)
+
+    print(f"{shown} plans on the page, {args.runs} runs each")
+    print(f"{'mode':>12} {'elements':>9} {'first run':>10} {'rerun (mean)':>13}")
+    for label, timings, elements in (
+        ("per-element", per_element, len(baseline.markdown)),
+        ("pre-rendered", current, len(app.markdown)),
+    ):
+        rerun = statistics.mean(timings[1:]) if len(timings) > 1 else timings[0]
+        print(f"{label:>12} {elements:>9} {timings[0]:>9.2f}s {rerun:>12.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Import-time budget for the app's cold start.
+
+Runs ``python -X importtime`` on the modules app.py imports before the first page
+renders, prints the slowest imports and exits non-zero when the total exceeds
+--max-ms or when a module that should load lazily (LangChain, OpenAI) is pulled in:
+
+    python -m benchmarks.bench_import --max-ms 800
+
+The lazily loaded agent stack is measured too, for reference only.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# What app.py imports at the top; Streamlit itself is already loaded by the server
+STARTUP_MODULES = ["dotenv", "logging_config", "utils.database", "utils.plan_cache", "utils.jobs"]
+DEFERRED_MODULES = ["agent.task_agent"]
+FORBIDDEN_AT_STARTUP = ["langchain", "langchain_core", "langchain_openai", "openai", "httpx"]
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(modules):
+    """Import ``modules`` in a fresh interpreter; returns ``{module: (self_us, cumulative_us)}``"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only the first import of a module is reported
+        timings.setdefault(name.strip(), (int(self_us), int(cumulative_us)))
+    return timings
+
+
+def best_of(modules, runs):
+    """Return the run with the lowest total, to damp disk cache and scheduler noise"""
+    results = [measure(modules) for _ in range(runs)]
+    return min(results, key=lambda timings: sum(self_us for self_us, _ in timings.values()))
+
+
+def report(title, timings, top):
+    total_ms = sum(self_us for self_us, _ in timings.values()) / 1000
+    print(f"{title}: {total_ms:.0f} ms across {len(timings)} modules")
+    slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (_, cumulative_us) in slowest[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return total_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-ms", type=float, default=800, help="fail when startup imports take longer")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    startup = best_of(STARTUP_MODULES, args.runs)
+    startup_ms = report("Startup imports", startup, args.top)
+    report("Deferred agent imports", best_of(DEFERRED_MODULES, args.runs), args.top)
+
+    failures = []
+    if startup_ms > args.max_ms:
+        failures.append(f"startup imports took {startup_ms:.0f} ms (budget {args.max_ms:.0f} ms)")
+    leaked = sorted(name for name in FORBIDDEN_AT_STARTUP if name in startup)
+    if leaked:
+        failures.append(f"startup imports load modules meant to be lazy: {', '.join(leaked)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: within import-time budget")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
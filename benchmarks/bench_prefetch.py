@@ -0,0 +1,59 @@
+"""Compare plan generation with and without the parallel prefetch stage.
+
+Reports agent tool iterations and wall-clock time per plan for both modes,
+offline against ScriptedChatModel and local stub servers:
+
+    python -m benchmarks.bench_prefetch --plans 5
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+import warnings
+
+from benchmarks.fakes import ScriptedChatModel, StubServer, openweather_routes, serpapi_response, stub_tool_env
+
+
+def run_mode(agent, llm, goal, plans, prefetch):
+    iterations, timings = [], []
+    for _ in range(plans):
+        calls_before = llm.calls
+        start = time.perf_counter()
+        plan = agent.generate_plan(goal, prefetch=prefetch)
+        timings.append(time.perf_counter() - start)
+        # Every LLM call except the final answer is one Thought -> Action -> Observation cycle
+        iterations.append(llm.calls - calls_before - 1)
+        if "error" in plan:
+            print(f"  plan failed: {plan['error']}")
+    return statistics.mean(iterations), statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plans", type=int, default=5)
+    parser.add_argument("--goal", default="Plan a 3-day trip to Jaipur with cultural highlights and good food")
+    parser.add_argument("--tool-latency", type=float, default=0.3, help="stub server latency in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="fake LLM latency per call in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+
+    with StubServer(serpapi_response, latency=args.tool_latency) as search, \
+            StubServer(openweather_routes(), latency=args.tool_latency) as weather:
+        os.environ.update(stub_tool_env(search, weather))
+        from agent.task_agent import TaskPlanningAgent
+
+        llm = ScriptedChatModel(call_latency=args.llm_latency)
+        agent = TaskPlanningAgent(llm=llm)
+        agent.agent.verbose = False
+
+        print(f"{'mode':>12} {'iterations/plan':>16} {'seconds/plan':>13}")
+        for label, prefetch in (("sequential", False), ("prefetch", True)):
+            iterations, seconds = run_mode(agent, llm, args.goal, args.plans, prefetch)
+            print(f"{label:>12} {iterations:>16.1f} {seconds:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
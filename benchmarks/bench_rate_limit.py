@@ -0,0 +1,73 @@
+"""Compare a fixed concurrency limit with the adaptive (AIMD) limiter under a provider quota.
+
+Many concurrent workers run web searches against a local SerpAPI stub that answers
+429 once more than --capacity requests are in flight. The fixed mode admits every
+worker at once and relies on transport retries alone; the adaptive mode shrinks
+the concurrency limit on 429s and queues the excess:
+
+    python -m benchmarks.bench_rate_limit --workers 32 --capacity 4
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from benchmarks.fakes import StubServer, serpapi_response
+
+
+def run_mode(tool, limiter, workers, searches):
+    def worker(index):
+        return [tool.search(f"worker {index} query {i}") for i in range(searches)]
+
+    start = time.perf_counter()
+    with mock.patch("utils.transport.get_rate_limiter", return_value=limiter):
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = [result for batch in pool.map(worker, range(workers)) for result in batch]
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for result in results if isinstance(result, dict) and "error" in result)
+    return errors, len(results), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--searches", type=int, default=5, help="searches per worker")
+    parser.add_argument("--capacity", type=int, default=4, help="requests the stub serves concurrently")
+    parser.add_argument("--latency", type=float, default=0.1, help="stub latency per request in seconds")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with each 429")
+    parser.add_argument("--queue-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    # Failed searches log an error each; the table counts them instead
+    logging.basicConfig(level=logging.CRITICAL)
+
+    with StubServer(serpapi_response, latency=args.latency, capacity=args.capacity,
+                    retry_after=args.retry_after) as search:
+        os.environ.update({
+            "SERPAPI_KEY": "bench",
+            "SERPAPI_BASE_URL": f"{search.url}/search",
+            "TOOL_CACHE_PATH": "",
+            "SEARCH_CACHE_TTL": "0",
+        })
+        from utils.rate_limit import AdaptiveLimiter
+        from utils.tools import WebSearchTool
+        from utils.transport import HTTPTransport
+
+        print(f"{'mode':>9} {'errors':>7} {'429s':>6} {'seconds':>8} {'final limit':>12} {'avg wait':>9}")
+        for label, decrease_factor in (("fixed", 1.0), ("adaptive", 0.5)):
+            limiter = AdaptiveLimiter(
+                "serpapi", max_concurrency=args.workers, queue_timeout=args.queue_timeout,
+                decrease_factor=decrease_factor
+            )
+            tool = WebSearchTool(http=HTTPTransport(pool_size=args.workers))
+            throttled_before = search.throttled
+            errors, total, elapsed = run_mode(tool, limiter, args.workers, args.searches)
+            metrics = limiter.metrics()
+            print(f"{label:>9} {errors:>4}/{total:<3} {search.throttled - throttled_before:>5} {elapsed:>8.2f} "
+                  f"{metrics['limit']:>12.1f} {metrics['avg_queue_wait']:>8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
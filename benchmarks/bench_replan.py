@@ -0,0 +1,74 @@
+"""Compare regenerating a whole plan with re-planning one day of it.
+
+Generates a plan offline (ScriptedChatModel, stub SerpAPI/OpenWeather servers with
+--tool-latency), saves it to mongomock and then times ``replan`` on one day, which
+reuses the recorded observations and makes a single LLM call:
+
+    python -m benchmarks.bench_replan --llm-latency 2 --tool-latency 1.5
+"""
+import argparse
+import logging
+import os
+import statistics
+import time
+import warnings
+from unittest import mock
+
+from benchmarks.fakes import ScriptedChatModel, StubServer, openweather_routes, serpapi_response, stub_tool_env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--goal", default="Plan a 3-day trip to Jaipur")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="fake LLM latency per call in seconds")
+    parser.add_argument("--tool-latency", type=float, default=0.5, help="stub API latency per request in seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings("ignore")
+    import mongomock
+
+    client = mongomock.MongoClient()
+    with StubServer(serpapi_response, latency=args.tool_latency) as search, \
+            StubServer(openweather_routes(), latency=args.tool_latency) as weather, \
+            mock.patch("utils.database.MongoClient", lambda *a, **k: client):
+        os.environ.update(stub_tool_env(search, weather))
+        from agent.task_agent import TaskPlanningAgent
+        from utils.database import MongoDBClient
+
+        db_client = MongoDBClient("mongodb://mongomock", "planner_bench", "plans")
+        llm = ScriptedChatModel(call_latency=args.llm_latency)
+        agent = TaskPlanningAgent(llm=llm, prefetch=False, db_client=db_client)
+        agent.agent.verbose = False
+
+        full, replan = [], []
+        for _ in range(args.runs):
+            calls = llm.calls
+            start = time.perf_counter()
+            plan, trace = agent.generate_plan_with_trace(args.goal)
+            full.append(time.perf_counter() - start)
+            full_calls = llm.calls - calls
+            if "error" in plan:
+                raise SystemExit(f"plan failed: {plan['error']}")
+            plan_id = db_client.save_plan(args.goal, plan, trace)
+
+            calls = llm.calls
+            tool_requests = search.requests + weather.requests
+            start = time.perf_counter()
+            updated = agent.replan(plan_id, "Day 2", "more museums, less walking")
+            replan.append(time.perf_counter() - start)
+            if "error" in updated:
+                raise SystemExit(f"replan failed: {updated['error']}")
+            replan_calls = llm.calls - calls
+            replan_tools = search.requests + weather.requests - tool_requests
+
+        print(f"{'operation':>14} {'LLM calls':>10} {'seconds (mean)':>15}")
+        print(f"{'full plan':>14} {full_calls:>10} {statistics.mean(full):>15.2f}")
+        print(f"{'replan one day':>14} {replan_calls:>10} {statistics.mean(replan):>15.2f}")
+        print(f"Re-planning made {replan_tools} tool request(s) and took "
+              f"{statistics.mean(replan) / statistics.mean(full):.0%} of a full generation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compare the old in-Python plan search with MongoDBClient.search_plans.
+
+Seeds a collection with synthetic plans and times both approaches per query:
+
+    python -m benchmarks.bench_search --uri mongodb://localhost:27017 --plans 50000
+
+Without --uri the benchmark runs on mongomock, which does not implement $text,
+so only the Python scan is measured there.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+CITIES = ["Jaipur", "Udaipur", "Goa", "Hyderabad", "Vizag", "Mumbai", "Delhi", "Kochi", "Mysore", "Agra"]
+TOPICS = ["street food", "forts", "beaches", "museums", "hiking", "temples", "markets", "nightlife", "seafood"]
+PLACES = ["Palace", "Bazaar", "Lake", "Fort", "Cafe", "Museum", "Garden", "Beach", "Temple", "Market"]
+
+
+def synthetic_plan(rng):
+    city = rng.choice(CITIES)
+    topics = rng.sample(TOPICS, 2)
+    goal = f"Plan a 3-day trip to {city} with {topics[0]} and {topics[1]}"
+    plan = {
+        f"Day {day}": [f"Visit {rng.choice(PLACES)} {rng.randint(1, 500)} in {city} for {rng.choice(TOPICS)}"
+                       for _ in range(5)]
+        for day in range(1, 4)
+    }
+    return goal, plan
+
+
+def seed(db_client, count, batch_size=1000):
+    from utils.database import flatten_plan_text
+
+    rng = random.Random(42)
+    start_time = datetime.now() - timedelta(days=365)
+    db_client.collection.delete_many({})
+    for offset in range(0, count, batch_size):
+        batch = []
+        for i in range(offset, min(offset + batch_size, count)):
+            goal, plan = synthetic_plan(rng)
+            batch.append({
+                "goal": goal, "plan": plan, "workflow_history": [], "search_text": flatten_plan_text(plan),
+                "timestamp": start_time + timedelta(minutes=i), "status": "completed"
+            })
+        db_client.collection.insert_many(batch)
+
+
+def python_search(db_client, query):
+    """The filter app.py used before search_plans existed"""
+    plans = db_client.get_all_plans()
+    return [
+        p for p in plans
+        if query.lower() in p['goal'].lower() or
+        any(query.lower() in str(v).lower() for v in p['plan'].values() if isinstance(v, (str, list)))
+    ]
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI of a disposable local mongod (default: mongomock)")
+    parser.add_argument("--plans", type=int, default=50000)
+    parser.add_argument("--queries", nargs="+", default=["Jaipur", "street food", "Palace 42", "nightlife Goa"])
+    args = parser.parse_args()
+
+    if args.uri:
+        from utils.database import MongoDBClient
+        db_client = MongoDBClient(args.uri, "planner_bench", "plans")
+    else:
+        import mongomock
+        with mock.patch("utils.database.MongoClient", mongomock.MongoClient):
+            from utils.database import MongoDBClient
+            db_client = MongoDBClient("mongodb://mongomock", "planner_bench", "plans")
+
+    print(f"Seeding {args.plans} plans...")
+    _, seed_elapsed = timed(seed, db_client, args.plans)
+    print(f"Seeded in {seed_elapsed:.1f}s\n")
+
+    print(f"{'query':>16} {'python matches':>15} {'python s':>9} {'text page':>10} {'text s':>8}")
+    for query in args.queries:
+        matches, python_elapsed = timed(python_search, db_client, query)
+        try:
+            (page, _), text_elapsed = timed(db_client.search_plans, query)
+            text_columns = f"{len(page):>10} {text_elapsed:>8.3f}"
+        except NotImplementedError:
+            text_columns = f"{'n/a':>10} {'n/a':>8}"
+        print(f"{query:>16} {len(matches):>15} {python_elapsed:>9.3f} {text_columns}")
+
+    if args.uri:
+        db_client.client.drop_database("planner_bench")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Offline stand-ins for the external services used by the benchmarks.
+
+``ScriptedChatModel`` plays a ReAct conversation without calling OpenAI and
+``StubServer`` serves canned SerpAPI / OpenWeather responses from a local port.
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlsplit
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from agent.compaction import estimate_tokens
+
+DEFAULT_SCRIPT = [
+    "Thought: I should check the weather first.\nAction: Weather\nAction Input: Jaipur",
+    "Thought: Now I need attractions.\nAction: WebSearch\nAction Input: things to do in Jaipur",
+    'Thought: I now know the final answer.\nFinal Answer: {"Day 1": ["Visit Amber Fort", "Lunch at LMB"], '
+    '"Day 2": ["City Palace", "Dinner at Chokhi Dhani"], "Day 3": ["Hawa Mahal", "Shopping at Johari Bazaar"]}',
+]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that answers each ReAct step from a fixed script.
+
+    The step is chosen by counting the observations already in the scratchpad, so a
+    single instance can serve many concurrent agent runs. Action steps whose result
+    was prefetched into the prompt (``[Tool: input]``) are skipped, as a real model
+    would. Latency is simulated as ``call_latency`` plus ``token_latency`` per
+    whitespace-separated token plus ``prompt_token_latency`` per (estimated) prompt
+    token; ``calls`` counts LLM invocations. Replies carry estimated token usage. With ``streaming``
+    set, tokens are reported through ``on_llm_new_token`` as they are "generated",
+    like ``ChatOpenAI(streaming=True)``. A re-plan prompt is answered with
+    ``replan_activities`` for the requested day.
+    """
+
+    script: List[str] = DEFAULT_SCRIPT
+    call_latency: float = 0.0
+    token_latency: float = 0.0
+    prompt_token_latency: float = 0.0
+    streaming: bool = False
+    calls: int = 0
+    replan_activities: List[str] = ["Sunrise walk at Nahargarh", "Breakfast at Tapri", "Albert Hall Museum"]
+
+    @property
+    def _llm_type(self):
+        return "scripted-chat"
+
+    def _pick(self, messages):
+        self.calls += 1
+        text = messages[-1].content if messages else ""
+        replan = re.search(r'Rewrite "([^"]+)" following this request', text)
+        if replan:
+            return json.dumps({replan.group(1): self.replan_activities})
+        # The ReAct template ends with "Question: {input}\nThought:{agent_scratchpad}"
+        question, _, scratchpad = text.rsplit("Question:", 1)[-1].partition("\nThought:")
+        steps = [step for step in self.script if not self._already_known(step, question.lower())]
+        return steps[min(scratchpad.count("Observation:"), len(steps) - 1)]
+
+    @staticmethod
+    def _already_known(step, question):
+        match = re.search(r"Action: (.+)\nAction Input: (.+)", step)
+        return bool(match) and f"[{match.group(1)}: {match.group(2)}]".lower() in question
+
+    def _latency(self, reply):
+        return self.call_latency + self.token_latency * len(reply.split())
+
+    @staticmethod
+    def _prompt_tokens(messages):
+        return sum(estimate_tokens(str(message.content)) for message in messages)
+
+    def _result(self, messages, reply):
+        usage = {
+            "input_tokens": self._prompt_tokens(messages),
+            "output_tokens": estimate_tokens(reply),
+            "total_tokens": self._prompt_tokens(messages) + estimate_tokens(reply)
+        }
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=reply, usage_metadata=usage))])
+
+    @staticmethod
+    def _tokens(reply):
+        return re.findall(r"\S+\s*|\s+", reply)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self._pick(messages)
+        prefill = self.prompt_token_latency * self._prompt_tokens(messages)
+        if self.streaming and run_manager:
+            time.sleep(self.call_latency + prefill)
+            for token in self._tokens(reply):
+                time.sleep(self.token_latency)
+                run_manager.on_llm_new_token(token)
+        else:
+            time.sleep(self._latency(reply) + prefill)
+        return self._result(messages, reply)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = self._pick(messages)
+        prefill = self.prompt_token_latency * self._prompt_tokens(messages)
+        if self.streaming and run_manager:
+            await asyncio.sleep(self.call_latency + prefill)
+            for token in self._tokens(reply):
+                await asyncio.sleep(self.token_latency)
+                await run_manager.on_llm_new_token(token)
+        else:
+            await asyncio.sleep(self._latency(reply) + prefill)
+        return self._result(messages, reply)
+
+
+def serpapi_response(params):
+    query = params.get("q", [""])[0]
+    num = int(params.get("num", ["3"])[0])
+    return {"organic_results": [
+        {
+            "title": f"{query} #{i}",
+            "snippet": f"Snippet {i} about {query}. Opening hours, ticket prices and how to get there, "
+                       f"plus tips from travellers who visited recently.",
+            "link": f"https://example.com/{i}"
+        }
+        for i in range(num)
+    ]}
+
+
+def openweather_response(params):
+    city = params.get("q", ["Unknown"])[0]
+    return {
+        "cod": 200,
+        "id": abs(hash(city.lower())) % 10 ** 7,
+        "name": city.title(),
+        "main": {"temp": 24.5, "humidity": 40},
+        "weather": [{"description": "clear sky"}],
+        "wind": {"speed": 2.1}
+    }
+
+
+def openweather_forecast_response(params):
+    if "id" in params:
+        city_id = int(params["id"][0])
+        city = f"City {city_id}"
+    else:
+        city = params.get("q", ["Unknown"])[0]
+        city_id = abs(hash(city.lower())) % 10 ** 7
+    start = int(time.time()) // 10800 * 10800
+    return {
+        "cod": "200",
+        "city": {"id": city_id, "name": city.title(), "country": "IN", "timezone": 19800},
+        "list": [
+            {
+                "dt": start + step * 10800,
+                "main": {"temp": 20 + step % 8, "humidity": 40},
+                "weather": [{"description": "clear sky"}],
+                "wind": {"speed": 2.1},
+                "pop": 0.1
+            }
+            for step in range(40)
+        ]
+    }
+
+
+def openweather_routes():
+    """Responders for the current-weather and forecast endpoints of one stub server"""
+    return {"/data/2.5/weather": openweather_response, "/data/2.5/forecast": openweather_forecast_response}
+
+
+def stub_tool_env(search, weather):
+    """Environment pointing the tools at stub servers, with the result caches turned off"""
+    return {
+        "SERPAPI_KEY": "bench",
+        "SERPAPI_BASE_URL": f"{search.url}/search",
+        "OPENWEATHER_API_KEY": "bench",
+        "OPENWEATHER_BASE_URL": f"{weather.url}/data/2.5/weather",
+        "OPENWEATHER_FORECAST_URL": f"{weather.url}/data/2.5/forecast",
+        # Every plan must pay for its tool calls, so keep the result cache out of the way
+        "TOOL_CACHE_PATH": "",
+        "SEARCH_CACHE_TTL": "0",
+        "WEATHER_CACHE_TTL": "0",
+    }
+
+
+class StubServer:
+    """Threaded local HTTP server returning ``responder(query_params)`` as JSON.
+
+    ``responder`` may also be a dict mapping request paths to responders. ``latency`` seconds are added to every request and ``error_rate`` of requests
+    fail with HTTP 503. With ``capacity`` set, requests beyond that many in flight are
+    rejected with HTTP 429 (and ``Retry-After: retry_after`` when given), like a
+    provider's concurrency quota. ``statuses`` scripts the status codes of the first
+    requests, in order, before normal answers resume.
+    """
+
+    def __init__(self, responder, latency=0.0, error_rate=0.0, capacity=None, retry_after=None, statuses=()):
+        self.responder = responder
+        self.latency = latency
+        self.error_rate = error_rate
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.statuses = list(statuses)
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    stub.in_flight += 1
+                    over_capacity = stub.capacity is not None and stub.in_flight > stub.capacity
+                    stub.throttled += over_capacity
+                    scripted = stub.statuses.pop(0) if stub.statuses and not over_capacity else None
+                try:
+                    self._respond(over_capacity, scripted)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _respond(self, over_capacity, scripted=None):
+                headers = {}
+                if over_capacity or scripted is not None:
+                    # Quota rejections come back at once, before any work is done
+                    status = 429 if over_capacity else scripted
+                    payload = {"error": "too many concurrent requests" if over_capacity else "scripted failure"}
+                    if status == 429 and stub.retry_after is not None:
+                        headers["Retry-After"] = str(stub.retry_after)
+                else:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    status, payload = self._payload()
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _payload(self):
+                if random.random() < stub.error_rate:
+                    return 503, {"error": "injected failure"}
+                url = urlsplit(self.path)
+                responder = stub.responder
+                if isinstance(responder, dict):
+                    responder = responder.get(url.path)
+                if responder is None:
+                    return 404, {"error": f"no stub for {url.path}"}
+                return 200, responder(parse_qs(url.query))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        # A short poll interval keeps shutdown() from waiting half a second per server
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
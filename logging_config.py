@@ -1,58 +1,154 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
+import random
+import threading
 from datetime import datetime
 
+# The one listener for this process; setup_logging() is a no-op once it is running
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of low-level records from chatty modules.
+
+    ``rates`` maps logger name prefixes to the fraction of records to keep, e.g.
+    ``{"utils.tools": 0.1}``; the longest matching prefix wins. Records above
+    ``max_level`` are never dropped.
+    """
+
+    def __init__(self, rates, max_level=logging.DEBUG):
+        super().__init__()
+        self.rates = rates
+        self.max_level = max_level
+
+    def filter(self, record):
+        if record.levelno > self.max_level:
+            return True
+        rate = None
+        matched = ""
+        for prefix, prefix_rate in self.rates.items():
+            if (record.name == prefix or record.name.startswith(prefix + ".")) and len(prefix) > len(matched):
+                matched, rate = prefix, prefix_rate
+        return rate is None or random.random() < rate
+
+
+def parse_sample_rates(spec):
+    """Parse ``"utils.tools=0.1,agent=0.5"`` into sampling rates by logger name"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
 def setup_logging():
-    """Setup comprehensive logging configuration"""
-    
-    # Create logs directory if it doesn't exist
-    logs_dir = "logs"
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
-    
-    # Generate log filename with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(logs_dir, f"task_agent_{timestamp}.log")
-    
-    # Create root logger
+    """Setup comprehensive logging configuration.
+
+    Safe to call on every Streamlit rerun: the handlers are created once per process.
+    Loggers only put records on a queue; a background listener thread formats them and
+    writes the log file and console. Configured with LOG_LEVEL, LOG_FORMAT ("text" or
+    "json") and LOG_SAMPLE (e.g. "utils.tools=0.1" to keep 10% of its debug lines).
+    """
+    global _listener
+
     logger = logging.getLogger()
-    logger.setLevel(logging.INFO)
-    
-    # Remove any existing handlers
-    for handler in logger.handlers[:]:
-        logger.removeHandler(handler)
-    
-    # Create formatters
-    file_formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s - %(message)s'
-    )
-    
-    # File handler (logs everything)
-    file_handler = logging.handlers.RotatingFileHandler(
-        log_file, maxBytes=10485760, backupCount=5  # 10MB per file, keep 5 backups
-    )
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(file_formatter)
-    
-    # Console handler (only warnings and errors)
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)
-    console_handler.setFormatter(console_formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        # Create logs directory if it doesn't exist
+        logs_dir = "logs"
+        if not os.path.exists(logs_dir):
+            os.makedirs(logs_dir)
+
+        # Generate log filename with timestamp
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = os.path.join(logs_dir, f"task_agent_{timestamp}.log")
+
+        level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+        logger.setLevel(level)
+
+        # Remove any existing handlers
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+
+        # Create formatters
+        if os.getenv("LOG_FORMAT", "text").lower() == "json":
+            file_formatter = console_formatter = JSONFormatter()
+        else:
+            file_formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+            console_formatter = logging.Formatter(
+                '%(levelname)s - %(message)s'
+            )
+
+        # File handler (logs everything)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=10485760, backupCount=5  # 10MB per file, keep 5 backups
+        )
+        file_handler.setLevel(level)
+        file_handler.setFormatter(file_formatter)
+
+        # Console handler (only warnings and errors)
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.WARNING)
+        console_handler.setFormatter(console_formatter)
+
+        # Callers only enqueue records; formatting and I/O happen on the listener thread
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        sample_rates = parse_sample_rates(os.getenv("LOG_SAMPLE", ""))
+        if sample_rates:
+            # Dropped before they are queued, so sampled-out records cost almost nothing
+            queue_handler.addFilter(SamplingFilter(sample_rates))
+        logger.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue, file_handler, console_handler, respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+
     # Log startup message
     logger.info("=" * 50)
     logger.info("Task Planning Agent Started")
     logger.info("=" * 50)
-    
+
     return logger
 
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+
 # Create a module-level logger
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
@@ -0,0 +1,84 @@
+import sqlite3
+from unittest import mock
+
+from utils.cache import ResultCache
+from utils.tools import WebSearchTool
+
+
+def disk_rows(path, namespace="test"):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM tool_cache WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+
+def test_entries_expire_after_ttl(tmp_path):
+    cache = ResultCache("test", ttl=10, db_path=str(tmp_path / "cache.sqlite3"))
+    with mock.patch("utils.cache.time.time", return_value=1000.0):
+        cache.set("key", {"value": 1})
+        assert cache.get("key") == {"value": 1}
+    with mock.patch("utils.cache.time.time", return_value=1011.0):
+        assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_per_entry_ttl_overrides_default():
+    cache = ResultCache("test", ttl=10, db_path=None)
+    with mock.patch("utils.cache.time.time", return_value=1000.0):
+        cache.set("key", "short", ttl=1)
+    with mock.patch("utils.cache.time.time", return_value=1002.0):
+        assert cache.get("key") is None
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache("test", max_entries=2, db_path=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    ResultCache("test", db_path=path).set("key", ["result"])
+    cache = ResultCache("test", db_path=path)
+    assert cache.get("key") == ["result"]
+    assert cache.disk_hits == 1
+    # Namespaces sharing a file do not see each other's entries
+    assert ResultCache("other", db_path=path).get("key") is None
+
+
+def test_disk_tier_is_trimmed_to_max_disk_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResultCache("test", db_path=path, max_disk_entries=10)
+    for i in range(99):
+        cache.set(f"key {i}", i)
+    # Trimming runs every 100 writes
+    assert disk_rows(path) == 99
+    cache.set("key 99", 99)
+    assert disk_rows(path) == 10
+    # The most recently used rows are kept
+    assert ResultCache("test", db_path=path).get("key 99") == 99
+
+
+def test_disk_tier_is_trimmed_on_open(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResultCache("test", db_path=path)
+    for i in range(50):
+        cache.set(f"key {i}", i)
+    ResultCache("test", db_path=path, max_disk_entries=5)
+    assert disk_rows(path) == 5
+
+
+def test_web_search_never_caches_errors(monkeypatch):
+    monkeypatch.setenv("SERPAPI_KEY", "test")
+    cache = ResultCache("web_search", db_path=None)
+    tool = WebSearchTool(cache=cache, http=mock.Mock(), ahttp=mock.Mock())
+    failures = iter([{"error": "Search API request failed: 503"}, [{"title": "Fort", "link": "x", "snippet": ""}]])
+    with mock.patch.object(tool, "_search_serpapi", side_effect=lambda query, num: next(failures)):
+        assert "error" in tool.search("forts in jaipur")
+        assert tool.search("forts in jaipur") == [{"title": "Fort", "link": "x", "snippet": ""}]
+        # The success was cached, so this is served without calling the provider
+        assert tool.search("Forts in Jaipur?") == [{"title": "Fort", "link": "x", "snippet": ""}]
+    assert cache.stats()["hits"] == 1
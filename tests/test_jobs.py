@@ -0,0 +1,106 @@
+import time
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+from utils.jobs import JOB_COMPLETED, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, InMemoryJobQueue
+from worker import process_job
+
+
+def go_stale(queue, job_id):
+    queue._jobs[job_id]["heartbeat_at"] = datetime.now() - timedelta(seconds=60)
+
+
+def test_claim_takes_oldest_queued_job_once():
+    queue = InMemoryJobQueue()
+    first = queue.enqueue("Plan a trip to Jaipur")
+    second = queue.enqueue("Plan a trip to Goa")
+    job = queue.claim("worker-a")
+    assert job["_id"] == first and job["status"] == JOB_RUNNING
+    assert job["worker"] == "worker-a" and job["attempts"] == 1
+    assert queue.claim("worker-b")["_id"] == second
+    assert queue.claim("worker-c") is None
+
+
+def test_requeue_stale_only_touches_silent_jobs():
+    queue = InMemoryJobQueue()
+    silent = queue.enqueue("Plan a trip to Jaipur")
+    queue.enqueue("Plan a trip to Goa")
+    queue.claim("worker-a")
+    queue.claim("worker-b")
+    go_stale(queue, silent)
+    assert queue.requeue_stale(30) == 1
+    job = queue.get(silent)
+    assert job["status"] == JOB_QUEUED and job["worker"] is None
+    assert queue.claim("worker-c")["attempts"] == 2
+
+
+def test_job_fails_once_attempts_are_exhausted():
+    queue = InMemoryJobQueue(max_attempts=2)
+    job_id = queue.enqueue("Plan a trip to Jaipur")
+    for worker in ("worker-a", "worker-b"):
+        assert queue.claim(worker)["_id"] == job_id
+        go_stale(queue, job_id)
+        queue.requeue_stale(30)
+    job = queue.get(job_id)
+    assert job["status"] == JOB_FAILED and job["error"] == "Worker stopped responding"
+    assert queue.claim("worker-c") is None
+
+
+def test_only_the_current_owner_can_finish_a_job():
+    queue = InMemoryJobQueue()
+    job_id = queue.enqueue("Plan a trip to Jaipur")
+    queue.claim("worker-a")
+    go_stale(queue, job_id)
+    queue.requeue_stale(30)
+    queue.claim("worker-b")
+
+    # The stale worker wakes up after its job was handed to worker-b
+    assert not queue.update_progress(job_id, "worker-a", 50, "Planned Day 1")
+    assert not queue.fail(job_id, "worker-a", "timed out")
+    assert not queue.complete(job_id, "worker-a", "stale-plan")
+    assert queue.get(job_id)["status"] == JOB_RUNNING
+
+    assert queue.complete(job_id, "worker-b", "plan-1")
+    job = queue.get(job_id)
+    assert job["status"] == JOB_COMPLETED and job["plan_id"] == "plan-1"
+    # A finished job cannot be reopened by its last owner either
+    assert not queue.fail(job_id, "worker-b", "late error")
+
+
+class SlowAgent:
+    """Agent stand-in that thinks for ``delay`` seconds before answering"""
+
+    def __init__(self, delay, plan):
+        self.delay = delay
+        self.plan = plan
+
+    def stream_plan(self, goal):
+        time.sleep(self.delay)
+        yield "trace", []
+        yield "plan", self.plan
+
+
+def test_process_job_sends_heartbeats_while_generating():
+    queue = InMemoryJobQueue()
+    job_id = queue.enqueue("Plan a trip to Jaipur")
+    job = queue.claim("worker-a")
+    db_client = mock.Mock()
+    db_client.save_plan.return_value = "plan-1"
+
+    with mock.patch.object(queue, "heartbeat", wraps=queue.heartbeat) as heartbeat:
+        process_job(job, queue, SlowAgent(0.3, {"Day 1": ["Fort"]}), db_client, "worker-a",
+                    heartbeat_interval=0.05)
+    assert heartbeat.call_count >= 3
+    heartbeat.assert_called_with(job_id, "worker-a")
+    assert queue.get(job_id)["status"] == JOB_COMPLETED
+
+
+@pytest.mark.parametrize("plan, status", [({"error": "LLM unavailable"}, JOB_FAILED), ({"Day 1": ["Fort"]}, JOB_COMPLETED)])
+def test_process_job_records_outcome(plan, status):
+    queue = InMemoryJobQueue()
+    job_id = queue.enqueue("Plan a trip to Jaipur")
+    job = queue.claim("worker-a")
+    process_job(job, queue, SlowAgent(0, plan), mock.Mock(), "worker-a")
+    assert queue.get(job_id)["status"] == status
@@ -0,0 +1,87 @@
+import pytest
+
+from agent.plan_parsing import PARSE_OK, PARSE_REPAIRED, json_objects, parse_plan_text, validate_plan
+
+PLAN = {"Day 1": ["Amber Fort", "Lunch at LMB"], "Day 2": ["City Palace"]}
+
+
+def test_plain_json_object():
+    assert parse_plan_text('{"Day 1": ["Amber Fort", "Lunch at LMB"], "Day 2": ["City Palace"]}') == (PLAN, PARSE_OK)
+
+
+@pytest.mark.parametrize("wrapper", ["plan", "Itinerary", "days", "schedule"])
+def test_single_wrapper_key_is_unwrapped(wrapper):
+    text = f'{{"{wrapper}": {{"Day 1": ["Amber Fort", "Lunch at LMB"], "Day 2": ["City Palace"]}}}}'
+    assert parse_plan_text(text) == (PLAN, PARSE_OK)
+
+
+def test_list_of_day_objects():
+    text = '{"itinerary": [{"day": 1, "activities": ["Amber Fort", "Lunch at LMB"]}, ' \
+           '{"day": "Day 2", "activities": ["City Palace"]}]}'
+    assert parse_plan_text(text) == (PLAN, PARSE_OK)
+
+
+def test_code_fence():
+    text = '```json\n{\n  "Day 1": ["Amber Fort", "Lunch at LMB"],\n  "Day 2": ["City Palace"]\n}\n```'
+    assert parse_plan_text(text) == (PLAN, PARSE_OK)
+
+
+def test_prose_with_braces_around_the_plan():
+    text = 'Here is your plan {as promised}: {"Day 1": ["Amber Fort", "Lunch at LMB"], ' \
+           '"Day 2": ["City Palace"]} Enjoy {the trip}!'
+    assert parse_plan_text(text) == (PLAN, PARSE_OK)
+
+
+def test_braces_inside_strings_do_not_split_the_object():
+    text = '{"Day 1": ["Visit {the} fort"], "Day 2": ["Dinner }"]}'
+    assert parse_plan_text(text) == ({"Day 1": ["Visit {the} fort"], "Day 2": ["Dinner }"]}, PARSE_OK)
+
+
+def test_truncated_answer_is_closed():
+    text = 'Final Answer: {"Day 1": ["Amber Fort", "Lunch at LMB"], "Day 2": ["City Pal'
+    assert parse_plan_text(text) == ({"Day 1": ["Amber Fort", "Lunch at LMB"], "Day 2": ["City Pal"]}, PARSE_REPAIRED)
+
+
+def test_trailing_commas_and_missing_commas():
+    text = '{\n"Day 1": ["Amber Fort", "Lunch at LMB",]\n"Day 2": ["City Palace"],\n}'
+    assert parse_plan_text(text) == (PLAN, PARSE_REPAIRED)
+
+
+def test_python_dict_repr():
+    assert parse_plan_text("{'Day 1': ['Amber Fort', 'Lunch at LMB'], 'Day 2': ['City Palace']}") == (PLAN, PARSE_REPAIRED)
+
+
+def test_non_string_keys_become_day_names():
+    assert parse_plan_text('Final: {1: ["a"], 2: ["b"]}') == ({"Day 1": ["a"], "Day 2": ["b"]}, PARSE_REPAIRED)
+    assert parse_plan_text("{(1, 2): ['a']}") == ({"(1, 2)": ["a"]}, PARSE_REPAIRED)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "Just enjoy Jaipur!",
+    "no plan {here}",
+    "{[1]: 2}",
+    '{"Day 1": 5}',
+    "{}",
+    '{"plan": []}',
+    "{" * 5000,
+])
+def test_unusable_answers_fail_without_raising(text):
+    assert parse_plan_text(text) == (None, None)
+
+
+def test_non_string_input():
+    assert parse_plan_text(None) == (None, None)
+
+
+def test_validate_plan_rejects_non_plans():
+    assert validate_plan([1, 2]) is None
+    assert validate_plan({"Day 1": [1, 2]}) is None
+    assert validate_plan("Day 1") is None
+    assert validate_plan({"Day 1": {"Morning": "Fort"}}) == {"Day 1": {"Morning": "Fort"}}
+
+
+def test_json_objects_longest_first_and_unclosed_tail():
+    assert json_objects('{"a": 1} and {"bb": {"c": 2}} then {"open": ') == [
+        '{"bb": {"c": 2}}', '{"open": ', '{"a": 1}'
+    ]
@@ -0,0 +1,121 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from utils.rate_limit import AdaptiveLimiter, TokenBucket
+
+
+class FakeClock:
+    """Stand-in for ``time.monotonic`` whose ``sleep`` advances it instead of waiting"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    clock = FakeClock()
+    with mock.patch("utils.rate_limit.time.monotonic", clock), mock.patch("utils.rate_limit.time.sleep", clock.sleep):
+        yield clock
+
+
+def test_burst_of_429s_halves_the_limit_once(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=8)
+    burst = [limiter.acquire() for _ in range(4)]
+    clock.now += 1
+    for admitted in burst:
+        limiter.release(admitted, latency=1.0, throttled=True)
+    assert limiter.limit == 4.0
+    assert limiter.metrics()["limit_decreases"] == 1 and limiter.metrics()["throttled"] == 4
+
+    # A call admitted after the decrease was sent under the new limit, so its 429 counts
+    admitted = limiter.acquire()
+    clock.now += 1
+    limiter.release(admitted, latency=1.0, throttled=True)
+    assert limiter.limit == 2.0
+
+
+def test_limit_never_drops_below_min_concurrency(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=4, min_concurrency=3)
+    for _ in range(3):
+        admitted = limiter.acquire()
+        clock.now += 1
+        limiter.release(admitted, latency=1.0, throttled=True)
+    assert limiter.limit == 3.0
+
+
+def test_limit_grows_by_one_over_a_limits_worth_of_successes(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=8)
+    limiter.limit = 4.0
+    for _ in range(4):
+        limiter.release(limiter.acquire(), latency=0.1)
+    expected = 4.0
+    for _ in range(4):
+        expected += 1 / expected
+    assert limiter.limit == pytest.approx(expected)
+    assert 4.9 < limiter.limit < 5.0
+    # Growth stops at max_concurrency
+    limiter.limit = 7.9
+    limiter.release(limiter.acquire(), latency=0.1)
+    assert limiter.limit == 8.0
+
+
+def test_slow_calls_shrink_the_limit(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=8, latency_target=2.0)
+    admitted = limiter.acquire()
+    clock.now += 1
+    limiter.release(admitted, latency=2.5)
+    assert limiter.limit == 4.0 and limiter.metrics()["slow"] == 1
+
+
+def test_failed_calls_leave_the_limit_unchanged(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=8, latency_target=1.0)
+    limiter.limit = 4.0
+    limiter.release(limiter.acquire(), latency=None)
+    assert limiter.limit == 4.0
+    assert limiter.in_flight == 0 and limiter.metrics()["requests"] == 1
+
+
+def test_acquire_returns_none_after_queue_timeout(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=1, queue_timeout=0)
+    assert limiter.acquire() is not None
+    assert limiter.acquire() is None
+    assert asyncio.run(limiter.aacquire()) is None
+    assert limiter.metrics()["queue_timeouts"] == 2
+    assert limiter.in_flight == 1 and limiter.metrics()["waiting"] == 0
+
+
+def test_retry_after_pauses_admission(clock):
+    limiter = AdaptiveLimiter("test", max_concurrency=4)
+    admitted = limiter.acquire()
+    limiter.release(admitted, latency=0.5, throttled=True, retry_after=10)
+    clock.now += 9.9
+    assert limiter.acquire(timeout=0) is None
+    clock.now += 0.1
+    assert limiter.acquire(timeout=0) is not None
+
+
+def test_token_bucket_waiting_for_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    assert bucket.acquire() and bucket.acquire()
+    start = clock.now
+    assert bucket.acquire()
+    assert clock.now - start == pytest.approx(0.5)
+    # A token is 0.5 s away, so a shorter timeout gives up without taking one
+    assert not bucket.acquire(timeout=0.1)
+    clock.now += 0.5
+    assert bucket.acquire(timeout=0)
+
+
+def test_token_held_slot_is_returned_when_bucket_times_out(clock):
+    limiter = AdaptiveLimiter("test", rate=1, max_concurrency=4, queue_timeout=0.1)
+    assert limiter.acquire() is not None
+    assert limiter.acquire() is None
+    assert limiter.in_flight == 1 and limiter.metrics()["queue_timeouts"] == 1
@@ -0,0 +1,142 @@
+import pytest
+
+from agent.streaming import FinalAnswerStreamHandler, IncrementalPlanParser
+from agent.task_agent import TaskPlanningAgent
+
+ANSWER = '{"Day 1": ["Amber Fort", "Lunch, then {rest}"], "Day 2": {"Morning": "City Palace"}, "Day 3": "Free day"}'
+DAYS = [
+    ("Day 1", ["Amber Fort", "Lunch, then {rest}"]),
+    ("Day 2", {"Morning": "City Palace"}),
+    ("Day 3", "Free day"),
+]
+
+
+def feed_in_chunks(text, size):
+    parser = IncrementalPlanParser()
+    members = []
+    for start in range(0, len(text), size):
+        members.extend(parser.feed(text[start:start + size]))
+    return parser, members
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, len(ANSWER)])
+def test_members_survive_any_chunking(size):
+    parser, members = feed_in_chunks(ANSWER, size)
+    assert members == DAYS
+    assert parser.finished
+
+
+def test_list_and_dict_days_are_emitted_when_they_close():
+    parser = IncrementalPlanParser()
+    assert parser.feed('{"Day 1": ["Amber Fort"') == []
+    assert parser.feed('], "Day 2": {"Morning": "Palace"') == [("Day 1", ["Amber Fort"])]
+    assert parser.feed('}') == [("Day 2", {"Morning": "Palace"})]
+
+
+def test_scalar_days_wait_for_the_next_separator():
+    parser = IncrementalPlanParser()
+    assert parser.feed('{"Day 1": "Free day"') == []
+    assert parser.feed(', "Day 2": "Rest"') == [("Day 1", "Free day")]
+    assert parser.feed('}') == [("Day 2", "Rest")]
+
+
+def test_code_fence_before_the_object_is_ignored():
+    _, members = feed_in_chunks('```json\n{"Day 1": ["Fort"], "Day 2": ["Palace"]}\n```', 5)
+    assert members == [("Day 1", ["Fort"]), ("Day 2", ["Palace"])]
+
+
+def test_braces_in_prose_end_the_stream_early():
+    # The full parse of the finished answer still recovers these days
+    parser, members = feed_in_chunks('Here is the plan {as promised}:\n{"Day 1": ["Fort"]}', 4)
+    assert members == [] and parser.finished
+
+
+def test_prose_without_braces_before_the_object():
+    _, members = feed_in_chunks('Sure! Here it is: {"Day 1": ["Fort"]} Enjoy.', 3)
+    assert members == [("Day 1", ["Fort"])]
+
+
+def test_text_after_the_object_is_ignored():
+    parser = IncrementalPlanParser()
+    assert parser.feed('{"Day 1": ["Fort"]} {"Day 9": ["x"]}') == [("Day 1", ["Fort"])]
+    assert parser.feed('{"Day 10": ["y"]}') == []
+
+
+def test_malformed_members_are_skipped():
+    _, members = feed_in_chunks('{"Day 1": [Fort], "Day 2": ["Palace"]}', 6)
+    assert members == [("Day 2", ["Palace"])]
+
+
+@pytest.mark.parametrize("size", [1, 4, 200])
+def test_wrapped_plan_streams_its_days(size):
+    _, members = feed_in_chunks('{"Plan": {"Day 1": ["Fort"], "Day 2": "Rest"}}', size)
+    assert members == [("Day 1", ["Fort"]), ("Day 2", "Rest")]
+
+
+def test_wrapper_key_is_only_unwrapped_as_the_first_member():
+    _, members = feed_in_chunks('{"Day 1": ["Fort"], "plan": {"Morning": "Palace"}}', 3)
+    assert members == [("Day 1", ["Fort"]), ("plan", {"Morning": "Palace"})]
+
+
+def test_list_of_day_objects_is_not_streamed():
+    parser, members = feed_in_chunks('[{"day": "Day 1", "activities": ["Fort"]}]', 3)
+    assert members == [] and parser.finished
+
+
+def stream(tokens):
+    received = []
+    handler = FinalAnswerStreamHandler(received.append)
+    handler.on_chat_model_start({}, [[]])
+    for token in tokens:
+        handler.on_llm_new_token(token)
+    return "".join(received)
+
+
+def test_only_text_after_the_final_answer_marker_is_forwarded():
+    tokens = ["Thought: I know", " the answer.\n", "Final Answer: ", '{"Day 1"', ': ["Fort"]}']
+    assert stream(tokens) == ' {"Day 1": ["Fort"]}'
+
+
+def test_marker_split_across_tokens():
+    tokens = ["Thought: done\nFin", "al Ans", "wer:", ' {"Day 1"', ': ["Fort"]}']
+    assert stream(tokens) == ' {"Day 1": ["Fort"]}'
+
+
+def test_intermediate_steps_are_swallowed_and_each_call_starts_fresh():
+    received = []
+    handler = FinalAnswerStreamHandler(received.append)
+    handler.on_llm_start({}, ["prompt"])
+    for token in ["Action: Weather\n", "Action Input: Jaipur"]:
+        handler.on_llm_new_token(token)
+    assert received == []
+    handler.on_llm_start({}, ["prompt"])
+    handler.on_llm_new_token("Final Answer: done")
+    assert received == [" done"]
+
+
+def streamed_events(answer, chunk_size=5):
+    """Run ``stream_plan`` on an agent whose LLM writes ``answer`` in chunks"""
+    agent = TaskPlanningAgent.__new__(TaskPlanningAgent)
+    agent.json_fix_retry = False
+
+    def invoke(goal, prefetch=None, callbacks=None, tracer=None):
+        handler = callbacks[0]
+        handler.on_llm_start({}, ["prompt"])
+        text = "Thought: I have everything.\nFinal Answer: " + answer
+        for start in range(0, len(text), chunk_size):
+            handler.on_llm_new_token(text[start:start + chunk_size])
+        return answer
+
+    agent._invoke_agent = invoke
+    events = list(agent.stream_plan("Plan a trip to Jaipur"))
+    return [payload for event, payload in events if event == "day"], events[-1][1]
+
+
+@pytest.mark.parametrize("answer", [
+    '{"plan": {"Day 1": ["Fort"], "Day 2": ["Palace"]}}',
+    '{"itinerary": [{"day": "Day 1", "activities": ["Fort"]}, {"day": "Day 2", "activities": ["Palace"]}]}',
+])
+def test_stream_plan_yields_each_day_of_a_wrapped_answer_once(answer):
+    days, plan = streamed_events(answer)
+    assert plan == {"Day 1": ["Fort"], "Day 2": ["Palace"]}
+    assert days == [("Day 1", ["Fort"]), ("Day 2", ["Palace"])]
@@ -0,0 +1,34 @@
+import pytest
+
+from agent.task_agent import TaskPlanningAgent
+
+
+@pytest.fixture
+def agent():
+    # The goal and tool-input helpers need no LLM or tools
+    return TaskPlanningAgent.__new__(TaskPlanningAgent)
+
+
+@pytest.mark.parametrize("goal, destinations", [
+    ("Plan a 3-day trip to Jaipur and Udaipur with cultural highlights", ["jaipur", "udaipur"]),
+    ("Plan a trip in December to Goa", ["goa"]),
+    ("A weekend in Paris on Saturday", ["paris"]),
+    ("A week at Lake Tahoe in May", ["lake tahoe"]),
+    ("plan a trip to goa with beaches", ["goa"]),
+    ("Plan a trip in December", []),
+])
+def test_extract_destinations(agent, goal, destinations):
+    assert agent._extract_destinations(goal) == destinations
+
+
+@pytest.mark.parametrize("location_input, locations", [
+    ("Jaipur; Udaipur", ["jaipur", "udaipur"]),
+    ('["Jaipur", "Udaipur", "Jaipur"]', ["jaipur", "udaipur"]),
+    (["Paris", "Lyon"], ["paris", "lyon"]),
+    ("weather in Jaipur", ["jaipur"]),
+    ("Bosnia and Herzegovina", ["bosnia and herzegovina"]),
+    ("Trinidad and Tobago; Barbados", ["trinidad and tobago", "barbados"]),
+    ("Sarajevo, Bosnia and Herzegovina", ["sarajevo, bosnia and herzegovina"]),
+])
+def test_extract_locations(agent, location_input, locations):
+    assert agent._extract_locations(location_input) == locations
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+
+from utils.cache import ResultCache
+from utils.tools import WeatherTool, WebSearchTool
+
+
+def http_returning(body):
+    """Stand-in transports whose GET answers 200 with ``body``"""
+    response = mock.Mock(status_code=200)
+    response.json.return_value = body
+    http = mock.Mock()
+    http.get.return_value = response
+    ahttp = mock.Mock()
+    ahttp.get = mock.AsyncMock(return_value=response)
+    return http, ahttp
+
+
+def search_tool(monkeypatch, body, provider="serpapi"):
+    if provider == "serpapi":
+        monkeypatch.setenv("SERPAPI_KEY", "test")
+    else:
+        monkeypatch.delenv("SERPAPI_KEY", raising=False)
+        monkeypatch.setenv("GOOGLE_API_KEY", "test")
+        monkeypatch.setenv("GOOGLE_CSE_ID", "test")
+    http, ahttp = http_returning(body)
+    return WebSearchTool(cache=ResultCache("web_search", db_path=None), http=http, ahttp=ahttp)
+
+
+def weather_tool(monkeypatch, body):
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+    http, ahttp = http_returning(body)
+    return WeatherTool(cache=ResultCache("weather", db_path=None), http=http, ahttp=ahttp)
+
+
+@pytest.mark.parametrize("provider", ["serpapi", "google"])
+@pytest.mark.parametrize("body", [["not", "an", "object"], {"organic_results": [1, 2], "items": [1, 2]}])
+def test_search_returns_error_for_malformed_body(monkeypatch, provider, body):
+    tool = search_tool(monkeypatch, body, provider)
+    assert "unexpected API response" in tool.search("forts in jaipur")["error"]
+    assert "unexpected API response" in asyncio.run(tool.asearch("forts in jaipur"))["error"]
+    # Failures are not cached
+    assert tool.cache.stats()["memory_entries"] == 0
+
+
+def test_search_parses_results(monkeypatch):
+    body = {"organic_results": [{"title": "Amber Fort", "snippet": "Hilltop fort", "link": "https://a", "x": 1}]}
+    tool = search_tool(monkeypatch, body)
+    assert tool.search("forts in jaipur") == [{"title": "Amber Fort", "snippet": "Hilltop fort", "link": "https://a"}]
+
+
+def test_weather_returns_error_for_malformed_body(monkeypatch):
+    tool = weather_tool(monkeypatch, {"cod": 200, "name": "Jaipur", "weather": []})
+    assert "unexpected API response" in tool.get_weather("Jaipur")["error"]
+    assert "unexpected API response" in asyncio.run(tool.aget_weather("Jaipur"))["error"]
+
+
+def test_forecast_returns_error_for_entry_without_timestamp(monkeypatch):
+    body = {"cod": "200", "city": {"id": 1, "name": "Jaipur", "timezone": 0}, "list": [{"main": {"temp": 20}}]}
+    tool = weather_tool(monkeypatch, body)
+    assert "unexpected API response" in tool.get_forecast("Jaipur", 2)["error"]
+    assert "unexpected API response" in asyncio.run(tool.aget_forecast("Jaipur", 2))["error"]
+
+
+def test_forecast_parses_days(monkeypatch):
+    now = int(time.time())
+    body = {"cod": "200", "city": {"id": 1, "name": "Jaipur", "country": "IN", "timezone": 0},
+            "list": [{"dt": now, "main": {"temp": 20, "humidity": 50}, "weather": [{"description": "clear"}]}]}
+    tool = weather_tool(monkeypatch, body)
+    result = tool.get_forecast("Jaipur", 1)
+    assert result["city_id"] == 1
+    assert result["forecast"][0]["temp_max"] == 20 and result["forecast"][0]["description"] == "clear"
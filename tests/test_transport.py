@@ -0,0 +1,100 @@
+import asyncio
+import socket
+import time
+from unittest import mock
+
+import httpx
+import pytest
+import requests
+
+from benchmarks.fakes import StubServer
+from utils.transport import AsyncHTTPTransport, HTTPTransport
+
+
+def ok(params):
+    return {"ok": True}
+
+
+def fast_transport(cls=HTTPTransport, **kwargs):
+    return cls(**{"max_retries": 3, "backoff_base": 0.001, "backoff_max": 0.05, **kwargs})
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/search"
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retries_transient_statuses(status):
+    with StubServer(ok, statuses=[status, status]) as stub:
+        response = fast_transport().get(f"{stub.url}/search")
+    assert response.status_code == 200 and response.json() == {"ok": True}
+    assert stub.requests == 3
+
+
+def test_returns_last_response_once_retries_are_exhausted():
+    with StubServer(ok, statuses=[503] * 5) as stub:
+        response = fast_transport(max_retries=2).get(f"{stub.url}/search")
+    assert response.status_code == 503
+    assert stub.requests == 3
+
+
+def test_client_errors_are_not_retried():
+    with StubServer({}) as stub:
+        response = fast_transport().get(f"{stub.url}/missing")
+    assert response.status_code == 404
+    assert stub.requests == 1
+
+
+def test_retry_after_is_capped_at_backoff_max():
+    with StubServer(ok, statuses=[429], retry_after=30) as stub:
+        start = time.perf_counter()
+        response = fast_transport(backoff_max=0.1).get(f"{stub.url}/search")
+        elapsed = time.perf_counter() - start
+    assert response.status_code == 200
+    assert 0.1 <= elapsed < 5
+
+
+def test_retry_after_is_honored_below_backoff_max():
+    with StubServer(ok, statuses=[429], retry_after=1) as stub, \
+            mock.patch("utils.transport.time.sleep") as sleep:
+        fast_transport(backoff_max=10).get(f"{stub.url}/search")
+    sleep.assert_called_once_with(1.0)
+
+
+def test_connection_errors_raise_after_max_retries():
+    transport = fast_transport(max_retries=2)
+    with mock.patch("utils.transport.time.sleep") as sleep, pytest.raises(requests.exceptions.ConnectionError):
+        transport.get(closed_port_url())
+    assert sleep.call_count == 2
+
+
+def test_one_session_per_host():
+    transport = fast_transport()
+    with StubServer(ok) as first, StubServer(ok) as second:
+        transport.get(f"{first.url}/search")
+        session = transport._session_for(f"{first.url}/other")
+        transport.get(f"{first.url}/other")
+        transport.get(f"{second.url}/search")
+    assert transport._session_for(f"{first.url}/search") is session
+    assert len(transport._sessions) == 2
+    transport.close()
+    assert transport._sessions == {}
+
+
+def test_async_transport_retries_and_exhausts():
+    async def run(url, transport):
+        try:
+            return await transport.get(url)
+        finally:
+            await transport.aclose()
+
+    with StubServer(ok, statuses=[503, 429]) as stub:
+        response = asyncio.run(run(f"{stub.url}/search", fast_transport(AsyncHTTPTransport)))
+    assert response.status_code == 200 and stub.requests == 3
+
+    with mock.patch("utils.transport.asyncio.sleep", new=mock.AsyncMock()) as sleep, pytest.raises(httpx.ConnectError):
+        asyncio.run(run(closed_port_url(), fast_transport(AsyncHTTPTransport, max_retries=2)))
+    assert sleep.await_count == 2
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "tool_cache.sqlite3")
+
+
+def normalize_query(query):
+    """Fold case, whitespace and trailing punctuation so equivalent queries share a key"""
+    text = re.sub(r'\s+', ' ', str(query).strip().lower())
+    return text.strip(' ?!.,;:')
+
+
+class ResultCache:
+    """Two-tier cache for tool results: an in-process LRU in front of an on-disk SQLite store.
+
+    Values must be JSON-serialisable. Entries expire after ``ttl`` seconds; the memory tier
+    holds at most ``max_entries`` items and the disk tier at most ``max_disk_entries``,
+    evicting the least recently used entries first. The disk tier is trimmed when it is
+    opened and then every 100 writes, so in between it can hold up to 100 extra rows.
+    """
+
+    def __init__(self, namespace, ttl=3600, max_entries=1024, db_path=DEFAULT_CACHE_PATH,
+                 max_disk_entries=50000):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_evict = 0
+
+        if db_path:
+            try:
+                self._conn = self._open_disk_store(db_path)
+                # Another process, or a larger max_disk_entries, may have left it over the limit
+                self._evict_disk(time.time())
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Could not open tool cache at {db_path}, using memory only: {e}")
+                self._conn = None
+
+        logger.info(f"ResultCache '{namespace}' initialized (ttl={ttl}s, disk={'on' if self._conn else 'off'})")
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a stable cache key from normalized key parts"""
+        raw = "\x1f".join(normalize_query(part) for part in parts)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _open_disk_store(self, db_path):
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_cache ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_cache_accessed ON tool_cache (namespace, accessed_at)")
+        conn.commit()
+        return conn
+
+    def get(self, key):
+        """Return the cached value for ``key`` or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, payload = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return json.loads(payload)
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT value, expires_at FROM tool_cache WHERE namespace = ? AND key = ?",
+                        (self.namespace, key)
+                    ).fetchone()
+                    if row is not None and row[1] > now:
+                        self._conn.execute(
+                            "UPDATE tool_cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                            (now, self.namespace, key)
+                        )
+                        self._conn.commit()
+                        self._remember(key, row[1], row[0])
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return json.loads(row[0])
+                except sqlite3.Error as e:
+                    logger.error(f"Tool cache read failed: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value, ttl=None):
+        """Store ``value`` under ``key`` in both tiers"""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        payload = json.dumps(value)
+
+        with self._lock:
+            self._remember(key, expires_at, payload)
+
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO tool_cache (namespace, key, value, expires_at, accessed_at)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (self.namespace, key, payload, expires_at, now)
+                    )
+                    self._writes_since_evict += 1
+                    if self._writes_since_evict >= 100:
+                        self._evict_disk(now)
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    logger.error(f"Tool cache write failed: {e}")
+
+    def _remember(self, key, expires_at, payload):
+        self._memory[key] = (expires_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired rows, then trim the least recently used rows over the size limit"""
+        self._writes_since_evict = 0
+        self._conn.execute(
+            "DELETE FROM tool_cache WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, now)
+        )
+        self._conn.execute(
+            "DELETE FROM tool_cache WHERE namespace = ? AND key IN ("
+            " SELECT key FROM tool_cache WHERE namespace = ?"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_disk_entries)
+        )
+
+    def clear(self):
+        """Remove every entry in this namespace from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_cache WHERE namespace = ?", (self.namespace,))
+                self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters for this cache"""
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory)
+        }
@@ -0,0 +1,23 @@
+from contextvars import ContextVar
+
+# Stats for the tool call running in the current context, if anyone is tracing it
+_current_stats = ContextVar("tool_call_stats", default=None)
+
+
+def begin_call():
+    """Start collecting stats for a tool call in the current context and return them"""
+    stats = {"cache_hit": False, "retries": 0}
+    _current_stats.set(stats)
+    return stats
+
+
+def record_cache_hit():
+    stats = _current_stats.get()
+    if stats is not None:
+        stats["cache_hit"] = True
+
+
+def record_retry():
+    stats = _current_stats.get()
+    if stats is not None:
+        stats["retries"] += 1
@@ -1,40 +1,149 @@
 import pymongo
-from pymongo import MongoClient
-from datetime import datetime
+from pymongo import DeleteOne, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import OperationFailure
+from datetime import datetime, timedelta
+import gzip
+import json
+from itertools import islice
 import os
+import threading
 from dotenv import load_dotenv
 import logging
-from typing import List, Dict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 from bson.objectid import ObjectId
+from utils.plan_format import plan_markdown
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Fields needed to list plans without loading their full content
+PLAN_SUMMARY_PROJECTION = {"goal": 1, "timestamp": 1, "status": 1}
+# Summary plus the pre-rendered plan, for listing pages that show plans inline
+PLAN_PREVIEW_PROJECTION = {**PLAN_SUMMARY_PROJECTION, "markdown": 1}
+
+def flatten_plan_text(plan) -> str:
+    """Collect every day name and activity in a plan into one searchable string"""
+    parts = []
+    stack = [plan]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                parts.append(str(key))
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif value is not None:
+            parts.append(str(value))
+    return " ".join(parts)
+
+def trim_workflow_history(history) -> List[Dict]:
+    """Drop the recorded tool observations from a trace, keeping its timings and counts"""
+    return [{key: value for key, value in step.items() if key != "observation"} for step in history or []]
+
+def _json_default(value):
+    """Serialize the BSON values plan documents contain (dates, ObjectIds)"""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
 class MongoDBClient:
-    def __init__(self, mongo_uri, db_name, collection_name):
+    def __init__(self, mongo_uri, db_name, collection_name, check_in_background: bool = False):
+        """Connect to ``collection_name`` and prepare its indexes.
+        
+        By default the connection is checked before returning and a failure raises.
+        With ``check_in_background`` the check and index creation run on a thread so
+        construction never blocks; see ``ready`` and ``connection_error``.
+        """
         # 1. Correctly initializes a single client and collection using the arguments
-        self.client = MongoClient(mongo_uri)
+        # connect=False defers opening sockets until the first operation
+        self.client = MongoClient(mongo_uri, connect=False)
         self.db = self.client[db_name]
         self.collection = self.db[collection_name]
         
+        self.ready = threading.Event()
+        self.connection_error: Optional[Exception] = None
+        self._check_in_background = check_in_background
+        self._on_connect: List[Callable[[], None]] = []
+        self._on_connect_lock = threading.Lock()
+        if check_in_background:
+            threading.Thread(target=self._check_connection, name="mongo-connection-check", daemon=True).start()
+        else:
+            self._check_connection()
+            if self.connection_error is not None:
+                raise self.connection_error
+    
+    def _check_connection(self):
         # This part ensures that the database connection is actually working
         try:
             self.client.admin.command('ping')
             logger.info("MongoDB connection established successfully.")
+            self._create_indexes()
         except Exception as e:
             logger.error(f"MongoDB connection failed: {e}")
-            raise
+            self.connection_error = e
+        finally:
+            with self._on_connect_lock:
+                callbacks, self._on_connect = self._on_connect, []
+                self.ready.set()
+        if self.connection_error is None:
+            for callback in callbacks:
+                self._run_on_connect(callback)
+    
+    def when_connected(self, callback: Callable[[], None]):
+        """Run ``callback`` (e.g. another collection's index setup) once the connection check passes.
+        
+        With a background check the callback runs off the caller's thread, so it never
+        delays a page render; it is skipped if the database could not be reached.
+        """
+        with self._on_connect_lock:
+            if not self.ready.is_set():
+                self._on_connect.append(callback)
+                return
+        if self.connection_error is not None:
+            return
+        if self._check_in_background:
+            threading.Thread(target=self._run_on_connect, args=(callback,), daemon=True).start()
+        else:
+            self._run_on_connect(callback)
+    
+    def _run_on_connect(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"MongoDB setup step {getattr(callback, '__qualname__', callback)} failed: {e}")
+    
+    def _create_indexes(self):
+        # Supports the newest-first keyset pagination in list_plans
+        self.collection.create_index([("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+        
+        # Full-text search over goals and plan content, goal matches ranked higher
+        try:
+            self.collection.create_index(
+                [("goal", pymongo.TEXT), ("search_text", pymongo.TEXT)],
+                weights={"goal": 5, "search_text": 1},
+                name="plan_text_search"
+            )
+        except OperationFailure as e:
+            logger.warning(f"Could not create plan text index, search will be unavailable: {e}")
 
-    def save_plan(self, goal: str, plan: Dict, workflow_history: List[Dict] = None) -> str:
-        logger.info(f"Saving plan to database: {goal[:50]}...")
-        document = {
+    def _plan_document(self, goal: str, plan: Dict, workflow_history: List[Dict] = None) -> Dict:
+        return {
             "goal": goal,
             "plan": plan,
             "workflow_history": workflow_history or [],
+            # Computed once here so search does not need to walk every plan
+            "search_text": flatten_plan_text(plan),
+            # Rendered once here so history pages do not rebuild it on every rerun
+            "markdown": plan_markdown(plan),
             "timestamp": datetime.now(),
-            "status": "completed"
+            "status": "completed",
+            # Bumped by every in-place edit so concurrent edits do not overwrite each other
+            "version": 1
         }
+    
+    def save_plan(self, goal: str, plan: Dict, workflow_history: List[Dict] = None) -> str:
+        logger.info(f"Saving plan to database: {goal[:50]}...")
+        document = self._plan_document(goal, plan, workflow_history)
         try:
             # 2. Saves the document to the correct collection
             result = self.collection.insert_one(document)
@@ -44,11 +153,213 @@ class MongoDBClient:
             logger.error(f"Failed to save plan: {e}")
             raise
     
+    def save_plans(self, entries: List[Dict]) -> List[str]:
+        """Save many plans in one round-trip.
+        
+        Each entry has ``goal``, ``plan`` and optionally ``workflow_history``. Returns the
+        new IDs in the same order.
+        """
+        if not entries:
+            return []
+        documents = [
+            self._plan_document(entry["goal"], entry["plan"], entry.get("workflow_history"))
+            for entry in entries
+        ]
+        try:
+            result = self.collection.insert_many(documents)
+            logger.info(f"Saved {len(result.inserted_ids)} plans in one batch")
+            return [str(inserted_id) for inserted_id in result.inserted_ids]
+        except Exception as e:
+            logger.error(f"Failed to save plan batch: {e}")
+            raise
+    
     def get_all_plans(self):
+        # Loads the whole collection; use iter_plans or export_plans for anything large
         # 3. Retrieves documents from the same collection
         plans = self.collection.find().sort("timestamp", pymongo.DESCENDING)
         return [{**plan, '_id': str(plan['_id'])} for plan in plans]
     
+    def list_plans(self, page_size: int = 20, after: Optional[Tuple[datetime, str]] = None,
+                   projection: Optional[Dict] = None) -> Tuple[List[Dict], Optional[Tuple[datetime, str]]]:
+        """Return one page of plans, newest first, and the cursor for the next page.
+        
+        Pages are sought by (timestamp, _id) rather than skipped, so every page costs the
+        same. ``after`` is the cursor returned for the previous page; the next cursor is
+        None on the last page. Only summary fields are returned unless ``projection`` says otherwise.
+        """
+        query = {}
+        if after is not None:
+            timestamp, last_id = after
+            query = {"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": ObjectId(last_id)}}
+            ]}
+        
+        cursor = (
+            self.collection.find(query, projection or PLAN_SUMMARY_PROJECTION)
+            .sort([("timestamp", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+            .limit(page_size + 1)
+        )
+        plans = [{**plan, '_id': str(plan['_id'])} for plan in cursor]
+        
+        next_cursor = None
+        if len(plans) > page_size:
+            plans = plans[:page_size]
+            next_cursor = (plans[-1]["timestamp"], plans[-1]["_id"])
+        return plans, next_cursor
+    
+    def search_plans(self, query: str, page: int = 0, page_size: int = 20,
+                     projection: Optional[Dict] = None) -> Tuple[List[Dict], bool]:
+        """Full-text search over goals and plan content, best matches first.
+        
+        Returns one page of plan summaries (with their relevance ``score``) and whether
+        another page follows. ``projection`` replaces the summary fields, as in ``list_plans``.
+        """
+        projection = {**(projection or PLAN_SUMMARY_PROJECTION), "score": {"$meta": "textScore"}}
+        cursor = (
+            self.collection.find({"$text": {"$search": query}}, projection)
+            .sort([("score", {"$meta": "textScore"}), ("timestamp", pymongo.DESCENDING)])
+            .skip(page * page_size)
+            .limit(page_size + 1)
+        )
+        plans = [{**plan, '_id': str(plan['_id'])} for plan in cursor]
+        return plans[:page_size], len(plans) > page_size
+    
+    def backfill_search_text(self, batch_size: int = 500) -> int:
+        """Compute ``search_text`` for plans saved before it existed; returns the number updated"""
+        updated = 0
+        batch = []
+        for plan in self.collection.find({"search_text": {"$exists": False}}, {"plan": 1}):
+            batch.append(UpdateOne({"_id": plan["_id"]}, {"$set": {"search_text": flatten_plan_text(plan.get("plan"))}}))
+            if len(batch) >= batch_size:
+                updated += self.collection.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            updated += self.collection.bulk_write(batch, ordered=False).modified_count
+        logger.info(f"Backfilled search text for {updated} plan(s)")
+        return updated
+    
+    def get_workflow_histories(self, limit: int = 500) -> List[List[Dict]]:
+        """Return the ``workflow_history`` traces of the most recent ``limit`` plans"""
+        cursor = (
+            self.collection.find({"workflow_history.0": {"$exists": True}}, {"workflow_history": 1, "_id": 0})
+            .sort("timestamp", pymongo.DESCENDING)
+            .limit(limit)
+        )
+        return [plan["workflow_history"] for plan in cursor]
+
+    def get_plan(self, plan_id: str) -> Optional[Dict]:
+        """Fetch one full plan document by ID"""
+        plan = self.collection.find_one({"_id": ObjectId(plan_id)})
+        if plan is None:
+            return None
+        return {**plan, '_id': str(plan['_id'])}
+    
+    def update_plan_day(self, plan_id: str, day: str, activities, expected_version: Optional[int] = None) -> Optional[int]:
+        """Replace one day of a saved plan in place and bump its ``version``.
+        
+        With ``expected_version`` the update only applies if nobody changed the plan since
+        it was read. Returns the new version, or None if the plan is missing or was changed.
+        The stored markdown and search text are refreshed from the updated plan.
+        """
+        if not day or "." in day or day.startswith("$"):
+            raise ValueError(f"Invalid day name: {day!r}")
+        query = {"_id": ObjectId(plan_id)}
+        if expected_version is not None:
+            # Plans saved before versioning have no version field and count as version 0
+            query["version"] = {"$in": [0, None]} if expected_version == 0 else expected_version
+        
+        updated = self.collection.find_one_and_update(
+            query,
+            {"$set": {f"plan.{day}": activities}, "$inc": {"version": 1}},
+            projection={"plan": 1, "version": 1},
+            return_document=pymongo.ReturnDocument.AFTER
+        )
+        if updated is None:
+            logger.warning(f"Plan {plan_id} not updated: missing or changed since version {expected_version}")
+            return None
+        
+        # Derived fields follow in a second write; the version filter keeps a newer edit's values
+        self.collection.update_one(
+            {"_id": updated["_id"], "version": updated["version"]},
+            {"$set": {"markdown": plan_markdown(updated["plan"]), "search_text": flatten_plan_text(updated["plan"])}}
+        )
+        logger.info(f"Updated {day} of plan {plan_id} (version {updated['version']})")
+        return updated["version"]
+    
+    def iter_plans(self, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+                   after_id: Optional[str] = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream plans in ``_id`` order without loading the collection into memory.
+        
+        The driver fetches ``batch_size`` documents per round trip. ``after_id`` continues
+        after the last plan an earlier pass saw.
+        """
+        query = dict(query or {})
+        if after_id is not None:
+            query["_id"] = {"$gt": ObjectId(after_id)}
+        cursor = self.collection.find(query, projection).sort("_id", pymongo.ASCENDING).batch_size(batch_size)
+        for plan in cursor:
+            yield {**plan, '_id': str(plan['_id'])}
+    
+    def export_plans(self, path: str, projection: Optional[Dict] = None, after_id: Optional[str] = None,
+                     batch_size: int = 1000, on_batch: Optional[Callable[[str, int], None]] = None) -> Tuple[int, Optional[str]]:
+        """Write plans to ``path`` as JSON Lines, gzip-compressed when it ends in ``.gz``.
+        
+        Lines are written and flushed one batch at a time, so memory use does not grow
+        with the collection. With ``after_id`` the file is appended to, continuing an
+        interrupted export; ``on_batch(last_id, exported)`` runs after every flushed batch
+        so the caller can checkpoint. Returns the number of plans written and the last ``_id``.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        plans = self.iter_plans(projection=projection, after_id=after_id, batch_size=batch_size)
+        exported = 0
+        last_id = after_id
+        with opener(path, "at" if after_id else "wt", encoding="utf-8") as f:
+            while True:
+                batch = list(islice(plans, batch_size))
+                if not batch:
+                    break
+                for plan in batch:
+                    f.write(json.dumps(plan, default=_json_default, ensure_ascii=False) + "\n")
+                f.flush()
+                exported += len(batch)
+                last_id = batch[-1]['_id']
+                if on_batch is not None:
+                    on_batch(last_id, exported)
+        logger.info(f"Exported {exported} plan(s) to {path}")
+        return exported, last_id
+    
+    def archive_plans(self, older_than_days: float, archive_collection: Optional[str] = None,
+                      batch_size: int = 500, trim_history: bool = True) -> int:
+        """Move plans older than ``older_than_days`` into an archive collection.
+        
+        Each batch is copied with one ``bulk_write`` and only then deleted from the live
+        collection; copies are upserts, so an interrupted run can simply be started again.
+        Archived copies drop ``search_text`` and, unless ``trim_history`` is False, the
+        tool observations in ``workflow_history``. Returns the number of plans moved.
+        """
+        archive = self.db[archive_collection or f"{self.collection.name}_archive"]
+        cutoff = datetime.now() - timedelta(days=older_than_days)
+        cursor = (
+            self.collection.find({"timestamp": {"$lt": cutoff}}, {"search_text": 0})
+            .sort("_id", pymongo.ASCENDING)
+            .batch_size(batch_size)
+        )
+        moved = 0
+        while True:
+            batch = list(islice(cursor, batch_size))
+            if not batch:
+                break
+            if trim_history:
+                for plan in batch:
+                    plan["workflow_history"] = trim_workflow_history(plan.get("workflow_history"))
+            archive.bulk_write([ReplaceOne({"_id": plan["_id"]}, plan, upsert=True) for plan in batch], ordered=False)
+            moved += self.collection.bulk_write(
+                [DeleteOne({"_id": plan["_id"]}) for plan in batch], ordered=False
+            ).deleted_count
+        logger.info(f"Archived {moved} plan(s) older than {older_than_days} day(s) to {archive.name}")
+        return moved
+    
     def delete_plan(self, plan_id):
         try:
             result = self.collection.delete_one({"_id": ObjectId(plan_id)})
@@ -0,0 +1,192 @@
+import copy
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import pymongo
+from pymongo import ReturnDocument
+from bson.objectid import ObjectId
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+def _new_job(goal: str, options: Optional[Dict]) -> Dict:
+    return {
+        "goal": goal,
+        "options": options or {},
+        "status": JOB_QUEUED,
+        "progress": 0,
+        "message": "Waiting for a worker",
+        "plan_id": None,
+        "error": None,
+        "attempts": 0,
+        "worker": None,
+        "created_at": datetime.now(),
+        "started_at": None,
+        "heartbeat_at": None,
+        "finished_at": None
+    }
+
+
+class MongoJobQueue:
+    """Plan generation jobs stored in MongoDB and claimed atomically by workers.
+
+    Any number of worker processes, on any host, can share one queue. A job whose
+    worker stops sending heartbeats is put back in the queue by ``requeue_stale``;
+    progress and outcome updates only apply while the reporting worker still owns
+    the job.
+    """
+
+    def __init__(self, db_client, collection_name: str = "plan_jobs", max_attempts: int = 3):
+        self.collection = db_client.db[collection_name]
+        self.max_attempts = max_attempts
+        db_client.when_connected(self._create_indexes)
+
+    def _create_indexes(self):
+        self.collection.create_index([("status", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)])
+
+    def enqueue(self, goal: str, options: Optional[Dict] = None) -> str:
+        result = self.collection.insert_one(_new_job(goal, options))
+        logger.info(f"Enqueued plan job {result.inserted_id}: {goal[:50]}...")
+        return str(result.inserted_id)
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically take the oldest queued job, or return None if there is none"""
+        now = datetime.now()
+        job = self.collection.find_one_and_update(
+            {"status": JOB_QUEUED},
+            {"$set": {"status": JOB_RUNNING, "worker": worker_id, "started_at": now, "heartbeat_at": now,
+                      "message": "Generating plan"},
+             "$inc": {"attempts": 1}},
+            sort=[("created_at", pymongo.ASCENDING)],
+            return_document=ReturnDocument.AFTER
+        )
+        return {**job, "_id": str(job["_id"])} if job else None
+
+    def _update_owned(self, job_id: str, worker_id: str, fields: Dict) -> bool:
+        """Update a job only while ``worker_id`` still holds it.
+
+        A worker whose job was requeued as stale (and possibly claimed by another
+        worker) must not overwrite the new owner's progress or outcome.
+        """
+        result = self.collection.update_one(
+            {"_id": ObjectId(job_id), "worker": worker_id, "status": JOB_RUNNING}, {"$set": fields}
+        )
+        if not result.matched_count:
+            logger.warning(f"Worker {worker_id} no longer owns plan job {job_id}; update ignored")
+        return bool(result.matched_count)
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        return self._update_owned(job_id, worker_id, {"heartbeat_at": datetime.now()})
+
+    def update_progress(self, job_id: str, worker_id: str, progress: int, message: str) -> bool:
+        return self._update_owned(job_id, worker_id,
+                                  {"progress": progress, "message": message, "heartbeat_at": datetime.now()})
+
+    def complete(self, job_id: str, worker_id: str, plan_id: str) -> bool:
+        return self._update_owned(job_id, worker_id,
+                                  {"status": JOB_COMPLETED, "progress": 100, "message": "Plan ready",
+                                   "plan_id": plan_id, "finished_at": datetime.now()})
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._update_owned(job_id, worker_id,
+                                  {"status": JOB_FAILED, "message": "Plan generation failed",
+                                   "error": error, "finished_at": datetime.now()})
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self.collection.find_one({"_id": ObjectId(job_id)})
+        return {**job, "_id": str(job["_id"])} if job else None
+
+    def requeue_stale(self, timeout_seconds: float) -> int:
+        """Return jobs whose worker went silent to the queue, failing those out of attempts"""
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
+        stale = {"status": JOB_RUNNING, "heartbeat_at": {"$lt": cutoff}}
+        self.collection.update_many(
+            {**stale, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"status": JOB_FAILED, "error": "Worker stopped responding", "finished_at": datetime.now()}}
+        )
+        result = self.collection.update_many(
+            stale, {"$set": {"status": JOB_QUEUED, "worker": None, "message": "Waiting for a worker"}}
+        )
+        if result.modified_count:
+            logger.warning(f"Requeued {result.modified_count} stale plan job(s)")
+        return result.modified_count
+
+
+class InMemoryJobQueue:
+    """In-process stand-in for ``MongoJobQueue`` with the same interface.
+
+    Only shared between threads, so it suits tests and single-process runs.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, goal: str, options: Optional[Dict] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {**_new_job(goal, options), "_id": job_id}
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        with self._lock:
+            queued = [job for job in self._jobs.values() if job["status"] == JOB_QUEUED]
+            if not queued:
+                return None
+            job = min(queued, key=lambda j: j["created_at"])
+            now = datetime.now()
+            job.update(status=JOB_RUNNING, worker=worker_id, started_at=now, heartbeat_at=now,
+                       message="Generating plan", attempts=job["attempts"] + 1)
+            return copy.deepcopy(job)
+
+    def _update_owned(self, job_id: str, worker_id: str, **fields) -> bool:
+        with self._lock:
+            job = self._jobs[job_id]
+            if job["worker"] != worker_id or job["status"] != JOB_RUNNING:
+                logger.warning(f"Worker {worker_id} no longer owns plan job {job_id}; update ignored")
+                return False
+            job.update(fields)
+            return True
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        return self._update_owned(job_id, worker_id, heartbeat_at=datetime.now())
+
+    def update_progress(self, job_id: str, worker_id: str, progress: int, message: str) -> bool:
+        return self._update_owned(job_id, worker_id, progress=progress, message=message,
+                                  heartbeat_at=datetime.now())
+
+    def complete(self, job_id: str, worker_id: str, plan_id: str) -> bool:
+        return self._update_owned(job_id, worker_id, status=JOB_COMPLETED, progress=100, message="Plan ready",
+                                  plan_id=plan_id, finished_at=datetime.now())
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        return self._update_owned(job_id, worker_id, status=JOB_FAILED, message="Plan generation failed",
+                                  error=error, finished_at=datetime.now())
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def requeue_stale(self, timeout_seconds: float) -> int:
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
+        requeued = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] != JOB_RUNNING or job["heartbeat_at"] >= cutoff:
+                    continue
+                if job["attempts"] >= self.max_attempts:
+                    job.update(status=JOB_FAILED, error="Worker stopped responding", finished_at=datetime.now())
+                else:
+                    job.update(status=JOB_QUEUED, worker=None, message="Waiting for a worker")
+                    requeued += 1
+        return requeued
@@ -0,0 +1,125 @@
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+def canonicalize_goal(goal: str) -> str:
+    """Fold case, whitespace and punctuation so near-identical goals share a cache key"""
+    text = unicodedata.normalize("NFKC", goal).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _Flight:
+    """A plan generation in progress that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PlanCache:
+    """Goal-level plan cache stored in MongoDB, in front of the agent.
+
+    Entries are keyed on the canonicalized goal (unique index) and reused while they
+    are younger than ``max_age_hours``. Concurrent requests for the same goal in this
+    process are coalesced so only one agent run happens.
+    """
+
+    def __init__(self, db_client, collection_name: str = "plan_cache", max_age_hours: Optional[float] = None):
+        self.db_client = db_client
+        self.collection = db_client.db[collection_name]
+        if max_age_hours is None:
+            max_age_hours = float(os.getenv("PLAN_CACHE_MAX_AGE_HOURS", "168"))
+        self.max_age = timedelta(hours=max_age_hours)
+
+        self._in_flight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        # Built once the connection check passes, so a cold start never waits on MongoDB
+        db_client.when_connected(self._create_indexes)
+        logger.info(f"PlanCache initialized (max age {max_age_hours}h)")
+
+    def _create_indexes(self):
+        self.collection.create_index("goal_key", unique=True)
+
+    def lookup(self, goal: str) -> Optional[Dict]:
+        """Return the saved plan document cached for ``goal``, or None.
+
+        Entries only point at a plan, so a plan that was deleted since is a miss and
+        one edited since is returned as it is now.
+        """
+        entry = self.collection.find_one({
+            "goal_key": canonicalize_goal(goal),
+            "timestamp": {"$gte": datetime.now() - self.max_age}
+        })
+        if entry is None or not entry.get("plan_id"):
+            return None
+        return self.db_client.get_plan(entry["plan_id"])
+
+    def store(self, goal: str, plan_id: str):
+        """Record the saved plan ``plan_id`` as the cached answer for ``goal``"""
+        # Entries written before plans were loaded by ID also carried a copy of the plan
+        update = {"$set": {"goal": goal, "plan_id": plan_id, "timestamp": datetime.now()}, "$unset": {"plan": ""}}
+        try:
+            self.collection.update_one({"goal_key": canonicalize_goal(goal)}, update, upsert=True)
+        except DuplicateKeyError:
+            # Another process inserted the same key between our match and insert; update theirs
+            self.collection.update_one({"goal_key": canonicalize_goal(goal)}, update)
+
+    def get_or_generate(self, goal: str, generate: Callable[[str], Tuple[Dict, List[Dict]]],
+                        regenerate: bool = False) -> Dict:
+        """Return ``{"plan", "plan_id", "cached"}`` for ``goal``.
+
+        On a miss (or when ``regenerate`` is set) ``generate(goal)`` runs once and returns
+        ``(plan, workflow_history)``; the plan is saved with ``MongoDBClient.save_plan``
+        and cached. Callers asking for the same
+        goal meanwhile wait for that run instead of starting their own. ``cached`` is
+        True whenever this call did not run the agent itself.
+        """
+        key = canonicalize_goal(goal)
+
+        if not regenerate:
+            saved = self.lookup(goal)
+            if saved is not None:
+                logger.info(f"Plan cache hit for goal: {goal[:50]}")
+                return {"plan": saved["plan"], "plan_id": saved["_id"], "cached": True}
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._in_flight[key] = flight
+
+        if not leader:
+            logger.info(f"Waiting for in-flight generation of goal: {goal[:50]}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return {**flight.result, "cached": True}
+
+        try:
+            plan, workflow_history = generate(goal)
+            plan_id = None
+            if "error" not in plan:
+                plan_id = self.db_client.save_plan(goal, plan, workflow_history)
+                self.store(goal, plan_id)
+            flight.result = {"plan": plan, "plan_id": plan_id}
+            return {**flight.result, "cached": False}
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            flight.done.set()
@@ -0,0 +1,21 @@
+def day_markdown(day, activities) -> str:
+    """Render one day of a structured plan as markdown"""
+    lines = [f"### {day}", ""]
+    if isinstance(activities, list):
+        lines.extend(f"{i}. {activity}" for i, activity in enumerate(activities, 1))
+    elif isinstance(activities, dict):
+        lines.extend(f"- **{time_slot}**: {activity}" for time_slot, activity in activities.items())
+    elif isinstance(activities, str):
+        lines.append(activities)
+    lines.extend(["", "---"])
+    return "\n".join(lines)
+
+
+def plan_markdown(plan) -> str:
+    """Render a whole plan, structured or plain text, as one markdown string"""
+    if isinstance(plan, dict) and "plan" in plan:
+        # Text plans are saved as {"plan": "..."}
+        plan = plan["plan"]
+    if not isinstance(plan, dict):
+        return str(plan) if plan else ""
+    return "\n\n".join(day_markdown(day, activities) for day, activities in plan.items())
@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing ``rate`` requests per second with bursts up to ``burst``"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token if one is available, otherwise return the seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available; False if ``timeout`` seconds pass first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """Async version of ``acquire`` that waits without blocking the event loop"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if wait == 0:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a request waited ``timeout`` seconds without getting a slot for ``provider``"""
+
+    def __init__(self, provider: str, timeout: float):
+        super().__init__(f"{provider} is rate limited; no request slot within {timeout:g}s")
+        self.provider = provider
+        self.timeout = timeout
+
+
+class AdaptiveLimiter:
+    """Process-wide admission control for one provider.
+
+    Requests queue for up to ``queue_timeout`` seconds for a concurrency slot and, when
+    ``rate`` is set, a token bucket token. The concurrency limit adapts AIMD-style: it
+    grows by one per limit's worth of successful calls and is multiplied by
+    ``decrease_factor`` when the provider answers 429 or a call takes longer than
+    ``latency_target``. A 429 with Retry-After also holds back every queued request
+    until that time has passed.
+    """
+
+    def __init__(self, provider: str, rate: Optional[float] = None, max_concurrency: int = 16,
+                 min_concurrency: int = 1, latency_target: Optional[float] = None,
+                 queue_timeout: float = 30.0, decrease_factor: float = 0.5):
+        self.provider = provider
+        self.bucket = TokenBucket(rate) if rate else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_target = latency_target or None
+        self.queue_timeout = queue_timeout
+        self.decrease_factor = decrease_factor
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._waiting = 0
+        self._admitted_count = 0
+        self._requests = 0
+        self._throttled = 0
+        self._slow = 0
+        self._timeouts = 0
+        self._decreases = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def set_rate(self, rate: Optional[float]):
+        self.bucket = TokenBucket(rate) if rate else None
+
+    def set_max_concurrency(self, max_concurrency: int):
+        with self._cond:
+            self.max_concurrency = max(1, max_concurrency)
+            self.min_concurrency = min(self.min_concurrency, self.max_concurrency)
+            self.limit = min(self.limit, self.max_concurrency)
+            self._cond.notify_all()
+
+    def _try_admit(self) -> Optional[float]:
+        """Take a slot if one is free (returns None), otherwise return the seconds to wait"""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.in_flight >= int(self.limit):
+            # Releases notify waiters; the poll interval only matters for async waiters
+            return 0.05
+        self.in_flight += 1
+        return None
+
+    def _admitted(self, queued: float) -> float:
+        admitted = time.monotonic()
+        with self._cond:
+            self._admitted_count += 1
+            self._wait_total += admitted - queued
+            self._wait_max = max(self._wait_max, admitted - queued)
+        return admitted
+
+    def _timed_out(self, holding_slot: bool = False):
+        with self._cond:
+            self._timeouts += 1
+            if holding_slot:
+                self.in_flight -= 1
+                self._cond.notify()
+        logger.warning(f"Request to {self.provider} gave up waiting for a rate limit slot")
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Wait for a slot; returns the admission time to pass to ``release``, or None on timeout"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        queued = time.monotonic()
+        deadline = queued + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while (wait := self._try_admit()) is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._waiting -= 1
+        if wait is not None:
+            self._timed_out()
+            return None
+        # The slot is held while waiting for a token so the bucket never admits more than the limit
+        if self.bucket is not None and not self.bucket.acquire(max(0.0, deadline - time.monotonic())):
+            self._timed_out(holding_slot=True)
+            return None
+        return self._admitted(queued)
+
+    async def aacquire(self, timeout: Optional[float] = None) -> Optional[float]:
+        """Async version of ``acquire`` that waits without blocking the event loop"""
+        timeout = self.queue_timeout if timeout is None else timeout
+        queued = time.monotonic()
+        deadline = queued + timeout
+        with self._cond:
+            self._waiting += 1
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit()
+                if wait is None:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timed_out()
+                    return None
+                await asyncio.sleep(min(wait, remaining))
+        finally:
+            with self._cond:
+                self._waiting -= 1
+        if self.bucket is not None and not await self.bucket.aacquire(max(0.0, deadline - time.monotonic())):
+            self._timed_out(holding_slot=True)
+            return None
+        return self._admitted(queued)
+
+    def release(self, admitted: float, latency: Optional[float] = None, throttled: bool = False,
+                retry_after: Optional[float] = None):
+        """Return a slot and adapt the limit.
+
+        ``latency`` is None for calls that failed without a response, which neither
+        grow nor shrink the limit.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            self._requests += 1
+            now = time.monotonic()
+            slow = self.latency_target is not None and latency is not None and latency > self.latency_target
+            self._throttled += throttled
+            self._slow += slow
+            if throttled and retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+            if throttled or slow:
+                # Calls admitted before the last decrease were sent under the old limit,
+                # so a burst of 429s from them only shrinks the limit once
+                if admitted >= self._last_decrease:
+                    previous = self.limit
+                    self.limit = max(float(self.min_concurrency), self.limit * self.decrease_factor)
+                    self._last_decrease = now
+                    self._decreases += 1
+                    logger.warning(
+                        f"{self.provider} {'throttled' if throttled else 'slow'}; concurrency limit "
+                        f"{previous:.1f} -> {self.limit:.1f}"
+                    )
+            elif latency is not None and self.limit < self.max_concurrency:
+                self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def metrics(self) -> Dict[str, Optional[float]]:
+        """Snapshot of the limiter state and its queueing/throttling counters"""
+        with self._cond:
+            return {
+                "rate": self.bucket.rate if self.bucket else None,
+                "limit": round(self.limit, 1),
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "waiting": self._waiting,
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "slow": self._slow,
+                "limit_decreases": self._decreases,
+                "queue_timeouts": self._timeouts,
+                "avg_queue_wait": round(self._wait_total / self._admitted_count, 3) if self._admitted_count else 0.0,
+                "max_queue_wait": round(self._wait_max, 3),
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 1)
+            }
+
+
+def parse_rate_limits(spec: str) -> Dict[str, float]:
+    """Parse ``"serpapi=5,openai=3"`` into per-provider values (requests per second, slots or seconds)"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        provider, _, rate = item.partition("=")
+        limits[provider.strip().lower()] = float(rate)
+    return limits
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.RLock()
+_env_loaded = False
+_concurrency: Dict[str, int] = {}
+_latency_targets: Dict[str, float] = {}
+
+
+def _load_env_limits():
+    """Apply the RATE_LIMIT* environment variables once per process.
+
+    RATE_LIMITS sets requests per second (``serpapi=5,openweather=10,openai=3``),
+    RATE_LIMIT_CONCURRENCY the most concurrent requests per provider (default
+    RATE_LIMIT_MAX_CONCURRENCY) and RATE_LIMIT_LATENCY the seconds above which a call
+    counts as slow and shrinks the limit.
+    """
+    global _env_loaded
+    with _limiters_lock:
+        if _env_loaded:
+            return
+        _env_loaded = True
+        _latency_targets.update(parse_rate_limits(os.getenv("RATE_LIMIT_LATENCY", "")))
+        concurrency = parse_rate_limits(os.getenv("RATE_LIMIT_CONCURRENCY", ""))
+        spec = os.getenv("RATE_LIMITS")
+        if spec or concurrency:
+            configure_rate_limits(parse_rate_limits(spec or ""), concurrency={k: int(v) for k, v in concurrency.items()})
+
+
+def configure_rate_limits(limits: Dict[str, float], concurrency: Optional[Dict[str, int]] = None):
+    """Set process-wide requests-per-second limits (and optionally max concurrency) per provider.
+
+    Overrides RATE_LIMITS / RATE_LIMIT_CONCURRENCY; a rate of 0 removes the rate limit.
+    """
+    with _limiters_lock:
+        _load_env_limits()
+        for provider, rate in limits.items():
+            _limiter_for(provider).set_rate(rate if rate > 0 else None)
+            logger.info(f"Rate limit for {provider}: {rate if rate > 0 else 'unlimited'} req/s")
+        for provider, slots in (concurrency or {}).items():
+            _concurrency[provider.lower()] = slots
+            _limiter_for(provider).set_max_concurrency(slots)
+            logger.info(f"Concurrency limit for {provider}: {slots}")
+
+
+def _limiter_for(provider: str) -> AdaptiveLimiter:
+    provider = provider.lower()
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = AdaptiveLimiter(
+            provider,
+            max_concurrency=_concurrency.get(provider, int(os.getenv("RATE_LIMIT_MAX_CONCURRENCY", "16"))),
+            latency_target=_latency_targets.get(provider),
+            queue_timeout=float(os.getenv("RATE_LIMIT_QUEUE_TIMEOUT", "30"))
+        )
+    return limiter
+
+
+def get_rate_limiter(provider: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter for ``provider``, creating it on first use"""
+    with _limiters_lock:
+        _load_env_limits()
+        return _limiter_for(provider)
+
+
+def rate_limit_metrics() -> Dict[str, Dict[str, Optional[float]]]:
+    """Per-provider limiter metrics for this process"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.metrics() for provider, limiter in sorted(limiters.items())}
@@ -1,106 +1,240 @@
+import asyncio
+import httpx
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import logging
+from utils.cache import ResultCache, DEFAULT_CACHE_PATH, normalize_query
+from utils.call_stats import record_cache_hit
+from utils.rate_limit import RateLimitTimeout
+from utils.transport import get_transport, get_async_transport
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
-class WebSearchTool:
-    def __init__(self):
+class JSONAPITool:
+    """Shared request/decode helpers for tools backed by JSON HTTP APIs.
+
+    Each helper returns ``(data, error)`` where ``error`` is the ``{"error": ...}``
+    dict the tools hand back to the agent when a call fails. ``provider`` names the
+    rate limit bucket the request counts against, and ``parse`` turns the decoded body
+    into the tool's result under the same error handling.
+    """
+
+    def __init__(self, http=None, ahttp=None):
+        # Pooled keep-alive sessions with retry/backoff, shared with the other tools
+        self.http = http or get_transport()
+        self.ahttp = ahttp or get_async_transport()
+
+    def _request_json(self, url, params, provider, label, error_message, parse=None):
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{label} request: {params}")
+            response = self.http.get(url, params=params, provider=provider)
+            response.raise_for_status()  # This will raise an HTTPError if the response status is 4xx or 5xx
+            data = response.json()
+            return (parse(data) if parse else data), None
+        except RateLimitTimeout as e:
+            logger.warning(f"{label} skipped: {e}")
+            return None, {"error": f"{error_message}: {str(e)}"}
+        except requests.exceptions.RequestException as e:
+            logger.error(f"{label} failed due to a request error: {e}")
+            return None, {"error": f"{error_message}: {str(e)}"}
+        except ValueError as e:
+            logger.error(f"{label} failed due to JSON decoding error: {e}")
+            return None, {"error": f"Error decoding API response: {str(e)}"}
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            # ``parse`` runs inside this handler, so a malformed body is an error result too
+            logger.error(f"{label} returned an unexpected response: {e!r}")
+            return None, {"error": f"{error_message}: unexpected API response ({e!r})"}
+        except Exception as e:
+            logger.error(f"An unexpected error occurred during {label}: {e}")
+            return None, {"error": f"An unexpected error occurred: {str(e)}"}
+
+    async def _arequest_json(self, url, params, provider, label, error_message, parse=None):
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{label} request: {params}")
+            response = await self.ahttp.get(url, params=params, provider=provider)
+            response.raise_for_status()
+            data = response.json()
+            return (parse(data) if parse else data), None
+        except RateLimitTimeout as e:
+            logger.warning(f"{label} skipped: {e}")
+            return None, {"error": f"{error_message}: {str(e)}"}
+        except httpx.HTTPError as e:
+            logger.error(f"{label} failed due to a request error: {e}")
+            return None, {"error": f"{error_message}: {str(e)}"}
+        except ValueError as e:
+            logger.error(f"{label} failed due to JSON decoding error: {e}")
+            return None, {"error": f"Error decoding API response: {str(e)}"}
+        except (KeyError, IndexError, TypeError, AttributeError) as e:
+            # ``parse`` runs inside this handler, so a malformed body is an error result too
+            logger.error(f"{label} returned an unexpected response: {e!r}")
+            return None, {"error": f"{error_message}: unexpected API response ({e!r})"}
+        except Exception as e:
+            logger.error(f"An unexpected error occurred during {label}: {e}")
+            return None, {"error": f"An unexpected error occurred: {str(e)}"}
+
+class WebSearchTool(JSONAPITool):
+    def __init__(self, cache=None, http=None, ahttp=None):
+        super().__init__(http=http, ahttp=ahttp)
         self.api_key = os.getenv("SERPAPI_KEY")
-        self.base_url = "https://serpapi.com/search"
-        
+        self.base_url = os.getenv("SERPAPI_BASE_URL", "https://serpapi.com/search")
+
         self.google_api_key = os.getenv("GOOGLE_API_KEY")
         self.google_cse_id = os.getenv("GOOGLE_CSE_ID")
-        
+        self.google_url = os.getenv("GOOGLE_CSE_URL", "https://www.googleapis.com/customsearch/v1")
+
+        # Search results change slowly, so identical queries are served from cache
+        self.cache = cache or ResultCache(
+            "web_search",
+            ttl=int(os.getenv("SEARCH_CACHE_TTL", "86400")),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024")),
+            db_path=os.getenv("TOOL_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_disk_entries=int(os.getenv("SEARCH_CACHE_MAX_DISK_ENTRIES", "50000"))
+        )
+
         logger.info("WebSearchTool initialized")
-    
+
+    def _provider(self):
+        if self.api_key:
+            return "serpapi"
+        if self.google_api_key and self.google_cse_id:
+            return "google"
+        return None
+
+    def _store(self, cache_key, results):
+        # Never cache failures, the next call should retry the provider
+        if not (isinstance(results, dict) and "error" in results):
+            self.cache.set(cache_key, results)
+
     def search(self, query, num_results=3):
         logger.info(f"Web search: {query}")
-        
-        if self.api_key:
-            return self._search_serpapi(query, num_results)
-        elif self.google_api_key and self.google_cse_id:
-            return self._search_google(query, num_results)
+
+        provider = self._provider()
+        if provider is None:
+            logger.warning("No web search API keys configured, using demo data")
+            return self._get_demo_search_results(query)
+
+        cache_key = ResultCache.make_key(query, provider, num_results)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Web search cache hit for: {query}")
+            record_cache_hit()
+            return cached
+
+        if provider == "serpapi":
+            results = self._search_serpapi(query, num_results)
         else:
+            results = self._search_google(query, num_results)
+
+        self._store(cache_key, results)
+        return results
+
+    async def asearch(self, query, num_results=3):
+        """Async version of ``search``"""
+        logger.info(f"Web search (async): {query}")
+
+        provider = self._provider()
+        if provider is None:
             logger.warning("No web search API keys configured, using demo data")
             return self._get_demo_search_results(query)
-    
-    def _search_serpapi(self, query, num_results):
-        params = {
+
+        cache_key = ResultCache.make_key(query, provider, num_results)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Web search cache hit for: {query}")
+            record_cache_hit()
+            return cached
+
+        if provider == "serpapi":
+            results = await self._asearch_serpapi(query, num_results)
+        else:
+            results = await self._asearch_google(query, num_results)
+
+        self._store(cache_key, results)
+        return results
+
+    def _serpapi_params(self, query, num_results):
+        return {
             "q": query,
             "api_key": self.api_key,
             "engine": "google",
             "num": num_results
         }
-        
-        try:
-            logger.debug(f"SerpAPI request: {params}")
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()  # This will raise an HTTPError if the response status is 4xx or 5xx
-            results = response.json()  # Parse JSON response
-            
-            # Extract organic results
-            organic_results = results.get("organic_results", [])[:num_results]  # Limit to num_results
-            simplified_results = []
-            
-            for result in organic_results:
-                simplified_results.append({
-                    "title": result.get("title"),
-                    "snippet": result.get("snippet"),
-                    "link": result.get("link")
-                })
-            
-            logger.info(f"SerpAPI search returned {len(simplified_results)} results")
-            return simplified_results
-        except requests.exceptions.RequestException as e:
-            logger.error(f"SerpAPI search failed due to a request error: {e}")
-            return {"error": f"Error performing web search: {str(e)}"}
-        except ValueError as e:
-            logger.error(f"SerpAPI search failed due to JSON decoding error: {e}")
-            return {"error": f"Error decoding API response: {str(e)}"}
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during SerpAPI search: {e}")
-            return {"error": f"An unexpected error occurred: {str(e)}"}
-    
-    def _search_google(self, query, num_results):
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
+
+    def _parse_serpapi(self, results, num_results):
+        # Extract organic results
+        organic_results = results.get("organic_results", [])[:num_results]  # Limit to num_results
+        simplified_results = []
+
+        for result in organic_results:
+            simplified_results.append({
+                "title": result.get("title"),
+                "snippet": result.get("snippet"),
+                "link": result.get("link")
+            })
+
+        logger.info(f"SerpAPI search returned {len(simplified_results)} results")
+        return simplified_results
+
+    def _search_serpapi(self, query, num_results):
+        results, error = self._request_json(
+            self.base_url, self._serpapi_params(query, num_results),
+            "serpapi", "SerpAPI search", "Error performing web search",
+            parse=lambda data: self._parse_serpapi(data, num_results)
+        )
+        return error or results
+
+    async def _asearch_serpapi(self, query, num_results):
+        results, error = await self._arequest_json(
+            self.base_url, self._serpapi_params(query, num_results),
+            "serpapi", "SerpAPI search", "Error performing web search",
+            parse=lambda data: self._parse_serpapi(data, num_results)
+        )
+        return error or results
+
+    def _google_params(self, query, num_results):
+        return {
             "q": query,
             "key": self.google_api_key,
             "cx": self.google_cse_id,
             "num": min(num_results, 10)
         }
-        
-        try:
-            logger.debug(f"Google Custom Search request: {params}")
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            results = response.json()
-            
-            simplified_results = []
-            for item in results.get("items", [])[:num_results]:
-                simplified_results.append({
-                    "title": item.get("title"),
-                    "snippet": item.get("snippet"),
-                    "link": item.get("link")
-                })
-            
-            logger.info(f"Google Custom Search returned {len(simplified_results)} results")
-            return simplified_results
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Google Custom Search failed due to a request error: {e}")
-            return {"error": f"Error performing Google search: {str(e)}"}
-        except ValueError as e:
-            logger.error(f"Google Custom Search failed due to JSON decoding error: {e}")
-            return {"error": f"Error decoding API response: {str(e)}"}
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during Google Custom Search: {e}")
-            return {"error": f"An unexpected error occurred: {str(e)}"}
-    
+
+    def _parse_google(self, results, num_results):
+        simplified_results = []
+        for item in results.get("items", [])[:num_results]:
+            simplified_results.append({
+                "title": item.get("title"),
+                "snippet": item.get("snippet"),
+                "link": item.get("link")
+            })
+
+        logger.info(f"Google Custom Search returned {len(simplified_results)} results")
+        return simplified_results
+
+    def _search_google(self, query, num_results):
+        results, error = self._request_json(
+            self.google_url, self._google_params(query, num_results),
+            "google", "Google Custom Search", "Error performing Google search",
+            parse=lambda data: self._parse_google(data, num_results)
+        )
+        return error or results
+
+    async def _asearch_google(self, query, num_results):
+        results, error = await self._arequest_json(
+            self.google_url, self._google_params(query, num_results),
+            "google", "Google Custom Search", "Error performing Google search",
+            parse=lambda data: self._parse_google(data, num_results)
+        )
+        return error or results
+
     def _get_demo_search_results(self, query):
         """Return demo data for presentation when no APIs are configured"""
         return [
@@ -116,55 +250,291 @@ class WebSearchTool:
             }
         ]
 
-class WeatherTool:
-    def __init__(self):
+class WeatherTool(JSONAPITool):
+    """Current conditions and multi-day forecasts from OpenWeather.
+
+    Forecasts are fetched once per city (one request covers every day) and cached per
+    (city id, day). The city id each location name resolves to is remembered too, so
+    different spellings of the same city share their cached days.
+    """
+
+    # The free forecast endpoint covers five days in 3-hour steps
+    MAX_FORECAST_DAYS = 5
+
+    def __init__(self, cache=None, http=None, ahttp=None):
+        super().__init__(http=http, ahttp=ahttp)
         self.api_key = os.getenv("OPENWEATHER_API_KEY")
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.base_url = os.getenv("OPENWEATHER_BASE_URL", "http://api.openweathermap.org/data/2.5/weather")
+        self.forecast_url = os.getenv("OPENWEATHER_FORECAST_URL", "http://api.openweathermap.org/data/2.5/forecast")
+        self.max_workers = int(os.getenv("WEATHER_MAX_WORKERS", "8"))
+
+        # OpenWeather refreshes forecasts every few hours, so a day's forecast is reused that long
+        self.cache = cache or ResultCache(
+            "weather",
+            ttl=int(os.getenv("WEATHER_CACHE_TTL", "10800")),
+            max_entries=int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "2048")),
+            db_path=os.getenv("TOOL_CACHE_PATH", DEFAULT_CACHE_PATH)
+        )
+        # A name keeps resolving to the same city far longer than a forecast stays fresh
+        self.city_ttl = int(os.getenv("WEATHER_CITY_CACHE_TTL", str(30 * 86400)))
         logger.info("WeatherTool initialized")
-    
-    def get_weather(self, location):
+
+    def get_weather(self, location, days=None):
+        """Current conditions for ``location``, or a per-day forecast when ``days`` is given"""
+        if days:
+            return self.get_forecast(location, days)
         logger.info(f"Weather lookup: {location}")
-        
+
+        if not self.api_key:
+            logger.warning("OpenWeather API key not configured, using demo data")
+            return self._get_demo_weather_data(location)
+
+        data, error = self._request_json(
+            self.base_url, self._weather_params(location),
+            "openweather", "Weather lookup", "Error fetching weather",
+            parse=lambda data: self._parse_weather(data, location)
+        )
+        return error or data
+
+    async def aget_weather(self, location, days=None):
+        """Async version of ``get_weather``"""
+        if days:
+            return await self.aget_forecast(location, days)
+        logger.info(f"Weather lookup (async): {location}")
+
         if not self.api_key:
             logger.warning("OpenWeather API key not configured, using demo data")
             return self._get_demo_weather_data(location)
-        
-        params = {
+
+        data, error = await self._arequest_json(
+            self.base_url, self._weather_params(location),
+            "openweather", "Weather lookup", "Error fetching weather",
+            parse=lambda data: self._parse_weather(data, location)
+        )
+        return error or data
+
+    def get_forecast(self, location, days=3):
+        """Daily forecast for ``location`` starting today (city local time), at most five days"""
+        days = max(1, min(days, self.MAX_FORECAST_DAYS))
+        logger.info(f"Weather forecast lookup: {location} ({days} days)")
+
+        if not self.api_key:
+            logger.warning("OpenWeather API key not configured, using demo data")
+            return self._get_demo_forecast_data(location, days)
+
+        cached = self._cached_forecast(location, days)
+        if cached is not None:
+            logger.info(f"Weather forecast cache hit for: {location}")
+            record_cache_hit()
+            return cached
+
+        data, error = self._request_json(
+            self.forecast_url, self._forecast_params(location),
+            "openweather", "Weather forecast", "Error fetching weather forecast",
+            parse=lambda data: self._parse_forecast(data, location, days)
+        )
+        return error or data
+
+    async def aget_forecast(self, location, days=3):
+        """Async version of ``get_forecast``"""
+        days = max(1, min(days, self.MAX_FORECAST_DAYS))
+        logger.info(f"Weather forecast lookup (async): {location} ({days} days)")
+
+        if not self.api_key:
+            logger.warning("OpenWeather API key not configured, using demo data")
+            return self._get_demo_forecast_data(location, days)
+
+        cached = self._cached_forecast(location, days)
+        if cached is not None:
+            logger.info(f"Weather forecast cache hit for: {location}")
+            record_cache_hit()
+            return cached
+
+        data, error = await self._arequest_json(
+            self.forecast_url, self._forecast_params(location),
+            "openweather", "Weather forecast", "Error fetching weather forecast",
+            parse=lambda data: self._parse_forecast(data, location, days)
+        )
+        return error or data
+
+    def get_weather_many(self, locations, days=None):
+        """Weather for several locations at once, keyed by location name.
+
+        Lookups run concurrently. Names already known to resolve to the same city are
+        fetched once, and a city reached under a second name is reported as
+        ``{"same_as": <first name>}`` instead of repeating its weather.
+        """
+        groups = self._group_locations(locations)
+        if not groups:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as pool:
+            futures = [pool.submit(self.get_weather, names[0], days) for names in groups]
+            results = [future.result() for future in futures]
+        return self._merge_results(groups, results)
+
+    async def aget_weather_many(self, locations, days=None):
+        """Async version of ``get_weather_many``"""
+        groups = self._group_locations(locations)
+        if not groups:
+            return {}
+        results = await asyncio.gather(*(self.aget_weather(names[0], days) for names in groups))
+        return self._merge_results(groups, results)
+
+    def _group_locations(self, locations):
+        """Group names by the city they resolve to (or their normalized spelling if unknown yet)"""
+        groups = {}
+        for location in locations:
+            location = str(location).strip()
+            if not location:
+                continue
+            city = self.cache.get(self._city_key(location))
+            group_key = f"id:{city['id']}" if city else normalize_query(location)
+            groups.setdefault(group_key, []).append(location)
+        return list(groups.values())
+
+    def _merge_results(self, groups, results):
+        merged = {}
+        first_name_by_city = {}
+        for names, result in zip(groups, results):
+            city_id = result.get("city_id") if isinstance(result, dict) else None
+            if city_id is not None and city_id in first_name_by_city:
+                # Two spellings of one city that were not known to match before fetching
+                first_names = [first_name_by_city[city_id]]
+            else:
+                first_names = names[:1]
+                if city_id is not None:
+                    first_name_by_city[city_id] = names[0]
+                merged[names[0]] = result
+            for name in names:
+                if name not in first_names:
+                    merged[name] = {"same_as": first_names[0]}
+        return merged
+
+    def _weather_params(self, location):
+        return {
             "q": location,
             "appid": self.api_key,
             "units": "metric"
         }
-        
-        try:
-            logger.debug(f"OpenWeather API request: {params}")
-            response = requests.get(self.base_url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if data.get("cod") != 200:
-                logger.error(f"OpenWeather API error: {data.get('message', 'Unknown error')}")
-                return {"error": f"Error fetching weather: {data.get('message', 'Unknown error')}"}
-            
-            weather_info = {
-                "location": data.get("name"),
-                "temperature": data.get("main", {}).get("temp"),
-                "description": data.get("weather", [{}])[0].get("description"),
-                "humidity": data.get("main", {}).get("humidity"),
-                "wind_speed": data.get("wind", {}).get("speed")
-            }
-            
-            logger.info(f"Weather lookup successful for {location}")
-            return weather_info
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Weather lookup failed due to a request error: {e}")
-            return {"error": f"Error fetching weather: {str(e)}"}
-        except ValueError as e:
-            logger.error(f"Weather lookup failed due to JSON decoding error: {e}")
-            return {"error": f"Error decoding API response: {str(e)}"}
-        except Exception as e:
-            logger.error(f"An unexpected error occurred during weather lookup: {e}")
-            return {"error": f"An unexpected error occurred: {str(e)}"}
-    
+
+    def _forecast_params(self, location):
+        params = {"appid": self.api_key, "units": "metric"}
+        city = self.cache.get(self._city_key(location))
+        if city:
+            params["id"] = city["id"]
+        else:
+            params["q"] = location
+        return params
+
+    @staticmethod
+    def _city_key(location):
+        return ResultCache.make_key("city", location)
+
+    @staticmethod
+    def _day_key(city_id, date):
+        return ResultCache.make_key("forecast", city_id, date)
+
+    def _remember_city(self, location, city):
+        if city.get("id") is None:
+            return
+        for name in {location, city.get("name") or location}:
+            self.cache.set(self._city_key(name), city, ttl=self.city_ttl)
+
+    def _local_dates(self, timezone_offset, days):
+        """The next ``days`` calendar dates in a city ``timezone_offset`` seconds from UTC"""
+        today = (datetime.now(timezone.utc) + timedelta(seconds=timezone_offset)).date()
+        return [(today + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+    def _cached_forecast(self, location, days):
+        city = self.cache.get(self._city_key(location))
+        if not city:
+            return None
+        forecast = []
+        for date in self._local_dates(city.get("timezone", 0), days):
+            day = self.cache.get(self._day_key(city["id"], date))
+            if day is None:
+                return None
+            forecast.append(day)
+        return self._forecast_result(city, forecast)
+
+    def _forecast_result(self, city, forecast):
+        return {
+            "location": city.get("name"),
+            "country": city.get("country"),
+            "city_id": city.get("id"),
+            "forecast": forecast
+        }
+
+    def _parse_forecast(self, data, location, days):
+        # The forecast endpoint reports "cod" as a string
+        if str(data.get("cod")) != "200":
+            logger.error(f"OpenWeather API error: {data.get('message', 'Unknown error')}")
+            return {"error": f"Error fetching weather forecast: {data.get('message', 'Unknown error')}"}
+
+        city_data = data.get("city", {})
+        city = {
+            "id": city_data.get("id"),
+            "name": city_data.get("name") or location,
+            "country": city_data.get("country"),
+            "timezone": city_data.get("timezone", 0)
+        }
+
+        # Group the 3-hourly entries into calendar days in the city's own time zone
+        entries_by_date = {}
+        for entry in data.get("list", []):
+            local_time = datetime.fromtimestamp(entry["dt"] + city["timezone"], timezone.utc)
+            entries_by_date.setdefault(local_time.date().isoformat(), []).append(entry)
+        summaries = {date: self._summarize_day(date, entries) for date, entries in entries_by_date.items()}
+
+        self._remember_city(location, city)
+        if city["id"] is not None:
+            for date, summary in summaries.items():
+                self.cache.set(self._day_key(city["id"], date), summary)
+
+        forecast = [summaries[date] for date in self._local_dates(city["timezone"], days) if date in summaries]
+        logger.info(f"Weather forecast lookup successful for {location} ({len(forecast)} days)")
+        return self._forecast_result(city, forecast)
+
+    def _summarize_day(self, date, entries):
+        temperatures = [entry.get("main", {}).get("temp") for entry in entries]
+        temperatures = [temperature for temperature in temperatures if temperature is not None]
+        descriptions = [entry.get("weather", [{}])[0].get("description") for entry in entries]
+        descriptions = [description for description in descriptions if description]
+        humidities = [entry.get("main", {}).get("humidity") for entry in entries]
+        humidities = [humidity for humidity in humidities if humidity is not None]
+        return {
+            "date": date,
+            "temp_min": min(temperatures) if temperatures else None,
+            "temp_max": max(temperatures) if temperatures else None,
+            "description": max(set(descriptions), key=descriptions.count) if descriptions else None,
+            "humidity": round(sum(humidities) / len(humidities)) if humidities else None,
+            "wind_speed": max((entry.get("wind", {}).get("speed") or 0 for entry in entries), default=None),
+            "chance_of_rain": max((entry.get("pop") or 0 for entry in entries), default=None)
+        }
+
+    def _parse_weather(self, data, location):
+        if data.get("cod") != 200:
+            logger.error(f"OpenWeather API error: {data.get('message', 'Unknown error')}")
+            return {"error": f"Error fetching weather: {data.get('message', 'Unknown error')}"}
+
+        weather_info = {
+            "location": data.get("name"),
+            "city_id": data.get("id"),
+            "temperature": data.get("main", {}).get("temp"),
+            "description": data.get("weather", [{}])[0].get("description"),
+            "humidity": data.get("main", {}).get("humidity"),
+            "wind_speed": data.get("wind", {}).get("speed")
+        }
+        self._remember_city(location, {
+            "id": data.get("id"),
+            "name": data.get("name") or location,
+            "country": data.get("sys", {}).get("country"),
+            "timezone": data.get("timezone", 0)
+        })
+
+        logger.info(f"Weather lookup successful for {location}")
+        return weather_info
+
     def _get_demo_weather_data(self, location):
         """Return demo weather data for presentation"""
         return {
@@ -174,4 +544,16 @@ class WeatherTool:
             "humidity": 65,
             "wind_speed": 3.5,
             "source": "demo_data"
-        }
\ No newline at end of file
+        }
+
+    def _get_demo_forecast_data(self, location, days):
+        """Return demo forecast data for presentation"""
+        return {
+            "location": location,
+            "forecast": [
+                {"date": date, "temp_min": 18, "temp_max": 27, "description": "Partly cloudy",
+                 "humidity": 65, "wind_speed": 3.5, "chance_of_rain": 0.1}
+                for date in self._local_dates(0, days)
+            ],
+            "source": "demo_data"
+        }
@@ -0,0 +1,239 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.call_stats import record_retry
+from utils.rate_limit import RateLimitTimeout, get_rate_limiter
+
+# Get logger for this module
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (delta-seconds or HTTP date) to seconds, or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HTTPTransport:
+    """Shared HTTP layer for the external tools.
+
+    Keeps one pooled keep-alive ``requests.Session`` per host and retries transient
+    failures (connection errors, timeouts, 429 and 5xx) with jittered exponential
+    backoff, honoring ``Retry-After`` when the server sends it.
+    """
+
+    def __init__(self, pool_size=10, max_retries=3, backoff_base=0.5, backoff_max=10.0,
+                 connect_timeout=3.05, read_timeout=10.0):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = (connect_timeout, read_timeout)
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a transport configured from HTTP_* environment variables"""
+        return cls(
+            pool_size=int(os.getenv("HTTP_POOL_SIZE", "10")),
+            max_retries=int(os.getenv("HTTP_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("HTTP_BACKOFF_BASE", "0.5")),
+            backoff_max=float(os.getenv("HTTP_BACKOFF_MAX", "10")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+        )
+
+    def _session_for(self, url):
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled in get() so that backoff and Retry-After are under our control
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                logger.debug(f"Opened pooled HTTP session for {host}")
+            return session
+
+    def backoff_delay(self, attempt, response=None):
+        """Seconds to wait before retry number ``attempt`` (0-based)"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+        # Full jitter keeps concurrent clients from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _release(limiter, admitted, sent, response):
+        """Report one attempt to the provider's limiter so its concurrency limit adapts"""
+        if response is None:
+            limiter.release(admitted)
+            return
+        throttled = response.status_code == 429
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if throttled else None
+        limiter.release(admitted, latency=time.monotonic() - sent, throttled=throttled, retry_after=retry_after)
+
+    def get(self, url, params=None, provider=None, **kwargs):
+        """GET ``url`` with pooling and retries.
+
+        Returns the final response (the caller decides whether to ``raise_for_status``)
+        or raises the last ``requests`` exception once retries are exhausted. Every
+        attempt queues for a slot from ``provider``'s limiter and raises
+        ``RateLimitTimeout`` if none frees up in time.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self._session_for(url)
+        limiter = get_rate_limiter(provider) if provider else None
+
+        attempt = 0
+        while True:
+            admitted = limiter.acquire() if limiter is not None else None
+            if limiter is not None and admitted is None:
+                raise RateLimitTimeout(provider, limiter.queue_timeout)
+            sent = time.monotonic()
+            response = None
+            try:
+                response = session.get(url, params=params, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"HTTP request to {urlsplit(url).netloc} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self.backoff_delay(attempt, response)
+                logger.warning(f"HTTP {response.status_code} from {urlsplit(url).netloc}, retrying in {delay:.2f}s")
+                response.close()
+            finally:
+                if limiter is not None:
+                    self._release(limiter, admitted, sent, response)
+
+            record_retry()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+class AsyncHTTPTransport(HTTPTransport):
+    """Asyncio counterpart of ``HTTPTransport`` built on ``httpx.AsyncClient``.
+
+    httpx clients are bound to the event loop they were first used on, so one pooled
+    client is kept per running loop. Retry and backoff policy is the same as the sync
+    transport.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size),
+                    timeout=httpx.Timeout(self.timeout[1], connect=self.timeout[0])
+                )
+                self._clients[loop] = client
+            return client
+
+    async def get(self, url, params=None, provider=None, **kwargs):
+        """Async GET with the same retry and rate limit semantics as ``HTTPTransport.get``"""
+        client = self._client()
+        limiter = get_rate_limiter(provider) if provider else None
+
+        attempt = 0
+        while True:
+            admitted = await limiter.aacquire() if limiter is not None else None
+            if limiter is not None and admitted is None:
+                raise RateLimitTimeout(provider, limiter.queue_timeout)
+            sent = time.monotonic()
+            response = None
+            try:
+                response = await client.get(url, params=params, **kwargs)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(f"HTTP request to {urlsplit(url).netloc} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = self.backoff_delay(attempt, response)
+                logger.warning(f"HTTP {response.status_code} from {urlsplit(url).netloc}, retrying in {delay:.2f}s")
+            finally:
+                if limiter is not None:
+                    self._release(limiter, admitted, sent, response)
+
+            record_retry()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        """Close the client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+
+_default_transport = None
+_default_async_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport shared by all tools"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HTTPTransport.from_env()
+        return _default_transport
+
+
+def get_async_transport():
+    """Return the process-wide async transport shared by all tools"""
+    global _default_async_transport
+    with _default_transport_lock:
+        if _default_async_transport is None:
+            _default_async_transport = AsyncHTTPTransport.from_env()
+        return _default_async_transport
@@ -0,0 +1,163 @@
+"""Plan generation workers.
+
+Runs a pool of worker processes that pick up plan jobs enqueued by app.py (when
+USE_JOB_QUEUE is enabled), generate the plan and save it with save_plan:
+
+    python worker.py --workers 4
+
+Workers can run on any host that can reach the MongoDB configured in .env.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def job_heartbeat(job_queue, job_id, worker_id, interval):
+    """Refresh the job's heartbeat every ``interval`` seconds while the block runs.
+
+    Keeps a slow plan (long LLM call, no streamed days yet) from looking stale to
+    ``requeue_stale`` on other workers.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        while not stopped.wait(interval):
+            try:
+                if not job_queue.heartbeat(job_id, worker_id):
+                    return
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def process_job(job, job_queue, agent, db_client, worker_id, plan_cache=None, heartbeat_interval=60):
+    """Generate the plan for one claimed job and record the outcome on the job"""
+    job_id = job["_id"]
+    goal = job["goal"]
+    planned_days = []
+
+    def generate_with_progress(goal):
+        plan, trace = None, []
+        for event, payload in agent.stream_plan(goal):
+            if event == "day":
+                planned_days.append(payload[0])
+                job_queue.update_progress(job_id, worker_id, min(90, 20 + 15 * len(planned_days)),
+                                          f"Planned {payload[0]}")
+            elif event == "trace":
+                trace = payload
+            elif event == "plan":
+                plan = payload
+        return plan, trace
+
+    try:
+        with job_heartbeat(job_queue, job_id, worker_id, heartbeat_interval):
+            job_queue.update_progress(job_id, worker_id, 10, "Gathering information")
+            if plan_cache is not None:
+                result = plan_cache.get_or_generate(
+                    goal, generate_with_progress, regenerate=job["options"].get("regenerate", False)
+                )
+                plan, plan_id = result["plan"], result["plan_id"]
+            else:
+                plan, trace = generate_with_progress(goal)
+                plan_id = None if "error" in plan else db_client.save_plan(goal, plan, trace)
+
+        if "error" in plan:
+            job_queue.fail(job_id, worker_id, plan["error"])
+        elif job_queue.complete(job_id, worker_id, plan_id):
+            logger.info(f"Job {job_id} completed with plan {plan_id}")
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed: {e}")
+        job_queue.fail(job_id, worker_id, str(e))
+
+
+def worker_loop(job_queue, agent, db_client, worker_id, stop_event, plan_cache=None,
+                poll_interval=1.0, stale_after=600, heartbeat_interval=60):
+    """Claim and process jobs until ``stop_event`` is set"""
+    logger.info(f"Worker {worker_id} started")
+    while not stop_event.is_set():
+        job = job_queue.claim(worker_id)
+        if job is None:
+            # Idle workers also recover jobs abandoned by workers that died mid-run
+            job_queue.requeue_stale(stale_after)
+            stop_event.wait(poll_interval)
+            continue
+        logger.info(f"Worker {worker_id} claimed job {job['_id']}")
+        process_job(job, job_queue, agent, db_client, worker_id, plan_cache, heartbeat_interval)
+    logger.info(f"Worker {worker_id} stopped")
+
+
+def run_worker_process(worker_index, stop_event, poll_interval, stale_after, heartbeat_interval):
+    """Entry point of one worker process: builds its own agent and database clients"""
+    # Ctrl+C is handled by the parent, which lets each worker finish its current job
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_dotenv()
+    from logging_config import setup_logging
+    from agent.task_agent import TaskPlanningAgent
+    from utils.database import MongoDBClient
+    from utils.jobs import MongoJobQueue
+    from utils.plan_cache import PlanCache
+
+    setup_logging()
+    db_client = MongoDBClient(
+        os.environ["MONGO_DB_URI"], os.environ["MONGO_DB_NAME"], os.environ["MONGO_DB_COLLECTION"]
+    )
+    worker_id = f"{socket.gethostname()}-{os.getpid()}-{worker_index}"
+    worker_loop(
+        MongoJobQueue(db_client), TaskPlanningAgent(), db_client, worker_id, stop_event,
+        plan_cache=PlanCache(db_client), poll_interval=poll_interval, stale_after=stale_after,
+        heartbeat_interval=heartbeat_interval
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("PLAN_WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between queue polls when idle")
+    parser.add_argument("--stale-after", type=float, default=600,
+                        help="seconds without a heartbeat before a running job is requeued")
+    parser.add_argument("--heartbeat-interval", type=float, default=60,
+                        help="seconds between heartbeats of a running job (keep well below --stale-after)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    processes = [
+        context.Process(target=run_worker_process, args=(i, stop_event, args.poll_interval, args.stale_after,
+                                                      args.heartbeat_interval),
+                        name=f"plan-worker-{i}")
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"Started {args.workers} plan worker(s); press Ctrl+C to stop")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("Stopping workers after their current job...")
+        stop_event.set()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()